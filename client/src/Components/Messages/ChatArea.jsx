@@ -1,5 +1,6 @@
+import { useRef, useLayoutEffect } from 'react'
 import { Link } from 'react-router-dom'
-import { ArrowLeft } from 'lucide-react'
+import { ArrowLeft, Loader } from 'lucide-react'
 import MessageBubble from './MessageBubble'
 import MessageInput from './MessageInput'
 
@@ -12,8 +13,33 @@ const ChatArea = ({
   onSendMessage,
   sending,
   showBackButton = false,
-  onBackClick
+  onBackClick,
+  hasOlderMessages = false,
+  loadingOlderMessages = false,
+  onLoadOlderMessages
 }) => {
+  const scrollRef = useRef(null)
+  const scrollAnchorRef = useRef(null)
+
+  // Older pages are prepended: keep the messages in view where they were
+  useLayoutEffect(() => {
+    const container = scrollRef.current
+    if (container && scrollAnchorRef.current !== null && !loadingOlderMessages) {
+      container.scrollTop += container.scrollHeight - scrollAnchorRef.current
+      scrollAnchorRef.current = null
+    }
+  }, [messages, loadingOlderMessages])
+
+  const loadOlderMessages = () => {
+    if (!hasOlderMessages || loadingOlderMessages || !onLoadOlderMessages) return
+    scrollAnchorRef.current = scrollRef.current ? scrollRef.current.scrollHeight : null
+    onLoadOlderMessages()
+  }
+
+  const handleScroll = (e) => {
+    if (e.currentTarget.scrollTop < 80) loadOlderMessages()
+  }
+
   const filteredMessages = searchQuery ? 
     messages.filter(msg => 
       msg.text.toLowerCase().includes(searchQuery.toLowerCase())
@@ -64,7 +90,21 @@ const ChatArea = ({
         </div>
       </div>
 
-      <div className="flex-1 overflow-y-auto p-6 space-y-4">
+      <div ref={scrollRef} onScroll={handleScroll} className="flex-1 overflow-y-auto p-6 space-y-4">
+        {hasOlderMessages && (
+          <div className="text-center">
+            {loadingOlderMessages ? (
+              <Loader className="w-5 h-5 text-primary mx-auto animate-spin" />
+            ) : (
+              <button
+                onClick={loadOlderMessages}
+                className="text-sm text-primary hover:text-primary-700"
+              >
+                Load earlier messages
+              </button>
+            )}
+          </div>
+        )}
         {searchQuery && (
           <div className="text-center py-2">
             <span className="text-sm text-gray-500 bg-gray-100 px-3 py-1 rounded-full">
@@ -7,7 +7,10 @@ const ConversationList = ({
   selectedConversation, 
   onSelectConversation, 
   searchQuery, 
-  onSearchChange 
+  onSearchChange,
+  hasMore = false,
+  loadingMore = false,
+  onLoadMore
 }) => {
   const filteredConversations = conversations.filter(conv => 
     conv.artisan.name.toLowerCase().includes(searchQuery.toLowerCase()) ||
@@ -82,6 +85,15 @@ const ConversationList = ({
             </button>
           ))
         )}
+        {!loading && hasMore && (
+          <button
+            onClick={onLoadMore}
+            disabled={loadingMore}
+            className="w-full p-3 text-sm text-primary hover:bg-gray-50 disabled:opacity-50"
+          >
+            {loadingMore ? 'Loading...' : 'Load more conversations'}
+          </button>
+        )}
       </div>
     </div>
   )
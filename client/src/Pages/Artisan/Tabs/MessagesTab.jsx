@@ -15,7 +15,13 @@ const MessagesTab = ({ loading, authLoading }) => {
     selectedConversation,
     setSelectedConversation,
     sending,
-    sendMessage
+    sendMessage,
+    hasMoreConversations,
+    loadingMoreConversations,
+    loadMoreConversations,
+    hasOlderMessages,
+    loadingOlderMessages,
+    loadOlderMessages
   } = useMessages(null, true) // No initial ID, but authenticated
   
   const currentConversation = conversations.find(c => c.id === selectedConversation)
@@ -53,6 +59,9 @@ const MessagesTab = ({ loading, authLoading }) => {
               setMessageText={setMessageText}
               onSendMessage={handleSendMessage}
               sending={sending}
+              hasOlderMessages={hasOlderMessages}
+              loadingOlderMessages={loadingOlderMessages}
+              onLoadOlderMessages={loadOlderMessages}
               showBackButton={true}
               onBackClick={() => {
                 setSelectedConversationId(null)
@@ -120,6 +129,15 @@ const MessagesTab = ({ loading, authLoading }) => {
                         </div>
                       </button>
                     )})}
+                    {hasMoreConversations && (
+                      <button
+                        onClick={loadMoreConversations}
+                        disabled={loadingMoreConversations}
+                        className="w-full p-3 text-sm text-primary hover:bg-gray-50 disabled:opacity-50"
+                      >
+                        {loadingMoreConversations ? 'Loading...' : 'Load more conversations'}
+                      </button>
+                    )}
                   </div>
                 )}
               </div>
@@ -135,6 +153,9 @@ const MessagesTab = ({ loading, authLoading }) => {
                 setMessageText={setMessageText}
                 onSendMessage={handleSendMessage}
                 sending={sending}
+                hasOlderMessages={hasOlderMessages}
+                loadingOlderMessages={loadingOlderMessages}
+                onLoadOlderMessages={loadOlderMessages}
               />
             </div>
           </div>
@@ -194,6 +215,15 @@ const MessagesTab = ({ loading, authLoading }) => {
                     </div>
                   </button>
                 ))}
+                {hasMoreConversations && (
+                  <button
+                    onClick={loadMoreConversations}
+                    disabled={loadingMoreConversations}
+                    className="w-full p-3 text-sm text-primary hover:bg-gray-50 disabled:opacity-50"
+                  >
+                    {loadingMoreConversations ? 'Loading...' : 'Load more conversations'}
+                  </button>
+                )}
               </div>
             )}
           </div>
@@ -2,9 +2,9 @@ import { Link } from 'react-router-dom'
 import { Search, Grid, List, MapPin, Heart } from 'lucide-react'
 import { CardSkeleton } from '../../../Components/SkeletonLoader'
 import LazyImage from '../../../Components/LazyImage'
+import { useProductCatalog } from '../../../hooks/useProductCatalog'
 
 const ExploreTab = ({ 
-  exploreProducts, 
   exploreCategories, 
   searchTerm, 
   setSearchTerm,
@@ -14,20 +14,22 @@ const ExploreTab = ({
   setSortBy,
   viewMode, 
   setViewMode,
-  exploreLoading, 
   authLoading,
   favoriteProducts,
   toggleFavorite
 }) => {
-  const filteredProducts = exploreProducts.filter(product => {
-    const matchesSearch = product.title?.toLowerCase().includes(searchTerm.toLowerCase()) ||
-                         product.description?.toLowerCase().includes(searchTerm.toLowerCase()) ||
-                         product.artisan_name?.toLowerCase().includes(searchTerm.toLowerCase())
-    const matchesCategory = selectedCategory === 'all' || product.category?.toLowerCase() === selectedCategory
-    return matchesSearch && matchesCategory
-  })
+  // The category and search filters are applied by the server; sorting
+  // orders the products loaded so far
+  const {
+    products: exploreProducts,
+    loading: exploreLoading,
+    loadingMore,
+    error,
+    hasMore,
+    loadMore
+  } = useProductCatalog({ categoryId: selectedCategory, searchTerm })
 
-  const sortedProducts = [...filteredProducts].sort((a, b) => {
+  const sortedProducts = [...exploreProducts].sort((a, b) => {
     switch (sortBy) {
       case "price-low":
         return (a.price || 0) - (b.price || 0)
@@ -75,7 +77,7 @@ const ExploreTab = ({
                     : "bg-gray-100 text-gray-700 hover:bg-gray-200"
                 }`}
               >
-                {category.name} ({category.count})
+                {category.name}
               </button>
             ))}
           </div>
@@ -199,7 +201,23 @@ const ExploreTab = ({
           {[1, 2, 3, 4, 5, 6].map((i) => <CardSkeleton key={i} />)}
         </div>
       )}
-      {!exploreLoading && exploreProducts.length === 0 && (
+      {!exploreLoading && hasMore && (
+        <div className="flex justify-center mt-10">
+          <button
+            onClick={loadMore}
+            disabled={loadingMore}
+            className="px-6 py-3 bg-primary-600 text-white rounded-xl font-medium hover:bg-primary-700 disabled:opacity-50"
+          >
+            {loadingMore ? "Loading..." : "Load more"}
+          </button>
+        </div>
+      )}
+      {!exploreLoading && error && (
+        <div className="text-center py-16 text-red-600">
+          <p>Failed to load products. Please try again.</p>
+        </div>
+      )}
+      {!exploreLoading && !error && exploreProducts.length === 0 && (
         <div className="text-center py-16 text-gray-600">
           <Search className="w-12 h-12 mx-auto mb-4 text-gray-400" />
           <p>No products found. Try adjusting your filters.</p>
@@ -5,7 +5,7 @@ import { useMessages } from '../../../hooks/useMessages'
 import ChatArea from '../../../Components/Messages/ChatArea'
 import { formatMessageTime } from '../../../utils/dateUtils'
 
-const MessagesTab = ({ messages, loading, authLoading, initialArtisanId }) => {
+const MessagesTab = ({ loading, authLoading, initialArtisanId }) => {
   const [selectedConversationId, setSelectedConversationId] = useState(null)
   const [messageText, setMessageText] = useState('')
   const {
@@ -14,7 +14,13 @@ const MessagesTab = ({ messages, loading, authLoading, initialArtisanId }) => {
     selectedConversation,
     setSelectedConversation,
     sending,
-    sendMessage
+    sendMessage,
+    hasMoreConversations,
+    loadingMoreConversations,
+    loadMoreConversations,
+    hasOlderMessages,
+    loadingOlderMessages,
+    loadOlderMessages
   } = useMessages(initialArtisanId, !!initialArtisanId)
   
   // Set initial conversation when initialArtisanId is provided
@@ -41,7 +47,7 @@ const MessagesTab = ({ messages, loading, authLoading, initialArtisanId }) => {
       await sendMessage(messageText, null, currentConversation)
       setMessageText('')
     } catch (error) {
-      alert('Failed to send message. Please try again.')
+      alert('Failed to send conversation?. Please try again.')
     }
   }
   
@@ -64,6 +70,9 @@ const MessagesTab = ({ messages, loading, authLoading, initialArtisanId }) => {
               setMessageText={setMessageText}
               onSendMessage={handleSendMessage}
               sending={sending}
+              hasOlderMessages={hasOlderMessages}
+              loadingOlderMessages={loadingOlderMessages}
+              onLoadOlderMessages={loadOlderMessages}
               showBackButton={true}
               onBackClick={() => {
                 setSelectedConversationId(null)
@@ -87,7 +96,7 @@ const MessagesTab = ({ messages, loading, authLoading, initialArtisanId }) => {
                   <div className="p-4">
                     <ListSkeleton />
                   </div>
-                ) : messages.length === 0 ? (
+                ) : conversations.length === 0 ? (
                   <div className="p-8 text-center">
                     <MessageSquare className="w-12 h-12 text-gray-400 mx-auto mb-4" />
                     <h3 className="text-lg font-semibold text-gray-900 mb-2">No messages yet</h3>
@@ -95,44 +104,53 @@ const MessagesTab = ({ messages, loading, authLoading, initialArtisanId }) => {
                   </div>
                 ) : (
                   <div>
-                    {messages.map((message, index) => {
+                    {conversations.map((conversation) => {
                       return (
                       <button
-                        key={message.id}
-                        onClick={() => handleConversationClick(message.artisan?.id || message.id)}
+                        key={conversation.id}
+                        onClick={() => handleConversationClick(conversation.artisan?.id || conversation.id)}
                         className={`w-full flex items-center p-4 hover:bg-gray-50 transition-colors text-left border-b border-gray-100 ${
-                          activeConversationId === (message.artisan?.id || message.id) ? 'bg-blue-50 border-blue-200' : ''
+                          activeConversationId === (conversation.artisan?.id || conversation.id) ? 'bg-blue-50 border-blue-200' : ''
                         }`}
                       >
                         <div className="w-12 h-12 rounded-full overflow-hidden flex-shrink-0 mr-3">
                           <img 
-                            src={message.artisan?.avatar || '/images/placeholder-avatar.jpg'} 
-                            alt={message.artisan?.name || 'Artisan'}
+                            src={conversation.artisan?.avatar || '/images/placeholder-avatar.jpg'} 
+                            alt={conversation.artisan?.name || 'Artisan'}
                             className="w-full h-full object-cover"
                           />
                         </div>
                         <div className="flex-1 min-w-0">
                           <div className="flex items-center justify-between mb-1">
                             <h3 className="text-sm font-semibold text-gray-900 truncate">
-                              {message.sender_name || message.artisan?.name || 'Artisan'}
+                              {conversation.sender_name || conversation.artisan?.name || 'Artisan'}
                             </h3>
                             <span className="text-xs text-gray-500 ml-2 flex-shrink-0">
-                              {formatMessageTime(message.lastMessageTime || message.timestamp || message.created_at)}
+                              {formatMessageTime(conversation.lastMessageTime || conversation.timestamp || conversation.created_at)}
                             </span>
                           </div>
                           <div className="flex items-center justify-between">
                             <p className="text-xs text-gray-600 truncate">
-                              {message.lastMessage || message.message || 'No messages yet'}
+                              {conversation.lastMessage || conversation.message || 'No messages yet'}
                             </p>
-                            {message.unread > 0 && (
+                            {conversation.unread > 0 && (
                               <span className="bg-blue-500 text-white text-xs rounded-full px-2 py-1 ml-2 flex-shrink-0">
-                                {message.unread}
+                                {conversation.unread}
                               </span>
                             )}
                           </div>
                         </div>
                       </button>
                     )})}
+                    {hasMoreConversations && (
+                      <button
+                        onClick={loadMoreConversations}
+                        disabled={loadingMoreConversations}
+                        className="w-full p-3 text-sm text-primary hover:bg-gray-50 disabled:opacity-50"
+                      >
+                        {loadingMoreConversations ? 'Loading...' : 'Load more conversations'}
+                      </button>
+                    )}
                   </div>
                 )}
               </div>
@@ -148,6 +166,9 @@ const MessagesTab = ({ messages, loading, authLoading, initialArtisanId }) => {
                 setMessageText={setMessageText}
                 onSendMessage={handleSendMessage}
                 sending={sending}
+                hasOlderMessages={hasOlderMessages}
+                loadingOlderMessages={loadingOlderMessages}
+                onLoadOlderMessages={loadOlderMessages}
               />
             </div>
           </div>
@@ -164,7 +185,7 @@ const MessagesTab = ({ messages, loading, authLoading, initialArtisanId }) => {
               <div className="p-4">
                 <ListSkeleton />
               </div>
-            ) : messages.length === 0 ? (
+            ) : conversations.length === 0 ? (
               <div className="p-8 text-center">
                 <MessageSquare className="w-12 h-12 text-gray-400 mx-auto mb-4" />
                 <h3 className="text-lg font-semibold text-gray-900 mb-2">No messages yet</h3>
@@ -172,41 +193,50 @@ const MessagesTab = ({ messages, loading, authLoading, initialArtisanId }) => {
               </div>
             ) : (
               <div>
-                {messages.map((message, index) => (
+                {conversations.map((conversation) => (
                   <button
-                    key={message.id}
-                    onClick={() => handleConversationClick(message.artisan?.id || message.id)}
+                    key={conversation.id}
+                    onClick={() => handleConversationClick(conversation.artisan?.id || conversation.id)}
                     className="w-full flex items-center p-4 hover:bg-gray-50 transition-colors text-left border-b border-gray-100"
                   >
                     <div className="w-12 h-12 rounded-full overflow-hidden flex-shrink-0 mr-3">
                       <img 
-                        src={message.artisan?.avatar || '/images/placeholder-avatar.jpg'} 
-                        alt={message.artisan?.name || 'Artisan'}
+                        src={conversation.artisan?.avatar || '/images/placeholder-avatar.jpg'} 
+                        alt={conversation.artisan?.name || 'Artisan'}
                         className="w-full h-full object-cover"
                       />
                     </div>
                     <div className="flex-1 min-w-0">
                       <div className="flex items-center justify-between mb-1">
                         <h3 className="text-sm font-semibold text-gray-900 truncate">
-                          {message.sender_name || message.artisan?.name || 'Artisan'}
+                          {conversation.sender_name || conversation.artisan?.name || 'Artisan'}
                         </h3>
                         <span className="text-xs text-gray-500 ml-2 flex-shrink-0">
-                          {formatMessageTime(message.lastMessageTime || message.timestamp || message.created_at)}
+                          {formatMessageTime(conversation.lastMessageTime || conversation.timestamp || conversation.created_at)}
                         </span>
                       </div>
                       <div className="flex items-center justify-between">
                         <p className="text-xs text-gray-600 truncate">
-                          {message.lastMessage || message.message || 'No messages yet'}
+                          {conversation.lastMessage || conversation.message || 'No messages yet'}
                         </p>
-                        {message.unread > 0 && (
+                        {conversation.unread > 0 && (
                           <span className="bg-blue-500 text-white text-xs rounded-full px-2 py-1 ml-2 flex-shrink-0">
-                            {message.unread}
+                            {conversation.unread}
                           </span>
                         )}
                       </div>
                     </div>
                   </button>
                 ))}
+                {hasMoreConversations && (
+                  <button
+                    onClick={loadMoreConversations}
+                    disabled={loadingMoreConversations}
+                    className="w-full p-3 text-sm text-primary hover:bg-gray-50 disabled:opacity-50"
+                  >
+                    {loadingMoreConversations ? 'Loading...' : 'Load more conversations'}
+                  </button>
+                )}
               </div>
             )}
           </div>
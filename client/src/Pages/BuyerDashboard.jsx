@@ -53,7 +53,6 @@ const BuyerDashboard = ({ authLoading = false }) => {
   });
 
   // Explore tab state
-  const [exploreProducts, setExploreProducts] = useState([]);
   const [exploreCategories, setExploreCategories] = useState([]);
   const [searchTerm, setSearchTerm] = useState("");
   const [selectedCategory, setSelectedCategory] = useState("all");
@@ -63,7 +62,6 @@ const BuyerDashboard = ({ authLoading = false }) => {
   // Loading and error states
   const [loading, setLoading] = useState(false);
   const [dashboardLoading, setDashboardLoading] = useState(true);
-  const [exploreLoading, setExploreLoading] = useState(false);
   const [productLoading, setProductLoading] = useState(false);
   const [error, setError] = useState(null);
 
@@ -122,6 +120,7 @@ const BuyerDashboard = ({ authLoading = false }) => {
         api.messages.getConversations(),
         api.favorites.getAll(),
         api.payments.getAll(),
+        api.favorites.getIds(),
       ]);
 
       const ordersData =
@@ -132,16 +131,16 @@ const BuyerDashboard = ({ authLoading = false }) => {
         results[2].status === "fulfilled" ? results[2].value : [];
       const paymentsData =
         results[3].status === "fulfilled" ? results[3].value : [];
+      const favoriteIdsData =
+        results[4].status === "fulfilled" ? results[4].value : [];
 
       setOrders(ordersData || []);
       setMessages(messagesData || []);
       setCollections(collectionsData || []);
       setPayments(paymentsData || []);
 
-      // Extract favorite product IDs
-      const favoriteIds = new Set(
-        (collectionsData || []).map((fav) => fav.product_id || fav.id)
-      );
+      // Every favorited product id (the favorites list above is only its first page)
+      const favoriteIds = new Set(favoriteIdsData || []);
       setFavoriteProducts(favoriteIds);
 
       // Calculate dashboard stats
@@ -155,7 +154,7 @@ const BuyerDashboard = ({ authLoading = false }) => {
 
       setDashboardStats({
         total_orders: (ordersData || []).length,
-        total_collections: (collectionsData || []).length,
+        total_collections: favoriteIds.size,
         total_messages: (messagesData || []).length,
         total_spent: totalSpent,
       });
@@ -196,44 +195,16 @@ const BuyerDashboard = ({ authLoading = false }) => {
 
   const loadExploreData = async () => {
     try {
-      setExploreLoading(true);
-      const [productsResponse, categoriesResponse] = await Promise.all([
-        api.products.getAll(),
-        api.categories.getAll(),
-      ]);
-
-      const productsArray = Array.isArray(productsResponse)
-        ? productsResponse
-        : [];
-      console.log(
-        `[FRONTEND_PRODUCTS] Loaded ${productsArray.length} products in explore page`
-      );
-      setExploreProducts(productsArray);
-
-      const categoryMap = new Map();
-      productsArray.forEach((product) => {
-        const category = product.category || "other";
-        categoryMap.set(
-          category.toLowerCase(),
-          (categoryMap.get(category.toLowerCase()) || 0) + 1
-        );
-      });
-
-      const categoriesWithCounts = [
-        { id: "all", name: "All Categories", count: productsArray.length },
+      const categoriesResponse = await api.categories.getAll();
+      setExploreCategories([
+        { id: "all", name: "All Categories" },
         ...categoriesResponse.map((cat) => ({
-          id: cat.name.toLowerCase(),
+          id: cat.id,
           name: cat.name,
-          count: categoryMap.get(cat.name.toLowerCase()) || 0,
         })),
-      ];
-
-      setExploreCategories(categoriesWithCounts);
+      ]);
     } catch (error) {
       handleAuthError(error, "loadExploreData");
-      setError("Failed to load products. Please try again.");
-    } finally {
-      setExploreLoading(false);
     }
   };
 
@@ -386,7 +357,6 @@ const BuyerDashboard = ({ authLoading = false }) => {
 
       {activeTab === "messages" && (
         <MessagesTab
-          messages={messages}
           loading={loading}
           authLoading={authLoading}
           initialArtisanId={artisanIdFromRoute}
@@ -404,7 +374,6 @@ const BuyerDashboard = ({ authLoading = false }) => {
 
       {activeTab === "explore" && (
         <ExploreTab
-          exploreProducts={exploreProducts}
           exploreCategories={exploreCategories}
           searchTerm={searchTerm}
           setSearchTerm={setSearchTerm}
@@ -414,7 +383,6 @@ const BuyerDashboard = ({ authLoading = false }) => {
           setSortBy={setSortBy}
           viewMode={viewMode}
           setViewMode={setViewMode}
-          exploreLoading={exploreLoading}
           authLoading={authLoading}
           favoriteProducts={favoriteProducts}
           toggleFavorite={toggleFavorite}
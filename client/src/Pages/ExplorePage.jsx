@@ -8,6 +8,7 @@ import LoadingSpinner from '../Components/LoadingSpinner'
 import ArtisanLink from '../Components/ArtisanLink'
 import { api } from '../services/api'
 import { getProductLink } from '../utils/navigation'
+import { useProductCatalog } from '../hooks/useProductCatalog'
 
 const ExplorePage = () => {
   const [viewMode, setViewMode] = useState('grid')
@@ -15,76 +16,29 @@ const ExplorePage = () => {
   const [selectedCategory, setSelectedCategory] = useState('all')
   const [sortBy, setSortBy] = useState('featured')
   const [showFilters, setShowFilters] = useState(false)
-  const [products, setProducts] = useState([])
-  const [loading, setLoading] = useState(true)
-  const [error, setError] = useState(null)
-  const [categories, setCategories] = useState([])
-
-  // Categories will be loaded from API
-
-  // Products will be loaded from API
+  const [categories, setCategories] = useState([{ id: 'all', name: 'All Categories' }])
+  const { products, loading, loadingMore, error, hasMore, loadMore } = useProductCatalog({
+    categoryId: selectedCategory,
+    searchTerm,
+  })
 
   useEffect(() => {
-    const fetchData = async () => {
-      try {
-        setLoading(true);
-        setError(null);
-
-        const [productsResponse, categoriesResponse] = await Promise.all([
-          api.products.getAll(),
-          api.categories.getAll(),
-        ]);
-
-        const productsArray = Array.isArray(productsResponse)
-          ? productsResponse
-          : [];
-        setProducts(productsArray);
-
-        // Build categories with product counts
-        const categoryMap = new Map()
-        productsArray.forEach(product => {
-          const category = product.category || 'other'
-          categoryMap.set(category.toLowerCase(), (categoryMap.get(category.toLowerCase()) || 0) + 1)
-        })
-        
-        const categoriesWithCounts = [
-          { id: 'all', name: 'All Categories', count: productsArray.length },
-          ...categoriesResponse.map(cat => ({
-            id: cat.name.toLowerCase(), // Use category name as ID for matching
-            name: cat.name,
-            count: categoryMap.get(cat.name.toLowerCase()) || 0
-          }))
-        ]
-        
-        setCategories(categoriesWithCounts)
-      } catch (error) {
-        setError("Failed to load products. Please try again later.");
-
-        const fallbackProducts = await api.products.getAll().catch(() => []);
-        const fallbackCategories = await api.categories.getAll().catch(() => []);
-
-        setProducts(fallbackProducts);
+    api.categories.getAll()
+      .then((categoriesResponse) => {
         setCategories([
-          { id: "all", name: "All Categories", count: fallbackProducts.length },
-          ...fallbackCategories.map((cat) => ({ ...cat, count: 0 })),
-        ]);
-      } finally {
-        setLoading(false);
-      }
-    };
-
-    fetchData();
+          { id: 'all', name: 'All Categories' },
+          ...(Array.isArray(categoriesResponse) ? categoriesResponse : []).map(cat => ({
+            id: cat.id,
+            name: cat.name,
+          })),
+        ])
+      })
+      .catch(() => {})
   }, []);
 
-  const filteredWorks = products.filter(work => {
-    const matchesSearch = work.title?.toLowerCase().includes(searchTerm.toLowerCase()) ||
-                         work.description?.toLowerCase().includes(searchTerm.toLowerCase()) ||
-                         work.artisan_name?.toLowerCase().includes(searchTerm.toLowerCase())
-    const matchesCategory = selectedCategory === 'all' || work.category?.toLowerCase() === selectedCategory
-    return matchesSearch && matchesCategory
-  })
-
-  const sortedWorks = [...filteredWorks].sort((a, b) => {
+  // The category and search filters are applied by the server; sorting
+  // orders the products loaded so far
+  const sortedWorks = [...products].sort((a, b) => {
     switch (sortBy) {
       case "price-low":
         return (a.price || 0) - (b.price || 0);
@@ -146,7 +100,7 @@ const ExplorePage = () => {
                         : "bg-gray-100 text-gray-700 hover:bg-gray-200"
                     }`}
                   >
-                    {category.name} ({category.count})
+                    {category.name}
                   </button>
                 ))}
               </div>
@@ -270,12 +224,30 @@ const ExplorePage = () => {
             ))}
           </div>
 
-          {/* Loading & Empty States */}
+          {/* Load More */}
+          {!loading && hasMore && (
+            <div className="flex justify-center mt-10">
+              <button
+                onClick={loadMore}
+                disabled={loadingMore}
+                className="px-6 py-3 bg-primary-600 text-white rounded-xl font-medium hover:bg-primary-700 disabled:opacity-50"
+              >
+                {loadingMore ? "Loading..." : "Load more"}
+              </button>
+            </div>
+          )}
+
+          {/* Loading, Error & Empty States */}
           {loading && (
             <div className="flex justify-center py-16">
               <LoadingSpinner size="lg" text="Loading products..." />
             </div>
           )}
+          {!loading && error && (
+            <div className="text-center py-16 text-red-600">
+              <p>Failed to load products. Please try again later.</p>
+            </div>
+          )}
           {!loading && !error && sortedWorks.length === 0 && (
             <div className="text-center py-16 text-gray-600">
               <Search className="w-12 h-12 mx-auto mb-4 text-gray-400" />
@@ -22,7 +22,13 @@ const MessagesPageRefactored = () => {
     loading,
     sending,
     error,
-    sendMessage
+    sendMessage,
+    hasMoreConversations,
+    loadingMoreConversations,
+    loadMoreConversations,
+    hasOlderMessages,
+    loadingOlderMessages,
+    loadOlderMessages
   } = useMessages(id, isAuthenticated)
 
   const currentConversation = conversations.find(c => c.id === selectedConversation)
@@ -74,6 +80,9 @@ const MessagesPageRefactored = () => {
         onSelectConversation={setSelectedConversation}
         searchQuery={searchQuery}
         onSearchChange={setSearchQuery}
+        hasMore={hasMoreConversations}
+        loadingMore={loadingMoreConversations}
+        onLoadMore={loadMoreConversations}
       />
       <ChatArea
         currentConversation={currentConversation}
@@ -87,6 +96,9 @@ const MessagesPageRefactored = () => {
         onClearAttachment={clearAttachment}
         onSendMessage={handleSendMessage}
         sending={sending}
+        hasOlderMessages={hasOlderMessages}
+        loadingOlderMessages={loadingOlderMessages}
+        onLoadOlderMessages={loadOlderMessages}
       />
     </MessagesLayout>
   )
@@ -26,16 +26,21 @@ const ProductDetailPage = () => {
   const [buyingNow, setBuyingNow] = useState(false)
   const [addingToWishlist, setAddingToWishlist] = useState(false)
   const [submittingReview, setSubmittingReview] = useState(false)
+  const [reviewRating, setReviewRating] = useState(null)
+  const [reviewsCursor, setReviewsCursor] = useState(null)
+  const [loadingMoreReviews, setLoadingMoreReviews] = useState(false)
 
   useEffect(() => {
     const fetchProduct = async () => {
       try {
         setLoading(true);
-        const [productData, reviewsData] = await Promise.all([
+        const [productData, reviewsPage] = await Promise.all([
           api.products.getById(id),
           api.reviews.getByProduct(id)
         ]);
-        setProduct({ ...productData, reviews: reviewsData });
+        setProduct({ ...productData, reviews: reviewsPage.reviews });
+        setReviewRating(reviewsPage.rating);
+        setReviewsCursor(reviewsPage.nextCursor);
       } catch (error) {
         setError("Product not found");
       } finally {
@@ -110,6 +115,18 @@ const ProductDetailPage = () => {
   };
 
   // Handlers
+  const handleLoadMoreReviews = async () => {
+    if (!reviewsCursor || loadingMoreReviews) return
+    try {
+      setLoadingMoreReviews(true)
+      const reviewsPage = await api.reviews.getByProduct(product.id, reviewsCursor)
+      setProduct(prev => ({ ...prev, reviews: [...(prev.reviews || []), ...reviewsPage.reviews] }))
+      setReviewsCursor(reviewsPage.nextCursor)
+    } finally {
+      setLoadingMoreReviews(false)
+    }
+  };
+
   const handleAddToCart = async () => {
     if (!isAuthenticated) {
       alert('Please log in to add items to your cart')
@@ -546,7 +563,7 @@ const ProductDetailPage = () => {
             <div className="bg-white rounded-2xl shadow-sm p-8">
               <div className="flex items-center justify-between mb-6">
                 <h2 className="text-2xl font-bold text-gray-900">
-                  Customer Reviews ({productWithDefaults.reviews.length})
+                  Customer Reviews ({reviewRating ? reviewRating.count : productWithDefaults.reviews.length})
                 </h2>
                 <button
                   onClick={handleWriteReview}
@@ -612,6 +629,18 @@ const ProductDetailPage = () => {
                   </div>
                 ))}
               </div>
+
+              {reviewsCursor && (
+                <div className="mt-8 text-center">
+                  <button
+                    onClick={handleLoadMoreReviews}
+                    disabled={loadingMoreReviews}
+                    className="border border-gray-300 hover:border-primary-600 text-gray-700 hover:text-primary-600 font-semibold px-6 py-2 rounded-lg transition-colors disabled:opacity-50 disabled:cursor-not-allowed"
+                  >
+                    {loadingMoreReviews ? 'Loading...' : 'Show more reviews'}
+                  </button>
+                </div>
+              )}
             </div>
           </div>
 
@@ -24,12 +24,15 @@ const ProductPage = () => {
         const productData = await api.products.getById(id)
         setProduct(productData)
         
-        // Fetch related products
-        const allProducts = await api.products.getAll()
-        const related = allProducts
-          .filter(p => p.id !== parseInt(id) && p.category === productData.category)
-          .slice(0, 4)
-        setRelatedProducts(related)
+        // Fetch related products from the same category (one extra in case this product is among them)
+        if (productData.category_id) {
+          const { products: sameCategory } = await api.products
+            .getPage({ category_id: productData.category_id, limit: 5 })
+            .catch(() => ({ products: [] }))
+          setRelatedProducts(sameCategory.filter(p => p.id !== productData.id).slice(0, 4))
+        } else {
+          setRelatedProducts([])
+        }
       } catch (error) {
         setError('Product not found')
       } finally {
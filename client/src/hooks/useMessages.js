@@ -12,23 +12,38 @@ export const useMessages = (id, isAuthenticated) => {
   const [error, setError] = useState(null)
   const initializationRef = useRef(new Set())
 
+  // Conversations come a page at a time; loadMoreConversations follows next_cursor
+  const [conversationsCursor, setConversationsCursor] = useState(null)
+  const [loadingMoreConversations, setLoadingMoreConversations] = useState(false)
+  const loadedMoreConversationsRef = useRef(false)
+
+  // A thread opens on its newest page; loadOlderMessages pages back with `before`
+  const [olderMessagesCursor, setOlderMessagesCursor] = useState(null)
+  const [loadingOlderMessages, setLoadingOlderMessages] = useState(false)
+  const loadedOlderMessagesRef = useRef(false)
+  const threadRef = useRef(selectedConversation)
+
   const loadConversations = async () => {
     try {
       if (!id) setLoading(true)
-      const data = await api.messages.getConversations()
+      const { conversations: data, nextCursor } = await api.messages.getConversationsPage()
       
       setConversations(prev => {
         // If we have an ID (initializing specific conversation), preserve existing conversations
         if (id && prev.length > 0) {
           // Merge new conversations with existing ones, avoiding duplicates
           const existingIds = new Set(prev.map(c => c.id))
-          const newConversations = Array.isArray(data) ? data.filter(c => !existingIds.has(c.id)) : []
-          return [...prev, ...newConversations]
+          return [...prev, ...data.filter(c => !existingIds.has(c.id))]
         }
-        return Array.isArray(data) ? data : []
+        // A refresh keeps the conversations already paged in below the first page
+        const firstPageIds = new Set(data.map(c => c.id))
+        return [...data, ...prev.filter(c => !firstPageIds.has(c.id))]
       })
+      if (!loadedMoreConversationsRef.current) {
+        setConversationsCursor(nextCursor)
+      }
       
-      if (!id && data && data.length > 0 && !selectedConversation) {
+      if (!id && data.length > 0 && !selectedConversation) {
         setSelectedConversation(data[0].id)
       }
     } catch (error) {
@@ -38,12 +53,60 @@ export const useMessages = (id, isAuthenticated) => {
     }
   }
 
+  const loadMoreConversations = async () => {
+    if (!conversationsCursor || loadingMoreConversations) return
+    try {
+      setLoadingMoreConversations(true)
+      const { conversations: data, nextCursor } = await api.messages.getConversationsPage(conversationsCursor)
+      loadedMoreConversationsRef.current = true
+      setConversations(prev => {
+        const existingIds = new Set(prev.map(c => c.id))
+        return [...prev, ...data.filter(c => !existingIds.has(c.id))]
+      })
+      setConversationsCursor(nextCursor)
+    } catch (error) {
+      setError('Failed to load conversations')
+    } finally {
+      setLoadingMoreConversations(false)
+    }
+  }
+
   const loadMessages = async (conversationId) => {
     try {
-      const data = await api.messages.getMessages(conversationId)
-      setMessages(Array.isArray(data) ? data : [])
+      const { messages: data, before } = await api.messages.getMessagesPage(conversationId)
+      if (threadRef.current !== conversationId) return
+      setMessages(prev => {
+        if (!loadedOlderMessagesRef.current || data.length === 0) return data
+        // A refresh keeps the older pages already loaded above the newest one
+        const oldest = data[0].timestamp
+        return [...prev.filter(m => m.timestamp && m.timestamp < oldest), ...data]
+      })
+      if (!loadedOlderMessagesRef.current) {
+        setOlderMessagesCursor(before)
+      }
     } catch (error) {
       setMessages([])
+      setOlderMessagesCursor(null)
+    }
+  }
+
+  const loadOlderMessages = async () => {
+    const conversationId = threadRef.current
+    if (!conversationId || !olderMessagesCursor || loadingOlderMessages) return
+    try {
+      setLoadingOlderMessages(true)
+      const { messages: data, before } = await api.messages.getMessagesPage(conversationId, olderMessagesCursor)
+      if (threadRef.current !== conversationId) return
+      loadedOlderMessagesRef.current = true
+      setMessages(prev => {
+        const loadedIds = new Set(prev.map(m => m.id))
+        return [...data.filter(m => !loadedIds.has(m.id)), ...prev]
+      })
+      setOlderMessagesCursor(before)
+    } catch (error) {
+      setError('Failed to load older messages')
+    } finally {
+      setLoadingOlderMessages(false)
     }
   }
 
@@ -132,14 +195,17 @@ export const useMessages = (id, isAuthenticated) => {
   }
 
   useEffect(() => {
-    if (!id) {
-      loadConversations()
-    }
+    loadConversations()
   }, [id])
 
   useEffect(() => {
+    threadRef.current = selectedConversation
+    loadedOlderMessagesRef.current = false
+    setOlderMessagesCursor(null)
     if (selectedConversation) {
       loadMessages(selectedConversation)
+    } else {
+      setMessages([])
     }
   }, [selectedConversation])
 
@@ -160,6 +226,12 @@ export const useMessages = (id, isAuthenticated) => {
     error,
     sendMessage,
     loadConversations,
-    loadMessages
+    loadMessages,
+    hasMoreConversations: Boolean(conversationsCursor),
+    loadingMoreConversations,
+    loadMoreConversations,
+    hasOlderMessages: Boolean(olderMessagesCursor),
+    loadingOlderMessages,
+    loadOlderMessages
   }
 }
\ No newline at end of file
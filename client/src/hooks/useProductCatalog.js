@@ -0,0 +1,72 @@
+import { useState, useEffect, useCallback, useRef } from 'react';
+import { api } from '../services/api';
+
+// Page through the product catalog on the server. The category and the
+// search term are sent with every request, and loadMore fetches the next
+// page (the listing's cursor, or the next search page) onto the list.
+export const useProductCatalog = ({ categoryId = 'all', searchTerm = '', pageSize = 20 } = {}) => {
+  const [products, setProducts] = useState([]);
+  const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const [error, setError] = useState(null);
+  const [hasMore, setHasMore] = useState(false);
+  const next = useRef(null);
+  // Responses for filters that have since changed are dropped
+  const generation = useRef(0);
+
+  const query = searchTerm.trim();
+
+  const fetchPage = useCallback(async (from) => {
+    const category_id = categoryId === 'all' ? undefined : categoryId;
+    if (query) {
+      const page = from || 1;
+      const result = await api.products.searchPage(query, { page, limit: pageSize, category_id });
+      return { ...result, next: page + 1 };
+    }
+    const result = await api.products.getPage({ category_id, limit: pageSize, cursor: from || undefined });
+    return { ...result, next: result.nextCursor };
+  }, [categoryId, query, pageSize]);
+
+  useEffect(() => {
+    const current = ++generation.current;
+    setLoading(true);
+    setError(null);
+    // Wait for the user to stop typing before searching
+    const timer = setTimeout(async () => {
+      try {
+        const page = await fetchPage(null);
+        if (current !== generation.current) return;
+        setProducts(page.products);
+        setHasMore(page.hasMore);
+        next.current = page.next;
+      } catch (err) {
+        if (current !== generation.current) return;
+        setProducts([]);
+        setHasMore(false);
+        setError(err.message || 'Failed to load products');
+      } finally {
+        if (current === generation.current) setLoading(false);
+      }
+    }, query ? 300 : 0);
+    return () => clearTimeout(timer);
+  }, [fetchPage]);
+
+  const loadMore = useCallback(async () => {
+    if (!hasMore || loadingMore) return;
+    const current = generation.current;
+    setLoadingMore(true);
+    try {
+      const page = await fetchPage(next.current);
+      if (current !== generation.current) return;
+      setProducts(prev => [...prev, ...page.products]);
+      setHasMore(page.hasMore);
+      next.current = page.next;
+    } catch (err) {
+      if (current === generation.current) setError(err.message || 'Failed to load more products');
+    } finally {
+      setLoadingMore(false);
+    }
+  }, [fetchPage, hasMore, loadingMore]);
+
+  return { products, loading, loadingMore, error, hasMore, loadMore };
+};
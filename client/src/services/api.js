@@ -207,12 +207,45 @@ export const api = {
         const query = params
           ? "?" + new URLSearchParams(params).toString()
           : "";
-        const products = await apiRequest(`/products/${query}`);
+        const response = await apiRequest(`/products/${query}`);
+        const products = Array.isArray(response) ? response : response?.products;
         return Array.isArray(products) ? products.map(enhanceProduct) : [];
       } catch (error) {
         return [];
       }
     },
+    // One page of the catalog, filtered on the server; pass nextCursor back as cursor for the next page
+    getPage: async (params = {}) => {
+      const query = new URLSearchParams(
+        Object.entries(params).filter(([, value]) => value !== undefined && value !== null && value !== "")
+      ).toString();
+      const response = await apiRequest(`/products/${query ? "?" + query : ""}`);
+      return {
+        products: (response?.products || []).map(enhanceProduct),
+        nextCursor: response?.next_cursor || null,
+        hasMore: Boolean(response?.has_more),
+      };
+    },
+    // One page of search results; pages are numbered from 1
+    searchPage: async (q, { page = 1, limit = 20, ...filters } = {}) => {
+      const query = new URLSearchParams(
+        Object.entries({ q, page, limit, ...filters }).filter(([, value]) => value !== undefined && value !== null && value !== "")
+      ).toString();
+      const response = await apiRequest(`/products/search?${query}`);
+      return {
+        products: (response?.results || []).map(enhanceProduct),
+        hasMore: Boolean(response?.has_more),
+      };
+    },
+    search: async (q, params = {}) => {
+      try {
+        const query = new URLSearchParams({ q, ...params }).toString();
+        const response = await apiRequest(`/products/search?${query}`);
+        return Array.isArray(response?.results) ? response.results.map(enhanceProduct) : [];
+      } catch (error) {
+        return [];
+      }
+    },
     getById: async (id) => {
       try {
         const product = await apiRequest(`/products/${id}`);
@@ -346,10 +379,20 @@ export const api = {
 
   // Order endpoints
   orders: {
+    // Every order: follows next_cursor through the newest-first pages
     getAll: async () => {
       try {
-        const orders = await apiRequest("/orders/");
-        return Array.isArray(orders) ? orders : [];
+        const orders = [];
+        let cursor = null;
+        do {
+          const query = new URLSearchParams({ limit: "100" });
+          if (cursor) query.set("cursor", cursor);
+          const response = await apiRequest(`/orders/?${query.toString()}`);
+          const page = Array.isArray(response) ? response : response?.orders;
+          if (Array.isArray(page)) orders.push(...page);
+          cursor = response?.next_cursor || null;
+        } while (cursor);
+        return orders;
       } catch (error) {
         return [];
       }
@@ -393,12 +436,19 @@ export const api = {
         return []
       }
     },
-    getByProduct: async (productId) => {
+    // One newest-first page of a product's reviews, with its rating summary
+    // (rating.count is the total number of reviews)
+    getByProduct: async (productId, cursor) => {
       try {
-        const reviews = await apiRequest(`/products/${productId}/reviews`);
-        return Array.isArray(reviews) ? reviews : [];
+        const query = cursor ? `?${new URLSearchParams({ cursor })}` : "";
+        const response = await apiRequest(`/products/${productId}/reviews${query}`);
+        return {
+          reviews: Array.isArray(response?.reviews) ? response.reviews : [],
+          rating: response?.rating || null,
+          nextCursor: response?.next_cursor || null,
+        };
       } catch (error) {
-        return [];
+        return { reviews: [], rating: null, nextCursor: null };
       }
     },
     create: (data) =>
@@ -418,12 +468,31 @@ export const api = {
   messages: {
     getConversations: async () => {
       try {
-        return await apiRequest("/messages/conversations");
+        const response = await apiRequest("/messages/conversations");
+        return Array.isArray(response) ? response : response?.conversations || [];
       } catch (error) {
         return [];
       }
     },
-    getMessages: (userId) => apiRequest(`/messages/conversation/${userId}`),
+    // One page of conversations, most recently active first
+    getConversationsPage: async (cursor) => {
+      const query = cursor ? `?${new URLSearchParams({ cursor })}` : "";
+      const response = await apiRequest(`/messages/conversations${query}`);
+      return {
+        conversations: response?.conversations || [],
+        nextCursor: response?.next_cursor || null,
+      };
+    },
+    // The newest page of a thread, or the page before the `before` cursor;
+    // messages come oldest-first
+    getMessagesPage: async (userId, before) => {
+      const query = before ? `?${new URLSearchParams({ before })}` : "";
+      const response = await apiRequest(`/messages/conversation/${userId}${query}`);
+      return {
+        messages: response?.messages || [],
+        before: response?.before || null,
+      };
+    },
     send: (receiverId, messageData) => {
       const data =
         typeof messageData === "string"
@@ -465,9 +534,25 @@ export const api = {
 
   // Favorite endpoints
   favorites: {
-    getAll: async () => {
+    getAll: async (params) => {
+      try {
+        const query = params
+          ? "?" + new URLSearchParams(params).toString()
+          : "";
+        const response = await apiRequest(`/favorites/${query}`);
+        const favorites = Array.isArray(response) ? response : response?.favorites;
+        return Array.isArray(favorites) ? favorites : [];
+      } catch (error) {
+        return [];
+      }
+    },
+    // Favorited product ids (optionally limited to the given products) for heart icons
+    getIds: async (productIds = []) => {
       try {
-        return await apiRequest("/favorites/");
+        const query = new URLSearchParams({ ids_only: "1" });
+        if (productIds.length) query.set("product_ids", productIds.join(","));
+        const response = await apiRequest(`/favorites/?${query.toString()}`);
+        return Array.isArray(response?.product_ids) ? response.product_ids : [];
       } catch (error) {
         return [];
       }
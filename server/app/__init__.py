@@ -1,6 +1,9 @@
 import os
+from datetime import timedelta
 from flask import Flask
-from app.extensions import db, socketio, session
+from app.extensions import db, socketio, migrate
+from app.utils.session_store import init_session_store
+from app.utils.logging_config import configure_logging
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -17,21 +20,67 @@ def create_app():
     flask_app.config['SQLALCHEMY_DATABASE_URI'] = database_url
     flask_app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
     
-    # Session configuration
-    flask_app.config['SESSION_TYPE'] = 'filesystem'
+    # Session configuration (server-side store shared by all workers)
+    flask_app.config['REDIS_URL'] = os.getenv('REDIS_URL')
+    flask_app.config['SESSION_BACKEND'] = os.getenv('SESSION_BACKEND') or ('redis' if flask_app.config['REDIS_URL'] else 'filesystem')
+    flask_app.config['SESSION_FILE_DIR'] = os.getenv('SESSION_FILE_DIR') or os.path.join(os.getcwd(), 'instance', 'sessions')
+    flask_app.config['SESSION_FILE_THRESHOLD'] = int(os.getenv('SESSION_FILE_THRESHOLD', 10000))
     flask_app.config['SESSION_PERMANENT'] = False
     flask_app.config['SESSION_USE_SIGNER'] = True
     flask_app.config['SESSION_KEY_PREFIX'] = 'soko_safi:'
-    flask_app.config['SESSION_FILE_DIR'] = os.path.join(os.getcwd(), 'instance', 'sessions')
-    flask_app.config['SESSION_FILE_THRESHOLD'] = 500
+    flask_app.config['PERMANENT_SESSION_LIFETIME'] = timedelta(seconds=int(os.getenv('SESSION_TTL', 7 * 24 * 3600)))
+    
+    # Socket.IO message queue, so any web or worker process can emit to any client
+    flask_app.config['SOCKETIO_MESSAGE_QUEUE'] = os.getenv('SOCKETIO_MESSAGE_QUEUE') or flask_app.config['REDIS_URL']
+    
+    # Signed bearer tokens (seconds)
+    flask_app.config['ACCESS_TOKEN_TTL'] = int(os.getenv('ACCESS_TOKEN_TTL', 15 * 60))
+    flask_app.config['REFRESH_TOKEN_TTL'] = int(os.getenv('REFRESH_TOKEN_TTL', 30 * 24 * 3600))
+    
+    # Admin dashboard counters are cached this long (seconds)
+    flask_app.config['ADMIN_STATS_TTL'] = int(os.getenv('ADMIN_STATS_TTL', 60))
+    
+    # Public GET response cache (memory per worker, or redis shared)
+    flask_app.config['RESPONSE_CACHE_BACKEND'] = os.getenv('RESPONSE_CACHE_BACKEND') or ('redis' if flask_app.config['REDIS_URL'] else 'memory')
+    flask_app.config['RESPONSE_CACHE_TTL'] = int(os.getenv('RESPONSE_CACHE_TTL', 60))
+    flask_app.config['RESPONSE_CACHE_SIZE'] = int(os.getenv('RESPONSE_CACHE_SIZE', 1024))
+    
+    # Disbursement workers: concurrent B2C calls per worker (keep <= MPESA_POOL_SIZE),
+    # idle poll interval and row lease (seconds; must outlast MPESA_READ_TIMEOUT)
+    flask_app.config['DISBURSEMENT_CONCURRENCY'] = int(os.getenv('DISBURSEMENT_CONCURRENCY', 4))
+    flask_app.config['DISBURSEMENT_POLL_INTERVAL'] = int(os.getenv('DISBURSEMENT_POLL_INTERVAL', 2))
+    flask_app.config['DISBURSEMENT_LEASE'] = int(os.getenv('DISBURSEMENT_LEASE', 300))
+    # How often workers re-queue due retries (seconds), and how many per scan
+    flask_app.config['DISBURSEMENT_RETRY_INTERVAL'] = int(os.getenv('DISBURSEMENT_RETRY_INTERVAL', 30))
+    flask_app.config['DISBURSEMENT_RETRY_BATCH'] = int(os.getenv('DISBURSEMENT_RETRY_BATCH', 50))
+    # How long a submission whose outcome is unknown (5xx, timeout) waits for
+    # its B2C result before the same attempt is resent (seconds)
+    flask_app.config['DISBURSEMENT_RESULT_TIMEOUT'] = int(os.getenv('DISBURSEMENT_RESULT_TIMEOUT', 900))
+    # Artisan payouts: per_order (one transfer per artisan per order) or batched, where
+    # earnings accrue and are paid once they reach the threshold (KES) or max age (seconds)
+    flask_app.config['SETTLEMENT_MODE'] = os.getenv('SETTLEMENT_MODE', 'per_order')
+    flask_app.config['SETTLEMENT_THRESHOLD'] = int(os.getenv('SETTLEMENT_THRESHOLD', 1000))
+    flask_app.config['SETTLEMENT_MAX_AGE'] = int(os.getenv('SETTLEMENT_MAX_AGE', 24 * 3600))
+    flask_app.config['SETTLEMENT_INTERVAL'] = int(os.getenv('SETTLEMENT_INTERVAL', 300))
+    # STK Push Query: payments pending this long without a callback are queried (and
+    # re-queried at that interval) until they are STK_QUERY_EXPIRY old; scan interval
+    flask_app.config['STK_QUERY_AFTER'] = int(os.getenv('STK_QUERY_AFTER', 120))
+    flask_app.config['STK_QUERY_EXPIRY'] = int(os.getenv('STK_QUERY_EXPIRY', 3600))
+    flask_app.config['STK_QUERY_INTERVAL'] = int(os.getenv('STK_QUERY_INTERVAL', 30))
+    # M-Pesa callback inbox: retry lease for a failed callback (seconds) and attempts before giving up
+    flask_app.config['CALLBACK_LEASE'] = int(os.getenv('CALLBACK_LEASE', 30))
+    flask_app.config['CALLBACK_MAX_ATTEMPTS'] = int(os.getenv('CALLBACK_MAX_ATTEMPTS', 10))
     flask_app.config['UPLOAD_FOLDER'] = os.path.join(flask_app.root_path, 'uploads')
     flask_app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
     
+    configure_logging(flask_app)
+    
     # Cloudinary configuration removed - handled by frontend
     
     # Initialize extensions
     db.init_app(flask_app)
-    session.init_app(flask_app)
+    migrate.init_app(flask_app, db)
+    init_session_store(flask_app)
     # Enable CORS for API routes and allow credentials (cookies/session)
     from .extensions import cors, socketio
     cors.init_app(flask_app, 
@@ -45,11 +94,28 @@ def create_app():
             SESSION_COOKIE_SAMESITE='None',
             SESSION_COOKIE_SECURE=True
         )
-    socketio.init_app(flask_app)
+    socketio.init_app(flask_app, message_queue=flask_app.config['SOCKETIO_MESSAGE_QUEUE'])
     
     # Import models to ensure they are registered
     from . import models
     
+    from app.services.artisan_profile_service import artisan_profiles
+    artisan_profiles.init_app(flask_app)
+    
+    from app.services.response_cache import response_cache
+    response_cache.init_app(flask_app)
+    
+    # CLI commands (flask metrics backfill, flask stats rollup, flask disbursements work,
+    # flask payments reconcile)
+    from app.services.metrics_service import metrics_cli
+    from app.services.platform_stats_service import stats_cli
+    from app.services.disbursement_queue import disbursements_cli
+    from app.services.reconciliation_service import payments_cli
+    flask_app.cli.add_command(metrics_cli)
+    flask_app.cli.add_command(stats_cli)
+    flask_app.cli.add_command(disbursements_cli)
+    flask_app.cli.add_command(payments_cli)
+    
     # Import socket events (registers handlers)
     from . import sockets
     
@@ -1,13 +1,20 @@
 """
 Authentication utilities for Soko Safi
-Handles password hashing, verification, and session management
+Handles password hashing, verification, session management and signed tokens
 """
 
 import bcrypt
+import logging
 from functools import wraps
 from flask import session, request, jsonify, current_app
+from itsdangerous import URLSafeTimedSerializer, BadSignature, SignatureExpired
 from app.models import User, UserRole
 
+logger = logging.getLogger(__name__)
+
+ACCESS_TOKEN_TTL = 15 * 60
+REFRESH_TOKEN_TTL = 30 * 24 * 3600
+
 def hash_password(password: str) -> str:
     """
     Hash a password using bcrypt
@@ -44,23 +51,17 @@ def login_user(user_id: str, role: str) -> None:
         user_id (str): User's unique identifier
         role (str): User's role (buyer, artisan, admin)
     """
-    print(f"[LOGIN_USER] Setting session for user_id: {user_id}, role: {role}")
-    print(f"[LOGIN_USER] Session before: {dict(session)}")
-    
     session['user_id'] = user_id
     session['user_role'] = role
     session['authenticated'] = True
-    
-    print(f"[LOGIN_USER] Session after: {dict(session)}")
-    print(f"[LOGIN_USER] Session modified: {session.modified}")
+    logger.info('User logged in', extra={'user_id': user_id, 'role': role})
 
 def logout_user() -> None:
     """
     Clear user session
     """
-    print(f"[LOGOUT_USER] Session before clear: {dict(session)}")
+    logger.info('User logged out', extra={'user_id': session.get('user_id')})
     session.clear()
-    print(f"[LOGOUT_USER] Session after clear: {dict(session)}")
 
 def get_current_user() -> dict:
     """
@@ -76,6 +77,86 @@ def get_current_user() -> dict:
         }
     return None
 
+def _token_serializer(token_type: str) -> URLSafeTimedSerializer:
+    # A distinct salt per type keeps refresh tokens from being used as access tokens
+    return URLSafeTimedSerializer(current_app.config['SECRET_KEY'], salt=f'soko-safi-{token_type}-token')
+
+def create_access_token(user_id: str, role: str) -> str:
+    """
+    Create a short-lived signed access token
+
+    The token carries the user's id and role, so it can be verified with the
+    secret key alone - no session store or database lookup.
+    """
+    return _token_serializer('access').dumps({'sub': user_id, 'role': role})
+
+def create_refresh_token(user_id: str) -> str:
+    """Create a long-lived signed token that can be exchanged for a new access token"""
+    return _token_serializer('refresh').dumps({'sub': user_id})
+
+def issue_tokens(user_id: str, role: str) -> dict:
+    """
+    Create an access/refresh token pair
+
+    Returns:
+        dict: Token response body
+    """
+    return {
+        'access_token': create_access_token(user_id, role),
+        'refresh_token': create_refresh_token(user_id),
+        'token_type': 'Bearer',
+        'expires_in': current_app.config.get('ACCESS_TOKEN_TTL', ACCESS_TOKEN_TTL)
+    }
+
+def decode_token(token: str, token_type: str = 'access') -> dict:
+    """
+    Verify a signed token and return its claims
+
+    Args:
+        token (str): Token string
+        token_type (str): 'access' or 'refresh'
+
+    Returns:
+        dict: Claims if the signature is valid and the token has not expired, None otherwise
+    """
+    if not token:
+        return None
+    default_ttl = ACCESS_TOKEN_TTL if token_type == 'access' else REFRESH_TOKEN_TTL
+    max_age = current_app.config.get(f'{token_type.upper()}_TOKEN_TTL', default_ttl)
+    try:
+        claims = _token_serializer(token_type).loads(token, max_age=max_age)
+    except (SignatureExpired, BadSignature):
+        return None
+    return claims if isinstance(claims, dict) and claims.get('sub') else None
+
+def get_bearer_token(req=None):
+    """Extract the token from an `Authorization: Bearer <token>` header"""
+    req = req or request
+    scheme, _, token = req.headers.get('Authorization', '').partition(' ')
+    if scheme.lower() != 'bearer':
+        return None
+    return token.strip() or None
+
+def token_identity(req=None) -> dict:
+    """
+    Session-shaped identity for a request authorized by a bearer access token
+
+    Returns:
+        dict: user_id/user_role/authenticated keys, or None without a valid token
+    """
+    claims = decode_token(get_bearer_token(req))
+    if not claims:
+        return None
+    return {'user_id': claims['sub'], 'user_role': claims.get('role'), 'authenticated': True}
+
+def current_user_id():
+    """
+    Id of the user making the request, whether it carries a session cookie or a
+    bearer access token (whose identity the session interface loads from
+    token_identity); None for anonymous requests
+    """
+    return session.get('user_id')
+
 def require_auth(f):
     """
     Decorator to require authentication for routes
@@ -87,20 +168,16 @@ def require_auth(f):
     """
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        print(f"[AUTH_DECORATOR] Checking auth for {f.__name__}")
-        print(f"[AUTH_DECORATOR] Session data: {dict(session)}")
-        print(f"[AUTH_DECORATOR] Authenticated: {session.get('authenticated')}")
-        print(f"[AUTH_DECORATOR] User ID: {session.get('user_id')}")
-        print(f"[AUTH_DECORATOR] User Role: {session.get('user_role')}")
-        
         if not session.get('authenticated'):
-            print(f"[AUTH_DECORATOR] Authentication failed - no authenticated session")
+            logger.debug('Authentication required for %s', f.__name__)
             return {
                 'error': 'Authentication required',
                 'message': 'Please log in to access this resource'
             }, 401
         
-        print(f"[AUTH_DECORATOR] Authentication successful")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug('Authenticated %s', f.__name__,
+                         extra={'user_id': session.get('user_id'), 'role': session.get('user_role')})
         return f(*args, **kwargs)
     return decorated_function
 
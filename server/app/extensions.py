@@ -1,6 +1,6 @@
 from flask_socketio import SocketIO
-from flask_session import Session
 from flask_cors import CORS
+from flask_migrate import Migrate
 from app.models import db
 import os
 
@@ -8,8 +8,8 @@ try:
     # Initialize extensions with proper error handling
     allowed_origins = os.getenv('CORS_ALLOWED_ORIGINS', '*').split(',')
     socketio = SocketIO(cors_allowed_origins=allowed_origins)
-    session = Session()
     cors = CORS()
+    migrate = Migrate()
     
     # Connected users storage
     connected_users = {}
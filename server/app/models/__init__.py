@@ -8,17 +8,19 @@ from .product import Product, ProductImage, Collection
 from .artisan import ArtisanShowcaseMedia, ArtisanSocial
 from .cart import Cart, CartItem
 from .order import Order, OrderItem, OrderStatus
-from .payment import Payment, PaymentMethod, PaymentStatus, ArtisanDisbursement, DisbursementStatus
-from .review import Review
+from .payment import Payment, PaymentMethod, PaymentStatus, ArtisanDisbursement, DisbursementStatus, MpesaCallback
+from .review import Review, ProductRating, ArtisanRating
 from .favorite import Favorite
 from .follow import Follow
 from .notification import Notification, NotificationType
-from .message import Message
+from .message import Message, Conversation
+from .metrics import ArtisanMetrics, ArtisanDailyMetrics, PlatformDailyStats
 
 __all__ = [
     'db', 'User', 'UserRole', 'Category', 'Subcategory', 'Product', 'ProductImage',
     'Collection', 'ArtisanShowcaseMedia', 'ArtisanSocial', 'Cart', 'CartItem',
     'Order', 'OrderItem', 'OrderStatus', 'Payment', 'PaymentMethod', 'PaymentStatus',
-    'ArtisanDisbursement', 'DisbursementStatus', 'Review', 'Favorite', 'Follow',
-    'Notification', 'NotificationType', 'Message'
+    'ArtisanDisbursement', 'DisbursementStatus', 'MpesaCallback', 'Review', 'ProductRating', 'ArtisanRating',
+    'Favorite', 'Follow', 'Notification', 'NotificationType', 'Message', 'Conversation',
+    'ArtisanMetrics', 'ArtisanDailyMetrics', 'PlatformDailyStats'
 ]
\ No newline at end of file
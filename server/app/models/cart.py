@@ -14,6 +14,9 @@ class Cart(db.Model):
 
 class CartItem(db.Model):
     __tablename__ = "cart_items"
+    __table_args__ = (
+        db.Index('ix_cart_items_cart_id_product_id', 'cart_id', 'product_id'),
+    )
     
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     cart_id = db.Column(db.String(36), db.ForeignKey('carts.id'))
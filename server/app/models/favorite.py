@@ -4,6 +4,11 @@ from . import db
 
 class Favorite(db.Model):
     __tablename__ = "favorites"
+    __table_args__ = (
+        db.Index('ix_favorites_user_id_product_id', 'user_id', 'product_id'),
+        # Keyset pagination of a user's favorites, newest first
+        db.Index('ix_favorites_user_id_created_at_id', 'user_id', 'created_at', 'id'),
+    )
     
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     user_id = db.Column(db.String(36), db.ForeignKey('users.id'))
@@ -4,6 +4,9 @@ from . import db
 
 class Follow(db.Model):
     __tablename__ = "follows"
+    __table_args__ = (
+        db.Index('ix_follows_follower_id_following_id', 'follower_id', 'following_id'),
+    )
     
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     follower_id = db.Column(db.String(36), db.ForeignKey('users.id'))
@@ -2,11 +2,47 @@ from datetime import datetime
 import uuid
 from . import db
 
+class Conversation(db.Model):
+    __tablename__ = "conversations"
+    __table_args__ = (
+        # Participants are stored as an ordered pair (user_a_id < user_b_id)
+        db.UniqueConstraint('user_a_id', 'user_b_id', name='uq_conversations_participants'),
+        db.Index('ix_conversations_user_a_activity', 'user_a_id', 'last_activity_at'),
+        db.Index('ix_conversations_user_b_activity', 'user_b_id', 'last_activity_at'),
+    )
+
+    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    user_a_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False)
+    user_b_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False)
+    last_message_id = db.Column(db.String(36), db.ForeignKey('messages.id', use_alter=True), nullable=True)
+    last_message_text = db.Column(db.Text, nullable=True)
+    last_activity_at = db.Column(db.DateTime, default=datetime.utcnow)
+    user_a_unread = db.Column(db.Integer, nullable=False, default=0)
+    user_b_unread = db.Column(db.Integer, nullable=False, default=0)
+    # Read-receipt watermarks: everything at or before this time has been read
+    user_a_last_read_at = db.Column(db.DateTime, nullable=True)
+    user_b_last_read_at = db.Column(db.DateTime, nullable=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    @staticmethod
+    def participants(user_id, other_user_id):
+        """Canonical (user_a_id, user_b_id) ordering for a pair of users"""
+        return (user_id, other_user_id) if user_id < other_user_id else (other_user_id, user_id)
+
+    def last_read_at(self, user_id):
+        """Read-receipt watermark of one participant"""
+        return self.user_a_last_read_at if user_id == self.user_a_id else self.user_b_last_read_at
+
 class Message(db.Model):
     __tablename__ = "messages"
+    __table_args__ = (
+        db.Index('ix_messages_sender_receiver_created_at', 'sender_id', 'receiver_id', 'created_at'),
+        db.Index('ix_messages_conversation_created_at', 'conversation_id', 'created_at', 'id'),
+    )
     
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
-    conversation_id = db.Column(db.String(36), nullable=True)
+    conversation_id = db.Column(db.String(36), db.ForeignKey('conversations.id'), nullable=True)
     sender_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False)
     receiver_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=False)
     message_text = db.Column(db.Text, nullable=True)
@@ -15,4 +51,4 @@ class Message(db.Model):
     is_read = db.Column(db.Boolean, default=False)
     read_at = db.Column(db.DateTime, nullable=True)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
\ No newline at end of file
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -0,0 +1,33 @@
+from datetime import datetime
+from . import db
+
+class ArtisanMetrics(db.Model):
+    """Running dashboard totals for one artisan"""
+    __tablename__ = "artisan_metrics"
+
+    artisan_id = db.Column(db.String(36), db.ForeignKey('users.id'), primary_key=True)
+    product_count = db.Column(db.Integer, nullable=False, default=0)
+    order_count = db.Column(db.Integer, nullable=False, default=0)
+    units_sold = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Numeric(12, 2), nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class ArtisanDailyMetrics(db.Model):
+    """Sales for one artisan on one day (the day the order was placed)"""
+    __tablename__ = "artisan_daily_metrics"
+
+    artisan_id = db.Column(db.String(36), db.ForeignKey('users.id'), primary_key=True)
+    day = db.Column(db.Date, primary_key=True)
+    order_count = db.Column(db.Integer, nullable=False, default=0)
+    units_sold = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Numeric(12, 2), nullable=False, default=0)
+
+class PlatformDailyStats(db.Model):
+    """Platform-wide activity for one day, rolled up from users and orders"""
+    __tablename__ = "platform_daily_stats"
+
+    day = db.Column(db.Date, primary_key=True)
+    signups = db.Column(db.Integer, nullable=False, default=0)
+    orders = db.Column(db.Integer, nullable=False, default=0)
+    gmv = db.Column(db.Numeric(14, 2), nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -11,6 +11,9 @@ class NotificationType(enum.Enum):
 
 class Notification(db.Model):
     __tablename__ = "notifications"
+    __table_args__ = (
+        db.Index('ix_notifications_user_id_is_read_created_at', 'user_id', 'is_read', 'created_at'),
+    )
     
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     user_id = db.Column(db.String(36), db.ForeignKey('users.id'))
@@ -14,6 +14,12 @@ class OrderStatus(enum.Enum):
 
 class Order(db.Model):
     __tablename__ = "orders"
+    __table_args__ = (
+        # Keyset pagination of a buyer's order history
+        db.Index('ix_orders_user_id_placed_at_id', 'user_id', 'placed_at', 'id'),
+        # Daily order/GMV rollups scan orders by placement date
+        db.Index('ix_orders_placed_at', 'placed_at'),
+    )
     
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     user_id = db.Column(db.String(36), db.ForeignKey('users.id'))
@@ -25,11 +31,19 @@ class Order(db.Model):
     placed_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     meta_data = db.Column(db.Text)
+    # Whether this order's items are currently included in the artisan metrics
+    metrics_counted = db.Column(db.Boolean, nullable=False, default=False, server_default=db.false())
+    # Whether this order's quantities are currently held back from product stock
+    stock_reserved = db.Column(db.Boolean, nullable=False, default=False, server_default=db.false())
     
     order_items = db.relationship('OrderItem', backref='order', lazy=True)
 
 class OrderItem(db.Model):
     __tablename__ = "order_items"
+    __table_args__ = (
+        db.Index('ix_order_items_order_id', 'order_id'),
+        db.Index('ix_order_items_artisan_id', 'artisan_id'),
+    )
     
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     order_id = db.Column(db.String(36), db.ForeignKey('orders.id'))
@@ -19,9 +19,14 @@ class DisbursementStatus(enum.Enum):
     failed = "failed"
     retry = "retry"
     manual = "manual"  # Requires admin intervention
+    accrued = "accrued"  # Earned; paid out later in a batched settlement
 
 class Payment(db.Model):
     __tablename__ = "payments"
+    __table_args__ = (
+        # The STK query worker scans pending payments by last change
+        db.Index('ix_payments_status_updated_at', 'status', 'updated_at'),
+    )
 
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     order_id = db.Column(db.String(36), db.ForeignKey('orders.id'))
@@ -35,11 +40,19 @@ class Payment(db.Model):
     reversal_flag = db.Column(db.Boolean, default=False)
     reversal_timestamp = db.Column(db.DateTime)
     received_at = db.Column(db.DateTime)
+    reconciled_at = db.Column(db.DateTime)  # Last matched against an M-Pesa statement
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
 class ArtisanDisbursement(db.Model):
     __tablename__ = "artisan_disbursements"
+    __table_args__ = (
+        # Disbursement workers claim the oldest pending rows
+        db.Index('ix_artisan_disbursements_status_created_at', 'status', 'created_at'),
+        # The retry scheduler scans for retries whose backoff has elapsed
+        db.Index('ix_artisan_disbursements_status_next_attempt_at', 'status', 'next_attempt_at'),
+        db.Index('ix_artisan_disbursements_settlement_id', 'settlement_id'),
+    )
 
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     payment_id = db.Column(db.String(36), db.ForeignKey('payments.id'))
@@ -47,6 +60,9 @@ class ArtisanDisbursement(db.Model):
     amount = db.Column(db.Numeric(12, 2))
     currency = db.Column(db.String(3), default='KES')
     status = db.Column(db.Enum(DisbursementStatus), nullable=False, default=DisbursementStatus.pending)
+    # Accrued earnings point at the settlement payout that includes them;
+    # settlement payouts have no payment_id
+    settlement_id = db.Column(db.String(36), db.ForeignKey('artisan_disbursements.id'))
     mpesa_transaction_id = db.Column(db.String(255), unique=True)
     recipient_phone = db.Column(db.String(15))  # For phone disbursements
     paybill_number = db.Column(db.String(10))  # For paybill disbursements
@@ -54,8 +70,35 @@ class ArtisanDisbursement(db.Model):
     disbursement_method = db.Column(db.String(20))  # 'phone' or 'paybill'
     retry_count = db.Column(db.Integer, default=0)
     last_retry_at = db.Column(db.DateTime)
+    next_attempt_at = db.Column(db.DateTime)  # When a retry becomes due
+    # OriginatorConversationID of the current attempt; resends reuse it
+    idempotency_key = db.Column(db.String(64), unique=True)
     failure_reason = db.Column(db.Text)
     callback_payload = db.Column(db.Text)
+    # Worker lease: the claim token of the worker executing this row, until when
+    locked_by = db.Column(db.String(64))
+    locked_until = db.Column(db.DateTime)
     completed_at = db.Column(db.DateTime)
+    reconciled_at = db.Column(db.DateTime)  # Last matched against an M-Pesa statement
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
\ No newline at end of file
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class MpesaCallback(db.Model):
+    """Raw M-Pesa callbacks, recorded once and processed by the workers"""
+    __tablename__ = "mpesa_callbacks"
+    __table_args__ = (
+        # Workers scan unprocessed callbacks in arrival order
+        db.Index('ix_mpesa_callbacks_processed_at_received_at', 'processed_at', 'received_at'),
+    )
+
+    id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    kind = db.Column(db.String(20), nullable=False)  # 'stk', 'b2c_result' or 'b2c_timeout'
+    # Kind plus CheckoutRequestID / ConversationID, so redeliveries are rejected
+    dedupe_key = db.Column(db.String(255), nullable=False, unique=True)
+    payload = db.Column(db.Text, nullable=False)
+    received_at = db.Column(db.DateTime, default=datetime.utcnow)
+    processed_at = db.Column(db.DateTime)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    last_error = db.Column(db.Text)
+    locked_by = db.Column(db.String(64))
+    locked_until = db.Column(db.DateTime)
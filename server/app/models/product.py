@@ -13,8 +13,15 @@ class Collection(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+# Currency of product prices, and so of the orders placed for them
+DEFAULT_CURRENCY = 'KSH'
+
 class Product(db.Model):
     __tablename__ = "products"
+    __table_args__ = (
+        # Keyset pagination of the public catalog: WHERE status = ? ORDER BY created_at DESC, id DESC
+        db.Index('ix_products_status_created_at_id', 'status', 'created_at', 'id'),
+    )
 
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     artisan_id = db.Column(db.String(36), db.ForeignKey('users.id'), nullable=True)
@@ -22,7 +29,7 @@ class Product(db.Model):
     price = db.Column(db.Float, nullable=False)
     description = db.Column(db.Text)
     stock = db.Column(db.Integer, default=10)
-    currency = db.Column(db.String(10), default='KSH')
+    currency = db.Column(db.String(10), default=DEFAULT_CURRENCY)
     category_id = db.Column(db.String(36), db.ForeignKey('categories.id'), nullable=True)
     subcategory_id = db.Column(db.String(36), db.ForeignKey('subcategories.id'), nullable=True)
     image_url = db.Column(db.Text)
@@ -43,10 +50,9 @@ class Product(db.Model):
 
     @property
     def artisan_name(self):
-        """Get artisan name from User model"""
-        from .user import User
-        artisan = User.query.get(self.artisan_id)
-        return artisan.full_name if artisan else 'Unknown Artisan'
+        """Artisan display name, served from the artisan profile cache"""
+        from app.services.artisan_profile_service import artisan_profiles
+        return artisan_profiles.name_for(self.artisan_id)
 
 class ProductImage(db.Model):
     __tablename__ = "product_images"
@@ -4,6 +4,9 @@ from . import db
 
 class Review(db.Model):
     __tablename__ = "reviews"
+    __table_args__ = (
+        db.Index('ix_reviews_product_id_created_at', 'product_id', 'created_at'),
+    )
     
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     product_id = db.Column(db.String(36), db.ForeignKey('products.id'))
@@ -12,4 +15,38 @@ class Review(db.Model):
     title = db.Column(db.String(255))
     body = db.Column(db.Text)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
\ No newline at end of file
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class RatingAggregate(db.Model):
+    """Running rating totals, maintained incrementally as reviews change"""
+    __abstract__ = True
+
+    review_count = db.Column(db.Integer, nullable=False, default=0)
+    rating_sum = db.Column(db.Integer, nullable=False, default=0)
+    stars_1 = db.Column(db.Integer, nullable=False, default=0)
+    stars_2 = db.Column(db.Integer, nullable=False, default=0)
+    stars_3 = db.Column(db.Integer, nullable=False, default=0)
+    stars_4 = db.Column(db.Integer, nullable=False, default=0)
+    stars_5 = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    @property
+    def average(self):
+        return round(self.rating_sum / self.review_count, 2) if self.review_count else 0
+
+    def to_dict(self):
+        return {
+            'average': self.average,
+            'count': self.review_count or 0,
+            'histogram': {str(star): getattr(self, f'stars_{star}') or 0 for star in range(1, 6)}
+        }
+
+class ProductRating(RatingAggregate):
+    __tablename__ = "product_ratings"
+
+    product_id = db.Column(db.String(36), db.ForeignKey('products.id'), primary_key=True)
+
+class ArtisanRating(RatingAggregate):
+    __tablename__ = "artisan_ratings"
+
+    artisan_id = db.Column(db.String(36), db.ForeignKey('users.id'), primary_key=True)
@@ -14,6 +14,10 @@ class PaymentMethod(enum.Enum):
 
 class User(db.Model):
     __tablename__ = "users"
+    __table_args__ = (
+        # Daily signup rollups scan users by creation date
+        db.Index('ix_users_created_at', 'created_at'),
+    )
 
     id = db.Column(db.String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
     role = db.Column(db.Enum(UserRole), nullable=False)
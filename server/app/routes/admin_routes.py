@@ -4,63 +4,57 @@ Handles admin-only operations like user management, platform statistics, etc.
 """
 
 from flask import Blueprint, request, jsonify
-from flask_restful import Resource, Api
+from flask_restful import Resource
 from app.models import db, User, Product, Category, Order, Review
 from app.auth import require_auth, require_role, get_current_user
+from app.services.metrics_service import adjust_product_count
+from app.services.platform_stats_service import platform_stats
+from app.services.disbursement_queue import queue_metrics
+from app.services.response_cache import response_cache
+from app.services.search_service import product_search
 from sqlalchemy import func, desc
 from datetime import datetime, timedelta
+from app.utils.serialization import create_api
 
 admin_bp = Blueprint('admin_bp', __name__)
-admin_api = Api(admin_bp)
+admin_api = create_api(admin_bp)
 
 class AdminDashboardResource(Resource):
     """Admin dashboard with platform statistics"""
     
     @require_role('admin')
     def get(self):
+        """
+        Platform counters plus a daily signups/orders/GMV series
+
+        Query args: days (30, 90 or 365; default 30)
+        """
         try:
-            # Get platform statistics
-            total_users = User.query.filter_by(deleted_at=None).count()
-            total_artisans = User.query.filter_by(role='artisan', deleted_at=None).count()
-            total_buyers = User.query.filter_by(role='buyer', deleted_at=None).count()
-            total_products = Product.query.filter_by(deleted_at=None).count()
-            total_orders = Order.query.count()
-            total_categories = Category.query.filter_by(deleted_at=None).count()
-            
-            # Recent activity (last 30 days)
-            thirty_days_ago = datetime.utcnow() - timedelta(days=30)
-            recent_users = User.query.filter(
-                User.created_at >= thirty_days_ago,
-                User.deleted_at.is_(None)
-            ).count()
-            recent_products = Product.query.filter(
-                Product.created_at >= thirty_days_ago,
-                Product.deleted_at.is_(None)
-            ).count()
-            recent_orders = Order.query.filter(Order.placed_at >= thirty_days_ago).count()
-            
-            return {
-                'platform_stats': {
-                    'total_users': total_users,
-                    'total_artisans': total_artisans,
-                    'total_buyers': total_buyers,
-                    'total_products': total_products,
-                    'total_orders': total_orders,
-                    'total_categories': total_categories
-                },
-                'recent_activity': {
-                    'new_users_30d': recent_users,
-                    'new_products_30d': recent_products,
-                    'new_orders_30d': recent_orders
-                }
-            }, 200
-            
+            days = request.args.get('days', 30, type=int)
+            stats = dict(platform_stats.get_counters())
+            stats['daily'] = platform_stats.get_series(days)
+            return stats, 200
+        except ValueError as e:
+            return {'error': str(e)}, 400
         except Exception as e:
             return {
                 'error': 'Failed to fetch dashboard data',
                 'message': str(e)
             }, 500
 
+class AdminDisbursementQueueResource(Resource):
+    """Artisan disbursement queue depth and age"""
+    
+    @require_role('admin')
+    def get(self):
+        try:
+            return queue_metrics(), 200
+        except Exception as e:
+            return {
+                'error': 'Failed to fetch disbursement queue metrics',
+                'message': str(e)
+            }, 500
+
 class AdminUsersResource(Resource):
     """Manage users - list, update, delete"""
     
@@ -153,6 +147,7 @@ class AdminUserResource(Resource):
             
             user.updated_at = datetime.utcnow()
             db.session.commit()
+            response_cache.invalidate(f'user:{user.id}')
             
             return {
                 'message': 'User updated successfully',
@@ -182,6 +177,7 @@ class AdminUserResource(Resource):
             # Soft delete
             user.deleted_at = datetime.utcnow()
             db.session.commit()
+            response_cache.invalidate(f'user:{user.id}')
             
             return {'message': 'User deleted successfully'}, 200
             
@@ -249,10 +245,15 @@ class AdminProductResource(Resource):
             
             # Update product status (approve/reject)
             if 'status' in data:
+                was_active = product.status == 'active'
                 product.status = data['status']
+                adjust_product_count(product.artisan_id, int(product.status == 'active') - int(was_active))
+                # Approved products become searchable, rejected ones drop out
+                product_search.index_product(product)
             
             product.updated_at = datetime.utcnow()
             db.session.commit()
+            response_cache.invalidate(f'product:{product.id}', f'artisan-products:{product.artisan_id}')
             
             return {
                 'message': 'Product updated successfully',
@@ -279,7 +280,9 @@ class AdminProductResource(Resource):
             
             # Soft delete
             product.deleted_at = datetime.utcnow()
+            product_search.remove_product(product.id)
             db.session.commit()
+            response_cache.invalidate(f'product:{product.id}', f'artisan-products:{product.artisan_id}')
             
             return {'message': 'Product deleted successfully'}, 200
             
@@ -292,6 +295,7 @@ class AdminProductResource(Resource):
 
 # Register routes
 admin_api.add_resource(AdminDashboardResource, '/dashboard')
+admin_api.add_resource(AdminDisbursementQueueResource, '/disbursements/queue')
 admin_api.add_resource(AdminUsersResource, '/users')
 admin_api.add_resource(AdminUserResource, '/users/<user_id>')
 admin_api.add_resource(AdminProductsResource, '/products')
@@ -3,13 +3,17 @@ Artisan routes for Soko Safi
 Handles CRUD operations for artisan showcase media and social links
 """
 
-from flask_restful import Resource, Api
-from flask import Blueprint, request, jsonify
+from flask_restful import Resource
+from flask import Blueprint, request, jsonify, current_app
 from app.models import db, ArtisanShowcaseMedia, ArtisanSocial, User, Product
+from app.services.rating_service import get_artisan_rating
+from app.services.metrics_service import get_artisan_metrics
+from app.services.response_cache import response_cache
 # Removed problematic auth imports
+from app.utils.serialization import create_api
 
 artisan_bp = Blueprint('artisan_bp', __name__)
-artisan_api = Api(artisan_bp)
+artisan_api = create_api(artisan_bp)
 
 class ArtisanShowcaseMediaListResource(Resource):
     def get(self):
@@ -217,11 +221,8 @@ class ArtisanDashboardResource(Resource):
     def get(self):
         """Get artisan dashboard statistics - Artisan only"""
         try:
-            import traceback
             from flask import session, current_app
 
-            current_app.logger.info("Artisan dashboard accessed")
-
             # Check if user is authenticated and is an artisan
             user_id = session.get('user_id')
             user_role = session.get('user_role')
@@ -237,47 +238,22 @@ class ArtisanDashboardResource(Resource):
                     'orders': []
                 }, 200
 
-            # Get artisan's products count
-            total_products = Product.query.filter_by(artisan_id=user_id, status='active').count()
-
-            # Get total orders (orders containing artisan's products)
-            from app.models.order import Order, OrderItem
-            from sqlalchemy import func
-
-            # Get all order items for this artisan
-            order_items = db.session.query(OrderItem).filter_by(artisan_id=user_id).subquery()
-
-            # Count distinct orders
-            total_orders = db.session.query(func.count(func.distinct(order_items.c.order_id))).scalar() or 0
-
-            # Calculate total revenue from completed orders
-            total_revenue = db.session.query(func.sum(OrderItem.price * OrderItem.quantity)).filter(
-                OrderItem.artisan_id == user_id,
-                OrderItem.order_id.in_(
-                    db.session.query(Order.id).filter(Order.status == 'completed')
-                )
-            ).scalar() or 0
+            # Totals and the per-day series are maintained by the metrics service
+            metrics = get_artisan_metrics(user_id, days=request.args.get('days', 30, type=int))
 
             response_data = {
-                'stats': {
-                    'total_products': total_products,
-                    'total_orders': total_orders,
-                    'total_revenue': float(total_revenue)
-                },
+                'stats': metrics['stats'],
+                'daily': metrics['daily'],
                 'products': [],
                 'orders': []
             }
 
-            current_app.logger.info(f"Dashboard response: {response_data}")
+            current_app.logger.debug('Artisan dashboard served', extra={'user_id': user_id})
             return response_data, 200
 
         except Exception as e:
-            import traceback
             from flask import current_app
-
-            error_trace = traceback.format_exc()
-            current_app.logger.error(f"Dashboard error: {e}")
-            current_app.logger.error(f"Full traceback: {error_trace}")
+            current_app.logger.exception('Artisan dashboard failed')
 
             return {
                 'stats': {
@@ -306,6 +282,7 @@ class ArtisanMessagesResource(Resource):
             return []
 
 class ArtisanProfileResource(Resource):
+    @response_cache.cached(lambda data, artisan_id: [f'user:{artisan_id}'])
     def get(self, artisan_id):
         """Get artisan profile by ID - Public access"""
         try:
@@ -331,7 +308,6 @@ class ArtisanStatsResource(Resource):
     def get(self, artisan_id):
         """Get artisan statistics - Public access"""
         try:
-            from app.models.review import Review
             from app.models.order import Order, OrderItem
             from sqlalchemy import func
             
@@ -339,16 +315,12 @@ class ArtisanStatsResource(Resource):
             products = Product.query.filter_by(artisan_id=artisan_id, status='active').all()
             product_ids = [p.id for p in products]
             
-            # Calculate average rating and review count
+            # Average rating and review count from the maintained aggregate
+            rating = get_artisan_rating(artisan_id)
+            avg_rating = rating['average']
+            review_count = rating['count']
+            
             if product_ids:
-                rating_data = db.session.query(
-                    func.avg(Review.rating).label('avg_rating'),
-                    func.count(Review.id).label('review_count')
-                ).filter(Review.product_id.in_(product_ids)).first()
-                
-                avg_rating = float(rating_data.avg_rating) if rating_data.avg_rating else 0
-                review_count = rating_data.review_count or 0
-                
                 # Calculate total sales from completed orders
                 sales_count = db.session.query(func.sum(OrderItem.quantity)).filter(
                     OrderItem.artisan_id == artisan_id,
@@ -357,14 +329,13 @@ class ArtisanStatsResource(Resource):
                     )
                 ).scalar() or 0
             else:
-                avg_rating = 0
-                review_count = 0
                 sales_count = 0
             
             return {
                 'product_count': len(products),
                 'avg_rating': round(avg_rating, 1),
                 'review_count': review_count,
+                'rating_histogram': rating['histogram'],
                 'total_sales': sales_count
             }, 200
         except Exception as e:
@@ -412,6 +383,7 @@ class ArtisanReviewsResource(Resource):
             return [], 200
 
 class ArtisanProductsResource(Resource):
+    @response_cache.cached(lambda data, artisan_id: [f'artisan-products:{artisan_id}'])
     def get(self, artisan_id):
         """Get products by artisan ID"""
         try:
@@ -426,8 +398,10 @@ class ArtisanProductsResource(Resource):
                 'stock': p.stock,
                 'currency': p.currency
             } for p in products], 200
-        except Exception:
-            return [], 200
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.error(f"Failed to load products for artisan {artisan_id}: {str(e)}")
+            return {'error': 'Failed to load products'}, 500
 
 
 
@@ -3,14 +3,19 @@ Authentication routes for Soko Safi
 Handles user registration, login, logout, and profile management
 """
 
-from flask import Blueprint, request, jsonify, session
-from flask_restful import Resource, Api
+import logging
+from flask import Blueprint, request, jsonify, session, current_app
+from flask_restful import Resource
 from app.models import db, User, UserRole
-from app.auth import hash_password, verify_password, login_user, logout_user, get_current_user, require_auth, require_ownership_or_role
+from app.auth import hash_password, verify_password, login_user, logout_user, get_current_user, require_auth, require_ownership_or_role, issue_tokens, decode_token, create_access_token, ACCESS_TOKEN_TTL
+from app.services.response_cache import response_cache
+from app.utils.serialization import create_api
 import re
 
+logger = logging.getLogger(__name__)
+
 auth_bp = Blueprint('auth_bp', __name__)
-auth_api = Api(auth_bp)
+auth_api = create_api(auth_bp)
 
 def validate_email(email):
     """Validate email format"""
@@ -157,10 +162,7 @@ class LoginResource(Resource):
                 }, 401
             
             # Log in the user
-            print(f"[LOGIN] Before login_user - Session: {dict(session)}")
             login_user(user.id, user.role.value)
-            print(f"[LOGIN] After login_user - Session: {dict(session)}")
-            print(f"[LOGIN] Session ID: {session.sid if hasattr(session, 'sid') else 'No SID'}")
             
             return {
                 'message': 'Login successful',
@@ -180,6 +182,71 @@ class LoginResource(Resource):
                 'message': f'An error occurred during login: {str(e)}'
             }, 500
 
+class TokenResource(Resource):
+    """Exchange credentials for a signed access/refresh token pair"""
+    
+    def options(self):
+        """Handle CORS preflight request"""
+        return {}, 200
+    
+    def post(self):
+        data = request.get_json(silent=True) or {}
+        
+        if not data.get('email') or not data.get('password'):
+            return {
+                'error': 'Missing credentials',
+                'message': 'Email and password are required'
+            }, 400
+        
+        user = User.query.filter_by(email=data['email'].strip().lower(), deleted_at=None).first()
+        if not user or not verify_password(data['password'], user.password_hash):
+            return {
+                'error': 'Invalid credentials',
+                'message': 'Email or password is incorrect'
+            }, 401
+        
+        return {
+            **issue_tokens(user.id, user.role.value),
+            'user': {
+                'id': user.id,
+                'email': user.email,
+                'full_name': user.full_name,
+                'role': user.role.value,
+                'is_verified': user.is_verified,
+                'profile_picture_url': user.profile_picture_url
+            }
+        }, 200
+
+class TokenRefreshResource(Resource):
+    """Exchange a refresh token for a new access token"""
+    
+    def options(self):
+        """Handle CORS preflight request"""
+        return {}, 200
+    
+    def post(self):
+        data = request.get_json(silent=True) or {}
+        claims = decode_token(data.get('refresh_token'), token_type='refresh')
+        if not claims:
+            return {
+                'error': 'Invalid token',
+                'message': 'Refresh token is invalid or expired'
+            }, 401
+        
+        # Re-read the user so deleted accounts and role changes take effect
+        user = User.query.filter_by(id=claims['sub'], deleted_at=None).first()
+        if not user:
+            return {
+                'error': 'Invalid token',
+                'message': 'Refresh token is invalid or expired'
+            }, 401
+        
+        return {
+            'access_token': create_access_token(user.id, user.role.value),
+            'token_type': 'Bearer',
+            'expires_in': current_app.config.get('ACCESS_TOKEN_TTL', ACCESS_TOKEN_TTL)
+        }, 200
+
 class LogoutResource(Resource):
     """Handle user logout"""
     
@@ -256,6 +323,7 @@ class ProfileResource(Resource):
                 user.profile_picture_url = data['profile_picture_url'].strip()
             
             db.session.commit()
+            response_cache.invalidate(f'user:{user.id}')
             
             return {
                 'message': 'Profile updated successfully',
@@ -341,23 +409,15 @@ class CheckSessionResource(Resource):
     def get(self):
         """Get current session info"""
         try:
-            print(f"[CHECK_SESSION] Full session data: {dict(session)}")
-            print(f"[CHECK_SESSION] Session keys: {list(session.keys())}")
-            print(f"[CHECK_SESSION] Request headers: {dict(request.headers)}")
-            print(f"[CHECK_SESSION] Request cookies: {dict(request.cookies)}")
-            
             user_id = session.get('user_id')
-            print(f"[CHECK_SESSION] Retrieved user_id: {user_id}")
             
             if not user_id:
-                print(f"[CHECK_SESSION] No user_id found, returning unauthenticated")
                 return {
                     'authenticated': False
                 }, 200
             
             user = User.query.filter(User.id == user_id).first()
             if user:
-                print(f"[CHECK_SESSION] User found: {user.email}, returning authenticated")
                 return {
                     'authenticated': True,
                     'user': {
@@ -370,12 +430,12 @@ class CheckSessionResource(Resource):
                     }
                 }, 200
             else:
-                print(f"[CHECK_SESSION] User not found in database, returning unauthenticated")
+                logger.debug('Session refers to missing user', extra={'user_id': user_id})
                 return {
                     'authenticated': False
                 }, 200
         except Exception as e:
-            print(f"[CHECK_SESSION] Exception occurred: {str(e)}")
+            logger.exception('Session check failed')
             return {
                 'authenticated': False,
                 'error': 'Session check failed'
@@ -403,8 +463,7 @@ class ResetPasswordResource(Resource):
             # Always return success to prevent email enumeration
             if user:
                 # TODO: In production, implement email-based password reset
-            
-                print(f"[PASSWORD_RESET] Reset requested for user: {user.email}")
+                logger.info('Password reset requested', extra={'user_id': user.id})
             
             return {
                 'message': 'If an account with that email exists, a password reset link has been sent'
@@ -420,6 +479,8 @@ class ResetPasswordResource(Resource):
 auth_api.add_resource(RegisterResource, '/register')
 auth_api.add_resource(LoginResource, '/login')
 auth_api.add_resource(LogoutResource, '/logout')
+auth_api.add_resource(TokenResource, '/token')
+auth_api.add_resource(TokenRefreshResource, '/token/refresh')
 auth_api.add_resource(ProfileResource, '/profile')
 auth_api.add_resource(ChangePasswordResource, '/change-password')
 auth_api.add_resource(CheckSessionResource, '/check_session')
@@ -3,13 +3,19 @@ Cart routes for Soko Safi
 Handles CRUD operations for carts and cart items
 """
 
-from flask_restful import Resource, Api
+import logging
+from flask_restful import Resource
 from flask import Blueprint, request
 from app.models import db, Cart, CartItem
-from app.auth import require_auth, require_role
+from app.auth import require_auth, require_role, current_user_id
+from app.services.artisan_profile_service import artisan_profiles
+from app.services.checkout_service import get_user_cart
+from app.utils.serialization import create_api
+
+logger = logging.getLogger(__name__)
 
 cart_bp = Blueprint('cart_bp', __name__)
-cart_api = Api(cart_bp)
+cart_api = create_api(cart_bp)
 
 class CartListResource(Resource):
     @require_role('admin')
@@ -113,22 +119,14 @@ class CartItemListResource(Resource):
         """Get user's cart items"""
         try:
             
-            # Get user_id from session or JWT
-            from flask import session
-            user_id = session.get('user_id')
-            if not user_id:
-                try:
-                    from flask_jwt_extended import get_jwt_identity
-                    user_id = get_jwt_identity()
-                except Exception:
-                    user_id = None
+            user_id = current_user_id()
             
             
             if not user_id:
                 return [], 200
             
             # Get or create user's cart
-            cart = Cart.query.filter_by(user_id=user_id).first()
+            cart = get_user_cart(user_id)
             if not cart:
                 return [], 200
             
@@ -142,6 +140,8 @@ class CartItemListResource(Resource):
             ).all()
             
             
+            artisan_profiles.get_many(product.artisan_id for _, product in cart_items)
+            
             result = []
             for cart_item, product in cart_items:
                 item_data = {
@@ -156,7 +156,7 @@ class CartItemListResource(Resource):
                         'price': float(product.price),
                         'image': product.image_url,
                         'image_url': product.image_url,
-                        'artisan_name': 'Artisan',  # TODO: Join with user table
+                        'artisan_name': product.artisan_name,
                         'stock': product.stock
                     }
                 }
@@ -165,8 +165,7 @@ class CartItemListResource(Resource):
             return result, 200
             
         except Exception as e:
-            import traceback
-            traceback.print_exc()
+            logger.exception('Failed to load cart items')
             return [], 200
     
     @require_auth
@@ -174,15 +173,7 @@ class CartItemListResource(Resource):
         """Add item to cart"""
         try:
             
-            # Get user_id from session or JWT
-            from flask import session
-            user_id = session.get('user_id')
-            if not user_id:
-                try:
-                    from flask_jwt_extended import get_jwt_identity
-                    user_id = get_jwt_identity()
-                except Exception:
-                    user_id = None
+            user_id = current_user_id()
 
             if not user_id:
                 return {'error': 'Authentication required'}, 401
@@ -202,7 +193,7 @@ class CartItemListResource(Resource):
                 return {'error': 'Product not found'}, 404
             
             # Get or create user's cart
-            cart = Cart.query.filter_by(user_id=user_id).first()
+            cart = get_user_cart(user_id)
             if not cart:
                 cart = Cart(user_id=user_id)
                 db.session.add(cart)
@@ -243,8 +234,7 @@ class CartItemListResource(Resource):
             return result, 201
             
         except Exception as e:
-            import traceback
-            traceback.print_exc()
+            logger.exception('Failed to add item to cart')
             db.session.rollback()
             return {'error': 'Failed to add item to cart'}, 500
 
@@ -267,15 +257,7 @@ class CartItemResource(Resource):
     def put(self, cart_item_id):
         """Update cart item quantity"""
         try:
-            # Get user_id from session or JWT
-            from flask import session
-            user_id = session.get('user_id')
-            if not user_id:
-                try:
-                    from flask_jwt_extended import get_jwt_identity
-                    user_id = get_jwt_identity()
-                except Exception:
-                    return {'error': 'Authentication required'}, 401
+            user_id = current_user_id()
             
             cart_item = CartItem.query.get_or_404(cart_item_id)
             
@@ -309,15 +291,7 @@ class CartItemResource(Resource):
     def delete(self, cart_item_id):
         """Delete cart item"""
         try:
-            # Get user_id from session or JWT
-            from flask import session
-            user_id = session.get('user_id')
-            if not user_id:
-                try:
-                    from flask_jwt_extended import get_jwt_identity
-                    user_id = get_jwt_identity()
-                except Exception:
-                    return {'error': 'Authentication required'}, 401
+            user_id = current_user_id()
             
             cart_item = CartItem.query.get_or_404(cart_item_id)
             
@@ -339,18 +313,10 @@ class ClearCartResource(Resource):
     def delete(self):
         """Clear user's cart"""
         try:
-            # Get user_id from session or JWT
-            from flask import session
-            user_id = session.get('user_id')
-            if not user_id:
-                try:
-                    from flask_jwt_extended import get_jwt_identity
-                    user_id = get_jwt_identity()
-                except Exception:
-                    return {'error': 'Authentication required'}, 401
+            user_id = current_user_id()
             
             # Get user's cart
-            cart = Cart.query.filter_by(user_id=user_id, deleted_at=None).first()
+            cart = get_user_cart(user_id)
             if cart:
                 # Delete all cart items
                 CartItem.query.filter_by(cart_id=cart.id).delete()
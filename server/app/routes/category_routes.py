@@ -3,15 +3,18 @@ Category routes for Soko Safi
 Handles CRUD operations for categories and subcategories
 """
 
-from flask_restful import Resource, Api
+from flask_restful import Resource
 from flask import Blueprint, request
 from app.models import db, Category, Subcategory
 from app.auth import require_auth, require_role, require_ownership_or_role
+from app.services.response_cache import response_cache
+from app.utils.serialization import create_api
 
 category_bp = Blueprint('category_bp', __name__)
-category_api = Api(category_bp)
+category_api = create_api(category_bp)
 
 class CategoryListResource(Resource):
+    @response_cache.cached(lambda data: ['categories'])
     def get(self):
         """Get all categories - Public access"""
         # Support databases that don't have the soft-delete column yet
@@ -42,6 +45,7 @@ class CategoryListResource(Resource):
         try:
             db.session.add(category)
             db.session.commit()
+            response_cache.invalidate('categories')
 
             return {
                 'message': 'Category created successfully',
@@ -78,6 +82,7 @@ class CategoryResource(Resource):
             category.description = data['description'].strip()
         
         db.session.commit()
+        response_cache.invalidate('categories')
         
         return {
             'message': 'Category updated successfully',
@@ -99,10 +104,12 @@ class CategoryResource(Resource):
         else:
             db.session.delete(category)
         db.session.commit()
+        response_cache.invalidate('categories')
         
         return {'message': 'Category deleted successfully'}, 200
 
 class SubcategoryListResource(Resource):
+    @response_cache.cached(lambda data: ['categories'])
     def get(self):
         """Get all subcategories - Public access"""
         if hasattr(Subcategory, 'deleted_at'):
@@ -133,6 +140,7 @@ class SubcategoryListResource(Resource):
         
         db.session.add(subcategory)
         db.session.commit()
+        response_cache.invalidate('categories')
         
         return {
             'message': 'Subcategory created successfully',
@@ -170,6 +178,7 @@ class SubcategoryResource(Resource):
             subcategory.category_id = data['category_id']
         
         db.session.commit()
+        response_cache.invalidate('categories')
         
         return {
             'message': 'Subcategory updated successfully',
@@ -191,6 +200,7 @@ class SubcategoryResource(Resource):
         else:
             db.session.delete(subcategory)
         db.session.commit()
+        response_cache.invalidate('categories')
         
         return {'message': 'Subcategory deleted successfully'}, 200
 
@@ -1,10 +1,11 @@
-from flask_restful import Resource, Api
+from flask_restful import Resource
 from flask import Blueprint, request
 from app.models import db, Collection, Product
 from app.auth import require_auth, require_role
+from app.utils.serialization import create_api
 
 collection_bp = Blueprint('collection_bp', __name__)
-collection_api = Api(collection_bp)
+collection_api = create_api(collection_bp)
 
 class CollectionListResource(Resource):
     def get(self):
@@ -3,64 +3,86 @@ Favorite routes for Soko Safi
 Handles CRUD operations for favorites
 """
 
-from flask_restful import Resource, Api
+from flask_restful import Resource
 from flask import Blueprint, request
 from app.models import db, Favorite
-from app.auth import require_auth, require_role
-
+from app.auth import require_auth, require_role, current_user_id
+from app.services.artisan_profile_service import artisan_profiles
+from app.utils.pagination import paginate_keyset, get_page_size, MAX_PAGE_SIZE
+from app.utils.serialization import create_api
 
 favorite_bp = Blueprint('favorite_bp', __name__)
-favorite_api = Api(favorite_bp)
+favorite_api = create_api(favorite_bp)
 
 class FavoriteListResource(Resource):
     @require_auth
     def get(self):
-        """Get favorites - Admin gets all, users get their own favorites"""
+        """
+        Get favorites - Admin gets all, users get their own favorites
+
+        Query args: limit, cursor (newest first)
+        ids_only=1 returns just the caller's favorited product ids, optionally
+        restricted to `product_ids` (comma-separated), for rendering heart
+        icons across a page of products.
+        """
         from flask import session
         from app.models.product import Product
 
-        # Get user_id from session or JWT
-        current_user_id = session.get('user_id')
-        if not current_user_id:
-            try:
-                from flask_jwt_extended import get_jwt_identity
-                current_user_id = get_jwt_identity()
-            except Exception:
-                return {'error': 'Authentication required'}, 401
+        user_id = current_user_id()
         
-        if not current_user_id:
+        if not user_id:
             return {'error': 'Authentication required'}, 401
             
         user_role = session.get('user_role', 'buyer')
 
-        if user_role == 'admin':
-            # Admin gets all favorites
-            favorites = Favorite.query.all()
-        else:
+        if request.args.get('ids_only', '').lower() in ('1', 'true'):
+            # Served from the (user_id, product_id) index alone
+            query = db.session.query(Favorite.product_id).filter(Favorite.user_id == user_id)
+            product_ids = [pid for pid in request.args.get('product_ids', '').split(',') if pid]
+            if product_ids:
+                query = query.filter(Favorite.product_id.in_(product_ids[:MAX_PAGE_SIZE]))
+            return {'product_ids': [row.product_id for row in query.all()]}
+
+        query = db.session.query(Favorite, Product).outerjoin(Product, Favorite.product_id == Product.id)
+        if user_role != 'admin':
             # Regular users get their own favorites
-            favorites = Favorite.query.filter_by(user_id=current_user_id).all()
+            query = query.filter(Favorite.user_id == user_id)
 
-        # Enhance favorites with product details
-        enhanced_favorites = []
-        for favorite in favorites:
-            product = Product.query.get(favorite.product_id) if favorite.product_id else None
+        try:
+            rows, next_cursor = paginate_keyset(
+                query, Favorite.created_at, Favorite.id,
+                cursor=request.args.get('cursor'),
+                limit=get_page_size(request.args),
+                sort_key=lambda row: (row.Favorite.created_at, row.Favorite.id)
+            )
+        except ValueError as e:
+            return {'error': str(e)}, 400
 
+        # Warm the artisan profile cache so artisan_name is a lookup
+        artisan_profiles.get_many(product.artisan_id for _, product in rows if product)
+
+        enhanced_favorites = []
+        for favorite, product in rows:
             enhanced_favorite = {
                 'id': favorite.id,
                 'user_id': favorite.user_id,
                 'product_id': favorite.product_id,
                 'product': {
-                    'id': product.id if product else None,
-                    'title': product.title if product else 'Unknown Product',
-                    'price': float(product.price) if product and product.price else 0,
-                    'image': product.image if product else None,
-                    'artisan_name': product.artisan_name if product else None
+                    'id': product.id,
+                    'title': product.title,
+                    'price': float(product.price) if product.price else 0,
+                    'image': product.image,
+                    'artisan_name': product.artisan_name
                 } if product else None,
                 'created_at': favorite.created_at.isoformat() if favorite.created_at else None
             }
             enhanced_favorites.append(enhanced_favorite)
 
-        return enhanced_favorites
+        return {
+            'favorites': enhanced_favorites,
+            'next_cursor': next_cursor,
+            'has_more': next_cursor is not None
+        }
     
     @require_auth
     def post(self):
@@ -72,14 +94,7 @@ class FavoriteListResource(Resource):
             return {'error': 'product_id is required'}, 400
         
         try:
-            # Get user_id from session or JWT
-            user_id = session.get('user_id')
-            if not user_id:
-                try:
-                    from flask_jwt_extended import get_jwt_identity
-                    user_id = get_jwt_identity()
-                except Exception:
-                    return {'error': 'Authentication required'}, 401
+            user_id = current_user_id()
             
             if not user_id:
                 return {'error': 'Authentication required'}, 401
@@ -163,14 +178,7 @@ class FavoriteResource(Resource):
         """Delete favorite - Owner or Admin only"""
         from flask import session
         
-        # Get user_id from session or JWT
-        user_id = session.get('user_id')
-        if not user_id:
-            try:
-                from flask_jwt_extended import get_jwt_identity
-                user_id = get_jwt_identity()
-            except Exception:
-                return {'error': 'Authentication required'}, 401
+        user_id = current_user_id()
         
         if not user_id:
             return {'error': 'Authentication required'}, 401
@@ -194,16 +202,7 @@ class FavoriteByProductResource(Resource):
     @require_auth
     def delete(self, product_id):
         """Delete favorite by product ID - Owner only"""
-        from flask import session
-        
-        # Get user_id from session or JWT
-        user_id = session.get('user_id')
-        if not user_id:
-            try:
-                from flask_jwt_extended import get_jwt_identity
-                user_id = get_jwt_identity()
-            except Exception:
-                return {'error': 'Authentication required'}, 401
+        user_id = current_user_id()
         
         if not user_id:
             return {'error': 'Authentication required'}, 401
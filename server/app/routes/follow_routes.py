@@ -3,13 +3,14 @@ Follow routes for Soko Safi
 Handles CRUD operations for follows
 """
 
-from flask_restful import Resource, Api
+from flask_restful import Resource
 from flask import Blueprint, request
 from app.models import db, Follow
 from app.auth import require_auth, require_role, require_ownership_or_role
+from app.utils.serialization import create_api
 
 follow_bp = Blueprint('follow_bp', __name__)
-follow_api = Api(follow_bp)
+follow_api = create_api(follow_bp)
 
 class FollowListResource(Resource):
     @require_auth
@@ -3,13 +3,21 @@ Message routes for Soko Safi
 Handles CRUD operations for messages
 """
 
-from flask_restful import Resource, Api
+from flask_restful import Resource
 from flask import Blueprint, request
 from app.models import db, Message
 from app.auth import require_auth, require_role, require_ownership_or_role
+from app.services.conversation_service import (
+    get_conversation, get_conversation_summaries, get_conversation_messages, record_message,
+    mark_conversation_read, mark_message_read, mark_message_unread, edit_message_text, is_message_read,
+    avatar_url_for
+)
+from app.utils.pagination import get_page_size
+from app.utils.serialization import create_api
+from app.schemas import ThreadMessage
 
 message_bp = Blueprint('message_bp', __name__)
-message_api = Api(message_bp)
+message_api = create_api(message_bp)
 
 class MessageListResource(Resource):
     @require_auth
@@ -64,6 +72,7 @@ class MessageListResource(Resource):
         
         try:
             db.session.add(message)
+            record_message(message)
             db.session.commit()
         except Exception as e:
             db.session.rollback()
@@ -119,18 +128,21 @@ class MessageResource(Resource):
         
         data = request.json
         
+        # A message belongs to its conversation; moving it would leave the
+        # conversation summaries and unread counters pointing at the old one
+        if any(data.get(field) not in (None, getattr(message, field)) for field in ('sender_id', 'receiver_id')):
+            return {'error': 'Message participants cannot be changed'}, 400
+        
         # Only allow updating is_read status for receiver or admin
         if 'is_read' in data and (message.receiver_id == current_user_id or user_role == 'admin'):
-            message.is_read = data['is_read']
+            if data['is_read']:
+                mark_message_read(message)
+            else:
+                mark_message_unread(message)
         
         # Only sender or admin can update message content
         if 'message' in data and (message.sender_id == current_user_id or user_role == 'admin'):
-            message.message_text = data['message']
-        
-        if 'sender_id' in data and user_role == 'admin':
-            message.sender_id = data['sender_id']
-        if 'receiver_id' in data and user_role == 'admin':
-            message.receiver_id = data['receiver_id']
+            edit_message_text(message, data['message'])
         
         db.session.commit()
         
@@ -167,135 +179,76 @@ class MessageResource(Resource):
 class MessageConversationsResource(Resource):
     @require_auth
     def get(self):
-        """Get conversations for current user"""
+        """Get conversations for current user, most recently active first"""
         from flask import session
-        from app.models import User
-        from sqlalchemy import func, desc
-
-        current_user_id = session.get('user_id')
-        print(f"[BACKEND_CONVERSATIONS] Current user ID: {current_user_id}")
-        print(f"[BACKEND_CONVERSATIONS] Session data: {dict(session)}")
 
-        # Get latest message for each conversation partner
-        subquery = db.session.query(
-            func.greatest(Message.sender_id, Message.receiver_id).label('user1'),
-            func.least(Message.sender_id, Message.receiver_id).label('user2'),
-            func.max(Message.created_at).label('latest_timestamp')
-        ).filter(
-            db.or_(
-                Message.sender_id == current_user_id,
-                Message.receiver_id == current_user_id
-            )
-        ).group_by('user1', 'user2').subquery()
-
-        # Get the actual latest messages
-        latest_messages = db.session.query(Message).join(
-            subquery,
-            db.and_(
-                Message.created_at == subquery.c.latest_timestamp,
-                db.or_(
-                    db.and_(
-                        Message.sender_id == subquery.c.user1,
-                        Message.receiver_id == subquery.c.user2
-                    ),
-                    db.and_(
-                        Message.sender_id == subquery.c.user2,
-                        Message.receiver_id == subquery.c.user1
-                    )
-                )
+        try:
+            conversations, next_cursor = get_conversation_summaries(
+                session.get('user_id'),
+                cursor=request.args.get('cursor'),
+                limit=get_page_size(request.args)
             )
-        ).order_by(desc(Message.created_at)).all()
-
-        conversations = []
-        print(f"[BACKEND_CONVERSATIONS] Found {len(latest_messages)} latest messages")
-        
-        for msg in latest_messages:
-            partner_id = msg.receiver_id if msg.sender_id == current_user_id else msg.sender_id
-            partner = User.query.get(partner_id)
-            
-            print(f"[BACKEND_CONVERSATIONS] Processing message with partner_id: {partner_id}")
-            print(f"[BACKEND_CONVERSATIONS] Partner found: {partner is not None}")
-            
-            if partner:
-                # Count unread messages from this partner
-                unread_count = Message.query.filter_by(
-                    sender_id=partner_id,
-                    receiver_id=current_user_id,
-                    is_read=False
-                ).count()
-
-                # Get user avatar from profile or generate one
-                avatar_url = partner.profile_picture_url if hasattr(partner, 'profile_picture_url') and partner.profile_picture_url else f'https://ui-avatars.com/api/?name={partner.full_name or "User"}&background=6366f1&color=fff'
-                
-                conversation = {
-                    'id': partner_id,
-                    'artisan': {
-                        'id': partner_id,
-                        'name': partner.full_name or 'Unknown User',
-                        'avatar': avatar_url,
-                        'profile_picture_url': avatar_url,
-                        'online': False  # TODO: Implement online status
-                    },
-                    'lastMessage': msg.message_text,
-                    'lastMessageTime': msg.created_at.isoformat() if msg.created_at else '',
-                    'timestamp': msg.created_at.isoformat() if msg.created_at else '',
-                    'created_at': msg.created_at.isoformat() if msg.created_at else '',
-                    'unread': unread_count
-                }
-                
-                print(f"[BACKEND_CONVERSATIONS] Added conversation: {conversation}")
-                conversations.append(conversation)
+        except ValueError as e:
+            return {'error': str(e)}, 400
 
-        print(f"[BACKEND_CONVERSATIONS] Returning {len(conversations)} conversations")
-        return conversations
+        return {
+            'conversations': conversations,
+            'next_cursor': next_cursor,
+            'has_more': next_cursor is not None
+        }
 
 class ConversationMessagesResource(Resource):
     @require_auth
     def get(self, user_id):
-        """Get messages in conversation with specific user"""
+        """
+        Get messages in conversation with specific user
+
+        Pages backwards from the newest message: pass the returned `before`
+        cursor to load older messages. Each page is returned oldest-first for
+        display. Opening the thread (no `before`) advances the caller's
+        read-receipt watermark instead of updating every unread message.
+        """
         from flask import session
-        from app.models import User
 
         current_user_id = session.get('user_id')
-        
-        # Get all messages between current user and specified user
-        messages = Message.query.filter(
-            db.or_(
-                db.and_(Message.sender_id == current_user_id, Message.receiver_id == user_id),
-                db.and_(Message.sender_id == user_id, Message.receiver_id == current_user_id)
-            )
-        ).order_by(Message.created_at.asc()).limit(100).all()  # Limit to last 100 messages for performance
+        before = request.args.get('before')
 
-        # Mark messages from the other user as read and delivered
-        Message.query.filter_by(
-            sender_id=user_id,
-            receiver_id=current_user_id,
-            is_read=False
-        ).update({
-            'is_read': True,
-            'status': 'read'
-        })
-        db.session.commit()
+        conversation = get_conversation(current_user_id, user_id)
+        if not conversation:
+            return {'messages': [], 'before': None, 'has_more': False}
+
+        # Acknowledge before loading so the commit doesn't expire the page
+        if not before and mark_conversation_read(conversation, current_user_id):
+            db.session.commit()
+
+        try:
+            messages, older_cursor = get_conversation_messages(
+                conversation, before=before, limit=get_page_size(request.args, default=50)
+            )
+        except ValueError as e:
+            return {'error': str(e)}, 400
 
         formatted_messages = []
-        for msg in messages:
-            
-            formatted_messages.append({
-                'id': msg.id,
-                'sender': 'buyer' if msg.sender_id == current_user_id else 'artisan',
-                'text': msg.message_text,
-                'time': msg.created_at.strftime('%H:%M') if msg.created_at else '',
-                'timestamp': msg.created_at.isoformat() if msg.created_at else '',
-                'created_at': msg.created_at.isoformat() if msg.created_at else '',
-                'message_type': 'text',
-                'attachment_url': msg.media_url,
-                'attachment_name': None,
-                'status': msg.status or 'sent',
-                'is_read': msg.is_read
-            })
-            
+        for msg in reversed(messages):
+            timestamp = msg.created_at.isoformat() if msg.created_at else ''
+            is_read = is_message_read(msg, conversation)
+            formatted_messages.append(ThreadMessage(
+                id=msg.id,
+                sender='buyer' if msg.sender_id == current_user_id else 'artisan',
+                text=msg.message_text,
+                time=msg.created_at.strftime('%H:%M') if msg.created_at else '',
+                timestamp=timestamp,
+                created_at=timestamp,
+                attachment_url=msg.media_url,
+                status='read' if is_read else (msg.status or 'sent'),
+                is_read=is_read
+            ))
 
-        return formatted_messages
+        return {
+            'messages': formatted_messages,
+            'before': older_cursor,
+            'has_more': older_cursor is not None
+        }
 
 class MessageStatusResource(Resource):
     @require_auth
@@ -317,7 +270,7 @@ class MessageStatusResource(Resource):
             try:
                 message.status = data['status']
                 if data['status'] == 'read':
-                    message.is_read = True
+                    mark_message_read(message)
                 db.session.commit()
             except ValueError:
                 return {'error': 'Invalid status'}, 400
@@ -342,16 +295,13 @@ class ConversationInitResource(Resource):
             return {'error': 'User not found'}, 404
         
         # Check if conversation already exists
-        existing_message = Message.query.filter(
-            db.or_(
-                db.and_(Message.sender_id == current_user_id, Message.receiver_id == user_id),
-                db.and_(Message.sender_id == user_id, Message.receiver_id == current_user_id)
-            )
-        ).first()
+        conversation = get_conversation(current_user_id, user_id)
+        avatar_url = avatar_url_for(target_user)
         
-        if existing_message:
+        if conversation and conversation.last_message_id:
             # Conversation exists, return conversation info
-            avatar_url = target_user.profile_picture_url if hasattr(target_user, 'profile_picture_url') and target_user.profile_picture_url else f'https://ui-avatars.com/api/?name={target_user.full_name or "User"}&background=6366f1&color=fff'
+            unread = conversation.user_a_unread if current_user_id == conversation.user_a_id else conversation.user_b_unread
+            last_activity = conversation.last_activity_at.isoformat() if conversation.last_activity_at else ''
             
             return {
                 'conversation': {
@@ -363,17 +313,15 @@ class ConversationInitResource(Resource):
                         'profile_picture_url': avatar_url,
                         'online': False
                     },
-                    'lastMessage': existing_message.message_text,
-                    'lastMessageTime': existing_message.created_at.isoformat() if existing_message.created_at else '',
-                    'timestamp': existing_message.created_at.isoformat() if existing_message.created_at else '',
-                    'created_at': existing_message.created_at.isoformat() if existing_message.created_at else '',
-                    'unread': 0
+                    'lastMessage': conversation.last_message_text,
+                    'lastMessageTime': last_activity,
+                    'timestamp': last_activity,
+                    'created_at': last_activity,
+                    'unread': unread
                 }
             }, 200
         
         # No conversation exists, create placeholder conversation
-        avatar_url = target_user.profile_picture_url if hasattr(target_user, 'profile_picture_url') and target_user.profile_picture_url else f'https://ui-avatars.com/api/?name={target_user.full_name or "User"}&background=6366f1&color=fff'
-        
         return {
             'conversation': {
                 'id': user_id,
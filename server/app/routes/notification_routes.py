@@ -3,13 +3,15 @@ Notification routes for Soko Safi
 Handles CRUD operations for notifications
 """
 
-from flask_restful import Resource, Api
+from flask_restful import Resource
 from flask import Blueprint, request
 from app.models import db, Notification, NotificationType
 from app.auth import require_auth, require_role, require_ownership_or_role
+from app.utils.serialization import create_api
+from app.schemas import NotificationItem
 
 notification_bp = Blueprint('notification_bp', __name__)
-notification_api = Api(notification_bp)
+notification_api = create_api(notification_bp)
 
 class NotificationListResource(Resource):
     @require_auth
@@ -19,16 +21,16 @@ class NotificationListResource(Resource):
         if session.get('user_role') != 'admin':
             return {'error': 'Admin access required'}, 403
         
-        notifications = Notification.query.filter_by(deleted_at=None).all()
-        return [{
-            'id': n.id,
-            'user_id': n.user_id,
-            'type': n.type.value if n.type else None,
-            'title': n.title,
-            'message': n.message,
-            'is_read': n.is_read,
-            'created_at': n.created_at.isoformat() if n.created_at else None
-        } for n in notifications]
+        notifications = Notification.query.order_by(Notification.created_at.desc()).all()
+        return [NotificationItem(
+            id=n.id,
+            user_id=n.user_id,
+            type=n.type.value if n.type else None,
+            title=n.title,
+            message=n.message,
+            is_read=n.is_read,
+            created_at=n.created_at.isoformat() if n.created_at else None
+        ) for n in notifications]
     
     @require_auth
     def post(self):
@@ -3,77 +3,110 @@ Order routes for Soko Safi
 Handles CRUD operations for orders and order items
 """
 
-from flask_restful import Resource, Api
+from flask_restful import Resource
 from flask import Blueprint, request
 from app.models import db, Order, OrderItem, OrderStatus
 from app.auth import require_auth, require_role, require_ownership_or_role
+from app.utils.pagination import paginate_keyset, get_page_size
+from app.services.metrics_service import sync_order_metrics
+from app.services.checkout_service import checkout_cart, release_order_stock, CheckoutError
+from app.services.response_cache import response_cache
+from app.utils.serialization import create_api
+from app.schemas import OrderSummary, OrderLine
 
 order_bp = Blueprint('order_bp', __name__)
-order_api = Api(order_bp)
+order_api = create_api(order_bp)
 
 class OrderListResource(Resource):
     @require_auth
     def get(self):
-        """Get orders - Admin gets all, users get their own orders"""
+        """
+        Get orders - Admin gets all, users get their own orders
+
+        Newest-first keyset pages (limit, cursor). Each page costs a fixed
+        three queries: the orders, their buyers, and all of their items
+        joined to products and artisans in one IN-batched fetch.
+        """
         from flask import session
-        from app.models import User, OrderItem, Product
+        from app.models import User, Product
+        from sqlalchemy.orm import aliased
 
         current_user_id = session.get('user_id')
         user_role = session.get('user_role')
 
-        if user_role == 'admin':
-            # Admin gets all orders
-            orders = Order.query.filter_by(deleted_at=None).all()
-        else:
+        query = Order.query
+        if user_role != 'admin':
             # Regular users get their own orders
-            orders = Order.query.filter_by(user_id=current_user_id, deleted_at=None).all()
+            query = query.filter(Order.user_id == current_user_id)
 
-        # Enhance orders with additional data
-        enhanced_orders = []
-        for order in orders:
-            # Get order items with product details and artisan info
-            order_items = db.session.query(OrderItem, Product, User).join(
+        try:
+            orders, next_cursor = paginate_keyset(
+                query, Order.placed_at, Order.id,
+                cursor=request.args.get('cursor'),
+                limit=get_page_size(request.args)
+            )
+        except ValueError as e:
+            return {'error': str(e)}, 400
+
+        order_ids = [order.id for order in orders]
+        buyer_ids = {order.user_id for order in orders if order.user_id}
+
+        buyers = {}
+        if buyer_ids:
+            buyers = {u.id: u for u in User.query.filter(User.id.in_(buyer_ids)).all()}
+
+        items_by_order = {order_id: [] for order_id in order_ids}
+        if order_ids:
+            Artisan = aliased(User)
+            items_query = db.session.query(OrderItem, Product, Artisan).outerjoin(
                 Product, OrderItem.product_id == Product.id
-            ).join(
-                User, OrderItem.artisan_id == User.id, isouter=True
-            ).filter(OrderItem.order_id == order.id, OrderItem.deleted_at.is_(None)).all()
+            ).outerjoin(
+                Artisan, OrderItem.artisan_id == Artisan.id
+            ).filter(OrderItem.order_id.in_(order_ids))
+            for item, product, artisan in items_query.order_by(OrderItem.id).all():
+                items_by_order[item.order_id].append((item, product, artisan))
 
-            # Get user details for the order
-            user = User.query.get(order.user_id) if order.user_id else None
+        enhanced_orders = []
+        for order in orders:
+            order_items = items_by_order[order.id]
+            user = buyers.get(order.user_id)
 
             # Get first product and artisan for display
             first_item = order_items[0] if order_items else (None, None, None)
-            first_product = first_item[1] if first_item else None
-            first_artisan = first_item[2] if first_item else None
-            
-            enhanced_order = {
-                'id': order.id,
-                'user_id': order.user_id,
-                'user_name': user.full_name if user else 'Unknown User',
-                'user_email': user.email if user else '',
-                'status': order.status.value if order.status else 'pending',
-                'total_amount': float(order.total_amount) if order.total_amount else 0,
-                'created_at': order.created_at.isoformat() if order.created_at else None,
-                'updated_at': order.updated_at.isoformat() if order.updated_at else None,
+            first_product = first_item[1]
+            first_artisan = first_item[2]
+
+            enhanced_orders.append(OrderSummary(
+                id=order.id,
+                user_id=order.user_id,
+                user_name=user.full_name if user else 'Unknown User',
+                user_email=user.email if user else '',
+                status=order.status.value if order.status else 'pending',
+                total_amount=float(order.total_amount) if order.total_amount else 0,
+                created_at=order.placed_at.isoformat() if order.placed_at else None,
+                updated_at=order.updated_at.isoformat() if order.updated_at else None,
                 # Add fields expected by frontend
-                'title': first_product.title if first_product else 'Order',
-                'product': first_product.title if first_product else 'Multiple Items',
-                'artisan_name': first_artisan.full_name if first_artisan else 'Various Artisans',
-                'image': first_product.image if first_product else None,
-                'product_id': first_product.id if first_product else None,
-                'artisan_id': first_item[0].artisan_id if first_item and first_item[0] else None,
-                'items': [{
-                    'product_id': item.product_id,
-                    'product_title': product.title if product else 'Unknown Product',
-                    'quantity': item.quantity,
-                    'unit_price': float(item.unit_price) if item.unit_price else 0,
-                    'total_price': float(item.total_price) if item.total_price else 0,
-                    'artisan_id': item.artisan_id
-                } for item, product, artisan in order_items]
-            }
-            enhanced_orders.append(enhanced_order)
+                title=first_product.title if first_product else 'Order',
+                product=first_product.title if first_product else 'Multiple Items',
+                artisan_name=first_artisan.full_name if first_artisan else 'Various Artisans',
+                image=first_product.image if first_product else None,
+                product_id=first_product.id if first_product else None,
+                artisan_id=first_item[0].artisan_id if first_item[0] else None,
+                items=[OrderLine(
+                    product_id=item.product_id,
+                    product_title=product.title if product else 'Unknown Product',
+                    quantity=item.quantity,
+                    unit_price=float(item.unit_price) if item.unit_price else 0,
+                    total_price=float(item.total_price) if item.total_price else 0,
+                    artisan_id=item.artisan_id
+                ) for item, product, artisan in order_items]
+            ))
 
-        return enhanced_orders
+        return {
+            'orders': enhanced_orders,
+            'next_cursor': next_cursor,
+            'has_more': next_cursor is not None
+        }
     
     @require_auth
     def post(self):
@@ -110,6 +143,48 @@ class OrderListResource(Resource):
             }
         }, 201
 
+class CheckoutResource(Resource):
+    @require_auth
+    def post(self):
+        """
+        Place an order for the contents of the current user's cart
+
+        Prices and totals are computed server-side, stock is reserved and the
+        cart is emptied in the same transaction (see checkout_service).
+        """
+        from flask import session
+        data = request.get_json(silent=True) or {}
+
+        try:
+            order = checkout_cart(
+                session.get('user_id'),
+                shipping_address=data.get('shipping_address'),
+                billing_address=data.get('billing_address')
+            )
+        except CheckoutError as e:
+            return {'error': str(e), 'products': e.products}, e.status_code
+        except Exception as e:
+            return {'error': 'Failed to place order'}, 500
+
+        return {
+            'message': 'Order placed successfully',
+            'order': {
+                'id': order.id,
+                'user_id': order.user_id,
+                'status': order.status.value,
+                'total_amount': float(order.total_amount),
+                'currency': order.currency,
+                'items': [{
+                    'id': item.id,
+                    'product_id': item.product_id,
+                    'artisan_id': item.artisan_id,
+                    'quantity': item.quantity,
+                    'unit_price': float(item.unit_price),
+                    'total_price': float(item.total_price)
+                } for item in order.order_items]
+            }
+        }, 201
+
 class OrderResource(Resource):
     @require_ownership_or_role('user_id', 'admin')
     def get(self, order_id):
@@ -135,9 +210,13 @@ class OrderResource(Resource):
                 return {'error': 'No data provided'}, 400
             
             from flask import session
+            cache_tags = set()
             # Update allowed fields
             if 'status' in data:
                 order.status = OrderStatus(data['status'])
+                sync_order_metrics(order)
+                if order.status == OrderStatus.cancelled:
+                    cache_tags = release_order_stock(order)
             if 'total_amount' in data:
                 order.total_amount = data['total_amount']
             if 'user_id' in data and session.get('user_role') == 'admin':
@@ -147,6 +226,7 @@ class OrderResource(Resource):
         except Exception as e:
             db.session.rollback()
             return {'error': 'Failed to update order'}, 500
+        response_cache.invalidate(*cache_tags)
         
         return {
             'message': 'Order updated successfully',
@@ -331,10 +411,13 @@ class OrderStatusResource(Resource):
                 return {'error': 'Status is required'}, 400
             
             order.status = OrderStatus(data['status'])
+            sync_order_metrics(order)
+            cache_tags = release_order_stock(order) if order.status == OrderStatus.cancelled else set()
             db.session.commit()
         except Exception as e:
             db.session.rollback()
             return {'error': 'Failed to update order status'}, 500
+        response_cache.invalidate(*cache_tags)
         
         return {
             'message': 'Order status updated successfully',
@@ -346,6 +429,7 @@ class OrderStatusResource(Resource):
 
 # Register routes
 order_api.add_resource(OrderListResource, '/')
+order_api.add_resource(CheckoutResource, '/checkout')
 order_api.add_resource(OrderResource, '/<order_id>')
 order_api.add_resource(OrderStatusResource, '/<order_id>/status')
 order_api.add_resource(OrderItemListResource, '/items/')
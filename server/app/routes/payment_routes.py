@@ -3,14 +3,19 @@ Payment routes for Soko Safi
 Handles CRUD operations for payments and M-Pesa integration
 """
 
-from flask_restful import Resource, Api
-from flask import Blueprint, request, jsonify
+from flask_restful import Resource
+from flask import Blueprint, request, jsonify, current_app
 from app.models import db, Payment, PaymentMethod, PaymentStatus, Order, OrderItem, User, ArtisanDisbursement
 from app.auth import require_auth, require_role, require_ownership_or_role
 from app.services.mpesa_service import mpesa_service
+from app.services.callback_inbox import record_callback
+from app.services.metrics_service import sync_order_metrics
+from app.services.checkout_service import reserve_order_stock, CheckoutError
+from app.services.response_cache import response_cache
+from app.utils.serialization import create_api
 
 payment_bp = Blueprint('payment_bp', __name__)
-payment_api = Api(payment_bp)
+payment_api = create_api(payment_bp)
 
 class PaymentListResource(Resource):
     @require_auth
@@ -135,6 +140,10 @@ class PaymentResource(Resource):
                 payment.amount = data['amount']
             if 'mpesa_transaction_id' in data:
                 payment.mpesa_transaction_id = data['mpesa_transaction_id']
+            if 'status' in data:
+                order = db.session.get(Order, payment.order_id)
+                if order:
+                    sync_order_metrics(order)
             
             db.session.commit()
         except Exception as e:
@@ -198,6 +207,12 @@ class InitiatePaymentResource(Resource):
             # Calculate order total
             total_amount = sum(float(item.total_price) for item in order.order_items)
 
+            # Hold the stock again if a failed payment released it
+            try:
+                cache_tags = reserve_order_stock(order)
+            except CheckoutError as e:
+                return {'error': str(e), 'products': e.products}, e.status_code
+
             # Create payment record
             payment = Payment(
                 order_id=order_id,
@@ -208,6 +223,7 @@ class InitiatePaymentResource(Resource):
             )
             db.session.add(payment)
             db.session.commit()
+            response_cache.invalidate(*cache_tags)
 
             # Initiate STK Push
             result = mpesa_service.initiate_stk_push(
@@ -283,13 +299,20 @@ class PaymentStatusResource(Resource):
             return {'error': f'Failed to get payment status: {str(e)}'}, 500
 
 
+def _callback_payload():
+    payload = request.get_json(silent=True)
+    return payload if isinstance(payload, dict) else None
+
+
 class PaymentCallbackResource(Resource):
     def post(self):
-        """Handle M-Pesa STK Push callback"""
+        """Handle M-Pesa STK Push callback (stored for the workers; duplicates are dropped)"""
         try:
-            callback_data = request.json
-            mpesa_service.process_stk_callback(callback_data)
-            return {'message': 'Callback processed successfully'}, 200
+            callback_data = _callback_payload()
+            if callback_data is None:
+                return {'error': 'Invalid callback payload'}, 400
+            record_callback('stk', callback_data)
+            return {'message': 'Callback received'}, 200
         except Exception as e:
             current_app.logger.error(f"Callback processing error: {str(e)}")
             return {'error': 'Callback processing failed'}, 500
@@ -297,11 +320,13 @@ class PaymentCallbackResource(Resource):
 
 class B2CResultResource(Resource):
     def post(self):
-        """Handle M-Pesa B2C result callback"""
+        """Handle M-Pesa B2C result callback (stored for the workers; duplicates are dropped)"""
         try:
-            result_data = request.json
-            mpesa_service.process_b2c_result(result_data)
-            return {'message': 'B2C result processed successfully'}, 200
+            result_data = _callback_payload()
+            if result_data is None:
+                return {'error': 'Invalid callback payload'}, 400
+            record_callback('b2c_result', result_data)
+            return {'message': 'B2C result received'}, 200
         except Exception as e:
             current_app.logger.error(f"B2C result processing error: {str(e)}")
             return {'error': 'B2C result processing failed'}, 500
@@ -309,18 +334,12 @@ class B2CResultResource(Resource):
 
 class B2CTimeoutResource(Resource):
     def post(self):
-        """Handle M-Pesa B2C timeout"""
+        """Handle M-Pesa B2C timeout (stored for the workers, which resend the same attempt)"""
         try:
-            timeout_data = request.json
-            # Handle timeout - mark as failed and retry
-            conversation_id = timeout_data.get('Result', {}).get('ConversationId')
-            if conversation_id:
-                # Find disbursement and mark for retry
-                disbursement = ArtisanDisbursement.query.filter_by(mpesa_transaction_id=conversation_id).first()
-                if disbursement:
-                    disbursement.status = DisbursementStatus.retry
-                    disbursement.failure_reason = 'B2C Timeout'
-                    db.session.commit()
+            timeout_data = _callback_payload()
+            if timeout_data is None:
+                return {'error': 'Invalid callback payload'}, 400
+            record_callback('b2c_timeout', timeout_data)
 
             return {'message': 'B2C timeout handled'}, 200
         except Exception as e:
@@ -1,29 +1,82 @@
-from flask_restful import Resource, Api
-from flask import Blueprint, request, session
-from app.models.product import Product
+from flask_restful import Resource
+from flask import Blueprint, current_app, request, session
+from app.models.product import Product, DEFAULT_CURRENCY
 from app.models import db
 from app.auth import require_auth, require_role
+from app.utils.pagination import paginate_keyset, get_page_size
+from app.services.search_service import product_search
+from app.services.rating_service import get_product_ratings, get_product_rating, empty_summary
+from app.services.metrics_service import adjust_product_count
+from app.services.response_cache import response_cache
+from app.utils.serialization import create_api
+from app.schemas import ProductSummary
 
 product_bp = Blueprint('product_bp', __name__)
-product_api = Api(product_bp)
+product_api = create_api(product_bp)
 
 class ProductListResource(Resource):
     def get(self):
+        """
+        List active products newest-first with keyset pagination
+
+        Query args: limit, cursor, category_id, subcategory_id, artisan_id,
+        min_price, max_price, in_stock
+        """
         try:
-            products = Product.query.filter_by(status='active').all()
-            return [{
-                'id': p.id,
-                'title': p.title,
-                'price': p.price,
-                'description': p.description,
-                'image_url': p.image_url,
-                'stock': p.stock,
-                'currency': p.currency,
-                'status': p.status,
-                'artisan_id': p.artisan_id
-            } for p in products]
+            args = request.args
+            query = Product.query.filter(Product.status == 'active')
+
+            if args.get('category_id'):
+                query = query.filter(Product.category_id == args['category_id'])
+            if args.get('subcategory_id'):
+                query = query.filter(Product.subcategory_id == args['subcategory_id'])
+            if args.get('artisan_id'):
+                query = query.filter(Product.artisan_id == args['artisan_id'])
+
+            min_price = args.get('min_price', type=float)
+            max_price = args.get('max_price', type=float)
+            if min_price is not None:
+                query = query.filter(Product.price >= min_price)
+            if max_price is not None:
+                query = query.filter(Product.price <= max_price)
+            if args.get('in_stock', '').lower() in ('1', 'true', 'yes'):
+                query = query.filter(Product.stock > 0)
+
+            products, next_cursor = paginate_keyset(
+                query, Product.created_at, Product.id,
+                cursor=args.get('cursor'),
+                limit=get_page_size(args)
+            )
+        except ValueError as e:
+            return {'error': str(e)}, 400
         except Exception as e:
-            return []
+            db.session.rollback()
+            current_app.logger.error(f"Failed to list products: {str(e)}")
+            return {'error': 'Failed to load products'}, 500
+
+        ratings = get_product_ratings(p.id for p in products)
+        no_rating = empty_summary()
+
+        return {
+            'products': [ProductSummary(
+                id=p.id,
+                title=p.title,
+                price=p.price,
+                description=p.description,
+                image_url=p.image_url,
+                stock=p.stock,
+                currency=p.currency,
+                status=p.status,
+                artisan_id=p.artisan_id,
+                category_id=p.category_id,
+                subcategory_id=p.subcategory_id,
+                rating=ratings.get(p.id, no_rating)['average'],
+                review_count=ratings.get(p.id, no_rating)['count'],
+                created_at=p.created_at.isoformat() if p.created_at else None
+            ) for p in products],
+            'next_cursor': next_cursor,
+            'has_more': next_cursor is not None
+        }
     
     @require_role('artisan')
     def post(self):
@@ -48,11 +101,14 @@ class ProductListResource(Resource):
                 image_url=data.get('image', data.get('image_url', '')),
                 artisan_id=session.get('user_id'),
                 stock=int(data.get('stock', 10)),
-                currency=data.get('currency', 'KSH')
+                currency=data.get('currency', DEFAULT_CURRENCY)
             )
             
             db.session.add(product)
+            product_search.index_product(product)
+            adjust_product_count(product.artisan_id, 1)
             db.session.commit()
+            response_cache.invalidate(f'artisan-products:{product.artisan_id}')
 
             return {
                 'message': 'Product created successfully',
@@ -69,7 +125,61 @@ class ProductListResource(Resource):
             db.session.rollback()
             return {'error': f'Failed to create product: {str(e)}'}, 500
 
+class ProductSearchResource(Resource):
+    def get(self):
+        """
+        Ranked full-text search over title, description, category and artisan name
+
+        Query args: q (required), limit, page, category_id
+        """
+        q = request.args.get('q', '').strip()
+        if not q:
+            return {'error': 'q is required'}, 400
+
+        limit = get_page_size(request.args)
+        page = max(request.args.get('page', 1, type=int), 1)
+
+        try:
+            # One extra hit tells whether another page follows
+            hits = product_search.search(
+                q, limit=limit + 1, offset=(page - 1) * limit,
+                category_id=request.args.get('category_id') or None
+            )
+            has_more = len(hits) > limit
+            ranks = dict(hits[:limit])
+            products = Product.query.filter(
+                Product.id.in_(ranks.keys()),
+                Product.status == 'active'
+            ).all() if ranks else []
+        except Exception as e:
+            db.session.rollback()
+            return {'error': 'Search failed'}, 500
+
+        products.sort(key=lambda p: ranks[p.id], reverse=True)
+        return {
+            'query': q,
+            'page': page,
+            'per_page': limit,
+            'has_more': has_more,
+            'results': [{
+                'id': p.id,
+                'title': p.title,
+                'price': p.price,
+                'description': p.description,
+                'image_url': p.image_url,
+                'stock': p.stock,
+                'currency': p.currency,
+                'status': p.status,
+                'artisan_id': p.artisan_id,
+                'category_id': p.category_id,
+                'rank': round(ranks[p.id], 4)
+            } for p in products]
+        }
+
 class ProductResource(Resource):
+    @response_cache.cached(lambda data, product_id: [
+        f'product:{product_id}', f'reviews:{product_id}', f"user:{data.get('artisan_id')}"
+    ])
     def get(self, product_id):
         try:
             product = Product.query.get(product_id)
@@ -99,7 +209,9 @@ class ProductResource(Resource):
                 'image_url': product.image_url,
                 'status': product.status,
                 'artisan_id': product.artisan_id,
-                'artisan': artisan_data
+                'category_id': product.category_id,
+                'artisan': artisan_data,
+                'rating': get_product_rating(product.id)
             }
         except Exception:
             return {'error': 'Product not found'}, 404
@@ -123,7 +235,9 @@ class ProductResource(Resource):
             if 'image_url' in data:
                 product.image_url = data['image_url']
             
+            product_search.index_product(product)
             db.session.commit()
+            response_cache.invalidate(f'product:{product.id}', f'artisan-products:{product.artisan_id}')
             return {'message': 'Product updated successfully'}, 200
         except Exception:
             db.session.rollback()
@@ -136,28 +250,51 @@ class ProductResource(Resource):
             if not product:
                 return {'error': 'Product not found'}, 404
             
+            if product.status == 'active':
+                adjust_product_count(product.artisan_id, -1)
             product.status = 'deleted'
+            product_search.remove_product(product.id)
             db.session.commit()
+            response_cache.invalidate(f'product:{product.id}', f'artisan-products:{product.artisan_id}')
             return {'message': 'Product deleted successfully'}, 200
         except Exception:
             db.session.rollback()
             return {'error': 'Failed to delete product'}, 500
 
 class ProductReviewsResource(Resource):
+    @response_cache.cached(lambda data, product_id: [f'reviews:{product_id}'])
     def get(self, product_id):
-        """Get reviews for a specific product - Public access"""
+        """
+        Get reviews for a specific product newest-first - Public access
+
+        Query args: limit, cursor. The rating summary comes from the
+        maintained aggregate rather than the review rows.
+        """
         try:
             from app.models.review import Review
             from app.models.user import User
             
             # Get reviews for this product with user information
-            reviews = db.session.query(Review, User).join(
+            query = db.session.query(Review, User).join(
                 User, Review.user_id == User.id
             ).filter(
                 Review.product_id == product_id
-            ).order_by(Review.created_at.desc()).all()
-            
-            return [{
+            )
+            reviews, next_cursor = paginate_keyset(
+                query, Review.created_at, Review.id,
+                cursor=request.args.get('cursor'),
+                limit=get_page_size(request.args),
+                sort_key=lambda row: (row.Review.created_at, row.Review.id)
+            )
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.error(f"Failed to load reviews for product {product_id}: {str(e)}")
+            return {'error': 'Failed to load reviews'}, 500
+        
+        return {
+            'reviews': [{
                 'id': review.Review.id,
                 'rating': review.Review.rating,
                 'title': review.Review.title,
@@ -170,10 +307,13 @@ class ProductReviewsResource(Resource):
                 'user_profile_picture_url': review.User.profile_picture_url,
                 'verified': True,  # Default to verified for now
                 'helpful': 0  # Default helpful count
-            } for review in reviews], 200
-        except Exception as e:
-            return [], 200
+            } for review in reviews],
+            'rating': get_product_rating(product_id),
+            'next_cursor': next_cursor,
+            'has_more': next_cursor is not None
+        }, 200
 
 product_api.add_resource(ProductListResource, '/')
+product_api.add_resource(ProductSearchResource, '/search')
 product_api.add_resource(ProductResource, '/<product_id>')
 product_api.add_resource(ProductReviewsResource, '/<product_id>/reviews')
\ No newline at end of file
@@ -3,14 +3,17 @@ Review routes for Soko Safi
 Handles CRUD operations for reviews
 """
 
-from flask_restful import Resource, Api
-from flask import Blueprint, request
+from flask_restful import Resource
+from flask import Blueprint, request, session
 from app.models import db, Review
 from app.models.user import User
 from app.auth import require_auth, require_role, require_ownership_or_role
+from app.services.rating_service import valid_rating, record_review, update_review, remove_review
+from app.services.response_cache import response_cache
+from app.utils.serialization import create_api
 
 review_bp = Blueprint('review_bp', __name__)
-review_api = Api(review_bp)
+review_api = create_api(review_bp)
 
 class ReviewListResource(Resource):
     def get(self):
@@ -31,8 +34,10 @@ class ReviewListResource(Resource):
     @require_auth
     def post(self):
         """Create new review - Authenticated users only"""
-        from flask import session
-        data = request.json
+        data = request.json or {}
+        
+        if valid_rating(data.get('rating')) is None:
+            return {'error': 'rating must be a whole number from 1 to 5'}, 400
         
         # Set user_id to current user if not admin
         if session.get('user_role') != 'admin':
@@ -41,13 +46,15 @@ class ReviewListResource(Resource):
         new_review = {
             'product_id': data.get('product_id'),
             'user_id': data.get('user_id'),
-            'rating': data.get('rating'),
+            'rating': valid_rating(data.get('rating')),
             'body': data.get('comment')
         }
         
         review = Review(**new_review)
         db.session.add(review)
+        record_review(review)
         db.session.commit()
+        response_cache.invalidate(f'reviews:{review.product_id}')
         
         return {
             'message': 'Review created successfully',
@@ -84,10 +91,13 @@ class ReviewResource(Resource):
     def put(self, review_id):
         """Update review - Owner or Admin only"""
         review = Review.query.get_or_404(review_id)
-        data = request.json
+        data = request.json or {}
+        old_product_id, old_rating = review.product_id, review.rating
         
         if 'rating' in data:
-            review.rating = data['rating']
+            if valid_rating(data['rating']) is None:
+                return {'error': 'rating must be a whole number from 1 to 5'}, 400
+            review.rating = valid_rating(data['rating'])
         if 'comment' in data:
             review.body = data['comment']
         if 'user_id' in data and session.get('user_role') == 'admin':
@@ -95,7 +105,9 @@ class ReviewResource(Resource):
         if 'product_id' in data and session.get('user_role') == 'admin':
             review.product_id = data['product_id']
         
+        update_review(review, old_product_id, old_rating)
         db.session.commit()
+        response_cache.invalidate(f'reviews:{old_product_id}', f'reviews:{review.product_id}')
         
         return {
             'message': 'Review updated successfully',
@@ -112,8 +124,10 @@ class ReviewResource(Resource):
     def delete(self, review_id):
         """Delete review - Owner or Admin only"""
         review = Review.query.get_or_404(review_id)
+        remove_review(review)
         db.session.delete(review)
         db.session.commit()
+        response_cache.invalidate(f'reviews:{review.product_id}')
         
         return {'message': 'Review deleted successfully'}, 200
 
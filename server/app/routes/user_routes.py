@@ -3,13 +3,15 @@ User routes for Soko Safi
 Handles user CRUD operations and artisan payment methods
 """
 
-from flask_restful import Resource, Api
+from flask_restful import Resource
 from flask import Blueprint, request
 from app.models import db, User, UserRole, PaymentMethod
 from app.auth import require_auth, require_role, require_ownership_or_role
+from app.services.response_cache import response_cache
+from app.utils.serialization import create_api
 
 user_bp = Blueprint('user_bp', __name__)
-user_api = Api(user_bp)
+user_api = create_api(user_bp)
 
 class UserListResource(Resource):
     @require_role('admin')
@@ -118,6 +120,7 @@ class UserResource(Resource):
                     user.paybill_account = data['paybill_account']
 
             db.session.commit()
+            response_cache.invalidate(f'user:{user.id}')
         except Exception as e:
             db.session.rollback()
             return {'error': 'Failed to update user'}, 500
@@ -144,6 +147,7 @@ class UserResource(Resource):
             from datetime import datetime
             user.deleted_at = datetime.utcnow()
             db.session.commit()
+            response_cache.invalidate(f'user:{user.id}')
         except Exception as e:
             db.session.rollback()
             return {'error': 'Failed to delete user'}, 500
@@ -0,0 +1,100 @@
+"""
+Typed response schemas for Soko Safi
+msgspec Structs for the high-volume listing payloads (products, orders,
+conversations, messages, notifications). Structs are cheaper to build than
+dicts and are encoded directly by the API's msgspec representation, producing
+the same JSON keys the handlers returned before.
+"""
+
+from typing import List, Optional
+import msgspec
+
+
+class ProductSummary(msgspec.Struct):
+    """One entry of the public product catalog"""
+    id: str
+    title: str
+    price: float
+    description: Optional[str]
+    image_url: Optional[str]
+    stock: Optional[int]
+    currency: Optional[str]
+    status: Optional[str]
+    artisan_id: Optional[str]
+    category_id: Optional[str]
+    subcategory_id: Optional[str]
+    rating: float
+    review_count: int
+    created_at: Optional[str]
+
+
+class OrderLine(msgspec.Struct):
+    product_id: Optional[str]
+    product_title: str
+    quantity: Optional[int]
+    unit_price: float
+    total_price: float
+    artisan_id: Optional[str]
+
+
+class OrderSummary(msgspec.Struct):
+    """An order with its buyer and line items, as shown in order lists"""
+    id: str
+    user_id: Optional[str]
+    user_name: str
+    user_email: str
+    status: str
+    total_amount: float
+    created_at: Optional[str]
+    updated_at: Optional[str]
+    title: str
+    product: str
+    artisan_name: str
+    image: Optional[str]
+    product_id: Optional[str]
+    artisan_id: Optional[str]
+    items: List[OrderLine]
+
+
+class ConversationPartner(msgspec.Struct):
+    id: str
+    name: str
+    avatar: Optional[str]
+    profile_picture_url: Optional[str]
+    online: bool = False
+
+
+class ConversationSummary(msgspec.Struct):
+    """One row of a user's inbox"""
+    id: str
+    artisan: ConversationPartner
+    last_message: Optional[str] = msgspec.field(name='lastMessage')
+    last_message_time: str = msgspec.field(name='lastMessageTime')
+    timestamp: str
+    created_at: str
+    unread: int
+
+
+class ThreadMessage(msgspec.Struct):
+    """One message in a conversation thread"""
+    id: str
+    sender: str
+    text: Optional[str]
+    time: str
+    timestamp: str
+    created_at: str
+    attachment_url: Optional[str]
+    status: str
+    is_read: bool
+    message_type: str = 'text'
+    attachment_name: Optional[str] = None
+
+
+class NotificationItem(msgspec.Struct):
+    id: str
+    user_id: Optional[str]
+    type: Optional[str]
+    title: Optional[str]
+    message: Optional[str]
+    is_read: Optional[bool]
+    created_at: Optional[str]
@@ -0,0 +1,165 @@
+"""
+Artisan profile cache for Soko Safi
+Resolves artisan display profiles (name, avatar) for products without a query
+per product
+
+Lookups go through three layers:
+- a request-scoped identity map on `flask.g`, so a request never resolves the
+  same artisan twice
+- a process-level LRU with a TTL, shared by all requests in the worker
+- one `IN` query for whatever is still missing
+
+Updates to a user's name or avatar evict the entry in this process once the
+transaction commits; other workers pick the change up when their TTL lapses.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from flask import g, has_app_context
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, object_session
+from app.models import db, User
+
+UNKNOWN_ARTISAN = 'Unknown Artisan'
+_PROFILE_FIELDS = ('full_name', 'profile_picture_url')
+_PENDING_KEY = 'artisan_profiles_dirty'
+
+
+class ArtisanProfileCache:
+    def __init__(self, maxsize=2048, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._listening = False
+
+    def init_app(self, app):
+        """Read cache settings and register the User invalidation hooks (once per process)"""
+        self.maxsize = app.config.get('ARTISAN_PROFILE_CACHE_SIZE', self.maxsize)
+        self.ttl = app.config.get('ARTISAN_PROFILE_CACHE_TTL', self.ttl)
+        if self._listening:
+            return
+        event.listen(User, 'after_update', self._on_user_updated)
+        event.listen(User, 'after_delete', self._on_user_deleted)
+        event.listen(Session, 'after_commit', self._on_commit)
+        event.listen(Session, 'after_rollback', self._on_rollback)
+        self._listening = True
+
+    def get(self, artisan_id):
+        """
+        Get one artisan's display profile
+
+        Returns:
+            dict: {'id', 'name', 'avatar'}, or None if the user doesn't exist
+        """
+        if not artisan_id:
+            return None
+        return self.get_many([artisan_id]).get(artisan_id)
+
+    def get_many(self, artisan_ids):
+        """
+        Bulk-resolve display profiles, querying only for ids not already cached
+
+        Args:
+            artisan_ids (iterable): Artisan ids; None and duplicates are ignored
+
+        Returns:
+            dict: artisan_id -> profile for every id that exists
+        """
+        wanted = {artisan_id for artisan_id in artisan_ids if artisan_id}
+        if not wanted:
+            return {}
+
+        request_map = self._request_map()
+        found = {artisan_id: request_map[artisan_id] for artisan_id in wanted if artisan_id in request_map}
+        missing = wanted - found.keys()
+
+        if missing:
+            now = time.monotonic()
+            with self._lock:
+                for artisan_id in list(missing):
+                    entry = self._entries.get(artisan_id)
+                    if entry and entry[1] > now:
+                        self._entries.move_to_end(artisan_id)
+                        found[artisan_id] = entry[0]
+                        missing.discard(artisan_id)
+
+        if missing:
+            rows = db.session.query(User.id, User.full_name, User.profile_picture_url).filter(
+                User.id.in_(missing)
+            ).all()
+            loaded = {row.id: _profile(row) for row in rows}
+            self._store(loaded)
+            found.update(loaded)
+
+        request_map.update(found)
+        return found
+
+    def name_for(self, artisan_id, default=UNKNOWN_ARTISAN):
+        """Display name for an artisan id"""
+        profile = self.get(artisan_id)
+        return profile['name'] if profile and profile['name'] else default
+
+    def invalidate(self, *artisan_ids):
+        with self._lock:
+            for artisan_id in artisan_ids:
+                self._entries.pop(artisan_id, None)
+        request_map = self._request_map()
+        for artisan_id in artisan_ids:
+            request_map.pop(artisan_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _store(self, profiles):
+        expires_at = time.monotonic() + self.ttl
+        with self._lock:
+            for artisan_id, profile in profiles.items():
+                self._entries[artisan_id] = (profile, expires_at)
+                self._entries.move_to_end(artisan_id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def _request_map(self):
+        if not has_app_context():
+            return {}
+        if not hasattr(g, '_artisan_profiles'):
+            g._artisan_profiles = {}
+        return g._artisan_profiles
+
+    def _on_user_updated(self, mapper, connection, target):
+        state = inspect(target)
+        if any(state.attrs[field].history.has_changes() for field in _PROFILE_FIELDS):
+            self._mark_changed(target)
+
+    def _on_user_deleted(self, mapper, connection, target):
+        self._mark_changed(target)
+
+    def _mark_changed(self, target):
+        # Evict after commit so a concurrent reader can't re-cache the old row
+        session = object_session(target)
+        if session is not None:
+            session.info.setdefault(_PENDING_KEY, set()).add(target.id)
+        self._request_map().pop(target.id, None)
+
+    def _on_commit(self, session):
+        pending = session.info.pop(_PENDING_KEY, None)
+        if pending:
+            self.invalidate(*pending)
+
+    def _on_rollback(self, session):
+        session.info.pop(_PENDING_KEY, None)
+
+
+def _profile(row):
+    return {
+        'id': row.id,
+        'name': row.full_name,
+        'avatar': row.profile_picture_url,
+    }
+
+
+# Global service instance
+artisan_profiles = ArtisanProfileCache()
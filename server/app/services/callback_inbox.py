@@ -0,0 +1,134 @@
+"""
+M-Pesa callback inbox for Soko Safi
+Separates receiving Safaricom's callbacks from processing them
+
+The callback endpoints only append the raw body to mpesa_callbacks and return
+200. Each row is keyed by its kind plus the CheckoutRequestID or ConversationID,
+so a redelivered callback costs one rejected insert and is never processed
+twice. The disbursement workers process the inbox in arrival order, claiming
+rows with the same lease pattern as disbursements. A callback whose processing
+fails is retried when its lease expires, up to CALLBACK_MAX_ATTEMPTS times,
+then left unprocessed with its last_error for inspection.
+"""
+
+import hashlib
+import json
+import uuid
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import func, or_
+from sqlalchemy.exc import IntegrityError
+from app.models import db, MpesaCallback
+from app.services.mpesa_service import mpesa_service
+
+HANDLERS = {
+    'stk': mpesa_service.process_stk_callback,
+    'b2c_result': mpesa_service.process_b2c_result,
+    'b2c_timeout': mpesa_service.process_b2c_timeout,
+}
+
+
+def callback_key(kind, payload):
+    """The inbox dedupe key: kind plus the transaction id Safaricom redelivers with"""
+    if kind == 'stk':
+        reference = payload.get('Body', {}).get('stkCallback', {}).get('CheckoutRequestID')
+    else:
+        result = payload.get('Result', {})
+        reference = (result.get('ConversationID') or result.get('ConversationId')
+                     or result.get('OriginatorConversationID'))
+    if not reference:
+        # Unidentifiable bodies are only deduplicated when byte-identical
+        reference = hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+    return f'{kind}:{reference}'
+
+
+def record_callback(kind, payload):
+    """
+    Append a callback to the inbox
+
+    Returns:
+        bool: True if recorded, False if it was a redelivery
+    """
+    db.session.add(MpesaCallback(kind=kind, dedupe_key=callback_key(kind, payload), payload=json.dumps(payload)))
+    try:
+        db.session.commit()
+        return True
+    except IntegrityError:
+        db.session.rollback()
+        current_app.logger.info(f"Duplicate M-Pesa {kind} callback ignored")
+        return False
+
+
+def claim_callbacks(worker_id, limit, lease_seconds, max_attempts):
+    """
+    Lease up to `limit` of the oldest unprocessed callbacks, counting an attempt on each
+
+    Returns:
+        list: Claimed MpesaCallback rows
+    """
+    now = datetime.utcnow()
+    claimable = (
+        MpesaCallback.processed_at.is_(None),
+        MpesaCallback.attempts < max_attempts,
+        or_(MpesaCallback.locked_until.is_(None), MpesaCallback.locked_until < now)
+    )
+    candidates = [row.id for row in db.session.query(MpesaCallback.id).filter(
+        *claimable
+    ).order_by(MpesaCallback.received_at).limit(limit)]
+    if not candidates:
+        return []
+
+    token = f'{worker_id}:{uuid.uuid4().hex[:12]}'
+    MpesaCallback.query.filter(MpesaCallback.id.in_(candidates), *claimable).update({
+        MpesaCallback.locked_by: token,
+        MpesaCallback.locked_until: now + timedelta(seconds=lease_seconds),
+        MpesaCallback.attempts: MpesaCallback.attempts + 1
+    }, synchronize_session=False)
+    db.session.commit()
+
+    return MpesaCallback.query.filter_by(locked_by=token).order_by(MpesaCallback.received_at).all()
+
+
+def process_callbacks(worker_id, limit, lease_seconds, max_attempts):
+    """
+    Process a batch of inbox callbacks
+
+    Returns:
+        int: Number of callbacks claimed
+    """
+    callbacks = claim_callbacks(worker_id, limit, lease_seconds, max_attempts)
+    for callback in callbacks:
+        callback_id = callback.id
+        try:
+            HANDLERS[callback.kind](json.loads(callback.payload))
+            callback = db.session.get(MpesaCallback, callback_id)
+            callback.processed_at = datetime.utcnow()
+            callback.last_error = None
+            callback.locked_by = None
+            callback.locked_until = None
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            # Keep the lease so the retry waits for it to expire
+            MpesaCallback.query.filter_by(id=callback_id).update(
+                {MpesaCallback.last_error: str(e)}, synchronize_session=False
+            )
+            db.session.commit()
+            current_app.logger.error(f"M-Pesa callback {callback_id} failed: {str(e)}")
+    return len(callbacks)
+
+
+def inbox_metrics(max_attempts):
+    """Unprocessed callbacks, the oldest one's age, and callbacks that gave up"""
+    now = datetime.utcnow()
+    pending, oldest = db.session.query(
+        func.count(MpesaCallback.id), func.min(MpesaCallback.received_at)
+    ).filter(MpesaCallback.processed_at.is_(None), MpesaCallback.attempts < max_attempts).one()
+    failed = MpesaCallback.query.filter(
+        MpesaCallback.processed_at.is_(None), MpesaCallback.attempts >= max_attempts
+    ).count()
+    return {
+        'callbacks_pending': pending,
+        'oldest_callback_seconds': round((now - oldest).total_seconds(), 1) if oldest else 0,
+        'callbacks_failed': failed
+    }
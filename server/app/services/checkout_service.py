@@ -0,0 +1,226 @@
+"""
+Checkout service for Soko Safi
+Turns a buyer's cart into a pending order in one transaction
+
+The cart items and their products are read in one query, prices are taken
+from the products (not from the client or the cart), and the order commits
+together with everything it depends on:
+- the cart items are claimed by deleting them, so a checkout submitted twice
+  creates one order
+- stock is reserved for every product with one conditional UPDATE, which
+  fails as a whole if any product has too little stock left
+- the order items are inserted in one bulk INSERT
+A product with no stock figure (stock NULL) is treated as untracked.
+
+The order's currency is that of its products. `orders.stock_reserved` records
+whether the order currently holds its stock: cancelling the order or a failed
+STK payment releases it (release_order_stock), and paying the order again
+takes it back (reserve_order_stock). Each is a conditional UPDATE of the flag,
+so stock is only returned or taken once however many callers race.
+"""
+
+from collections import OrderedDict
+from decimal import Decimal
+from flask import current_app
+from sqlalchemy import and_, case, func, insert, or_
+from sqlalchemy.orm.attributes import set_committed_value
+from app.models import db, Cart, CartItem, Order, OrderItem, OrderStatus, Product
+from app.models.product import DEFAULT_CURRENCY
+from app.services.response_cache import response_cache
+
+CENTS = Decimal('0.01')
+
+
+class CheckoutError(Exception):
+    """A checkout the buyer can fix: empty cart, unavailable products, too little stock"""
+
+    def __init__(self, message, status_code=400, products=None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.products = products or []
+
+
+def get_user_cart(user_id):
+    """
+    The cart the cart routes and checkout use for a user: their oldest one, so
+    every lookup agrees when an admin has given them several. Carts are deleted
+    outright rather than soft-deleted, so there is no deleted_at to filter on.
+    """
+    return Cart.query.filter_by(user_id=user_id).order_by(Cart.created_at, Cart.id).first()
+
+
+def checkout_cart(user_id, shipping_address=None, billing_address=None):
+    """
+    Create a pending order from the user's cart, reserve its stock and empty the cart
+
+    Returns:
+        Order: The committed order, with its order_items
+
+    Raises:
+        CheckoutError: If the cart is empty or cannot be fulfilled
+    """
+    cart = get_user_cart(user_id)
+    rows = db.session.query(CartItem, Product).join(
+        Product, CartItem.product_id == Product.id
+    ).filter(CartItem.cart_id == cart.id).all() if cart else []
+    if not rows:
+        raise CheckoutError('Cart is empty')
+
+    # Merge repeated cart lines for the same product
+    lines = OrderedDict()
+    for cart_item, product in rows:
+        if not cart_item.quantity or cart_item.quantity <= 0:
+            continue
+        line = lines.setdefault(product.id, {'product': product, 'quantity': 0})
+        line['quantity'] += cart_item.quantity
+    if not lines:
+        raise CheckoutError('Cart is empty')
+
+    unavailable = [line['product'].id for line in lines.values()
+                   if line['product'].deleted_at or line['product'].status != 'active']
+    if unavailable:
+        raise CheckoutError('Some products are no longer available', 409, unavailable)
+
+    currencies = {line['product'].currency or DEFAULT_CURRENCY for line in lines.values()}
+    if len(currencies) > 1:
+        raise CheckoutError('Products priced in different currencies cannot be ordered together')
+    currency = currencies.pop()
+
+    # Product pages show stock
+    cache_tags = _cache_tags((product_id, line['product'].artisan_id) for product_id, line in lines.items())
+    quantities = {product_id: line['quantity'] for product_id, line in lines.items()}
+
+    try:
+        # Claim the cart lines; a concurrent checkout of the same cart claims none
+        cart_item_ids = [cart_item.id for cart_item, _ in rows]
+        claimed = CartItem.query.filter(CartItem.id.in_(cart_item_ids)).delete(synchronize_session=False)
+        if claimed != len(cart_item_ids):
+            raise CheckoutError('Cart changed during checkout, please try again', 409)
+
+        if not _reserve(quantities):
+            db.session.rollback()
+            raise CheckoutError('Not enough stock', 409, _short_products(quantities))
+
+        items = []
+        for product_id, line in lines.items():
+            unit_price = Decimal(str(line['product'].price)).quantize(CENTS)
+            items.append({
+                'product_id': product_id,
+                'artisan_id': line['product'].artisan_id,
+                'quantity': line['quantity'],
+                'unit_price': unit_price,
+                'total_price': unit_price * line['quantity']
+            })
+
+        order = Order(
+            user_id=user_id,
+            status=OrderStatus.pending,
+            total_amount=sum(item['total_price'] for item in items),
+            currency=currency,
+            shipping_address=shipping_address,
+            billing_address=billing_address,
+            stock_reserved=True
+        )
+        db.session.add(order)
+        db.session.flush()
+        db.session.execute(insert(OrderItem), [dict(item, order_id=order.id) for item in items])
+        db.session.commit()
+    except CheckoutError:
+        db.session.rollback()
+        raise
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Checkout failed for user {user_id}: {str(e)}")
+        raise
+
+    response_cache.invalidate(*cache_tags)
+    return order
+
+
+def release_order_stock(order):
+    """
+    Return an order's reserved quantities to its products' stock (inside the
+    caller's transaction). Does nothing if the order holds no stock.
+
+    Returns:
+        set: Response cache tags to invalidate once the caller commits
+    """
+    released = Order.query.filter(Order.id == order.id, Order.stock_reserved.is_(True)).update(
+        {Order.stock_reserved: False}, synchronize_session=False
+    )
+    set_committed_value(order, 'stock_reserved', False)
+    if not released:
+        return set()
+
+    quantities = _order_quantities(order.id)
+    if not quantities:
+        return set()
+    Product.query.filter(Product.id.in_(list(quantities)), Product.stock.isnot(None)).update({Product.stock: case(
+        {product_id: Product.stock + quantity for product_id, quantity in quantities.items()},
+        value=Product.id
+    )}, synchronize_session=False)
+    return _cache_tags(db.session.query(Product.id, Product.artisan_id).filter(Product.id.in_(list(quantities))))
+
+
+def reserve_order_stock(order):
+    """
+    Take an order's quantities out of its products' stock again, e.g. before
+    paying an order whose stock a failed payment released (inside the caller's
+    transaction). Does nothing if the order already holds its stock.
+
+    Returns:
+        set: Response cache tags to invalidate once the caller commits
+
+    Raises:
+        CheckoutError: If a product has too little stock left; the transaction
+            is rolled back
+    """
+    reserving = Order.query.filter(Order.id == order.id, Order.stock_reserved.is_(False)).update(
+        {Order.stock_reserved: True}, synchronize_session=False
+    )
+    if not reserving:
+        set_committed_value(order, 'stock_reserved', True)
+        return set()
+
+    quantities = _order_quantities(order.id)
+    if quantities and not _reserve(quantities):
+        db.session.rollback()
+        raise CheckoutError('Not enough stock', 409, _short_products(quantities))
+    set_committed_value(order, 'stock_reserved', True)
+    return _cache_tags(db.session.query(Product.id, Product.artisan_id).filter(Product.id.in_(list(quantities))))
+
+
+def _reserve(quantities):
+    """
+    Take product id -> quantity out of stock with one conditional UPDATE
+
+    Returns False if any product has too little stock left, in which case the
+    other products were still updated and the caller must roll back.
+    """
+    reserved = Product.query.filter(or_(*[
+        and_(Product.id == product_id, or_(Product.stock.is_(None), Product.stock >= quantity))
+        for product_id, quantity in quantities.items()
+    ])).update({Product.stock: case(
+        {product_id: Product.stock - quantity for product_id, quantity in quantities.items()},
+        value=Product.id
+    )}, synchronize_session=False)
+    return reserved == len(quantities)
+
+
+def _short_products(quantities):
+    return [product_id for product_id, stock in db.session.query(Product.id, Product.stock).filter(
+        Product.id.in_(list(quantities))
+    ) if stock is not None and stock < quantities[product_id]]
+
+
+def _order_quantities(order_id):
+    return dict(db.session.query(OrderItem.product_id, func.sum(OrderItem.quantity)).filter(
+        OrderItem.order_id == order_id, OrderItem.product_id.isnot(None)
+    ).group_by(OrderItem.product_id).all())
+
+
+def _cache_tags(products):
+    """Product pages show stock: tags for (product id, artisan id) pairs"""
+    return {tag for product_id, artisan_id in products for tag in (
+        f"product:{product_id}", f"artisan-products:{artisan_id}"
+    )}
@@ -0,0 +1,301 @@
+"""
+Conversation service for Soko Safi
+Maintains the materialized `conversations` table (one row per user pair with
+the last message, per-participant unread counters and read-receipt watermarks)
+and reads inboxes and message history from it
+"""
+
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from app.models import db, Message, Conversation, User
+from app.utils.pagination import paginate_keyset
+from app.schemas import ConversationSummary, ConversationPartner
+
+
+def avatar_url_for(user):
+    """Profile picture for a user, or a generated initials avatar"""
+    if user.profile_picture_url:
+        return user.profile_picture_url
+    return f'https://ui-avatars.com/api/?name={user.full_name or "User"}&background=6366f1&color=fff'
+
+
+def get_conversation(user_id, other_user_id):
+    """Look up the conversation between two users, or None"""
+    user_a_id, user_b_id = Conversation.participants(user_id, other_user_id)
+    return Conversation.query.filter_by(user_a_id=user_a_id, user_b_id=user_b_id).first()
+
+
+def get_or_create_conversation(user_id, other_user_id):
+    """
+    Get the conversation between two users, creating it if needed.
+    Concurrent creators race on the participants unique constraint; the
+    loser re-reads the winner's row.
+    """
+    conversation = get_conversation(user_id, other_user_id)
+    if conversation:
+        return conversation
+
+    user_a_id, user_b_id = Conversation.participants(user_id, other_user_id)
+    try:
+        with db.session.begin_nested():
+            conversation = Conversation(user_a_id=user_a_id, user_b_id=user_b_id)
+            db.session.add(conversation)
+    except IntegrityError:
+        conversation = get_conversation(user_id, other_user_id)
+    return conversation
+
+
+def record_message(message):
+    """
+    Attach a new message to its conversation and bump the denormalized
+    last-message and receiver unread counter. Runs inside the caller's
+    transaction so the message and summary commit together.
+    """
+    conversation = get_or_create_conversation(message.sender_id, message.receiver_id)
+    if message.created_at is None:
+        message.created_at = datetime.utcnow()
+    message.conversation_id = conversation.id
+    db.session.flush()
+
+    unread_column = 'user_a_unread' if message.receiver_id == conversation.user_a_id else 'user_b_unread'
+    Conversation.query.filter_by(id=conversation.id).update({
+        'last_message_id': message.id,
+        'last_message_text': message.message_text,
+        'last_activity_at': message.created_at,
+        unread_column: getattr(Conversation, unread_column) + 1,
+    }, synchronize_session=False)
+    return conversation
+
+
+def mark_conversation_read(conversation, reader_id, attempts=3):
+    """
+    Advance `reader_id`'s read-receipt watermark to the conversation's latest
+    message and zero their unread counter.
+
+    Both change in one conditional UPDATE that only applies while the latest
+    message is still the one being acknowledged, so a message arriving
+    concurrently keeps its place in the unread counter; the conversation is
+    then re-read and the acknowledgement retried. Idempotent: the watermark
+    only moves forward, and nothing is written when there is nothing new.
+    """
+    is_user_a = reader_id == conversation.user_a_id
+    watermark_column = 'user_a_last_read_at' if is_user_a else 'user_b_last_read_at'
+    unread_column = 'user_a_unread' if is_user_a else 'user_b_unread'
+    watermark = getattr(Conversation, watermark_column)
+    unread = getattr(Conversation, unread_column)
+
+    for _ in range(attempts):
+        read_up_to = conversation.last_activity_at
+        if read_up_to is None:
+            return False
+        current = getattr(conversation, watermark_column)
+        if current is not None and current >= read_up_to and not getattr(conversation, unread_column):
+            return False
+
+        updated = Conversation.query.filter(
+            Conversation.id == conversation.id,
+            Conversation.last_activity_at == read_up_to,
+            db.or_(watermark.is_(None), watermark < read_up_to, unread > 0)
+        ).update({watermark_column: read_up_to, unread_column: 0}, synchronize_session=False)
+        if updated:
+            return True
+        db.session.refresh(conversation)
+    return False
+
+
+def is_message_read(message, conversation):
+    """Whether a message has been read, per its flag or the receiver's watermark"""
+    if message.is_read:
+        return True
+    watermark = conversation.last_read_at(message.receiver_id)
+    return bool(watermark and message.created_at and message.created_at <= watermark)
+
+
+def get_conversation_messages(conversation, before=None, limit=50):
+    """
+    Get one newest-first page of a conversation's messages
+
+    Args:
+        before (str): Cursor of the oldest message already loaded ("load older")
+
+    Returns:
+        tuple: (messages newest-first, cursor for the next older page)
+    """
+    return paginate_keyset(
+        Message.query.filter(Message.conversation_id == conversation.id),
+        Message.created_at, Message.id,
+        cursor=before, limit=limit
+    )
+
+
+def mark_message_read(message):
+    """Mark a single message read, decrementing its receiver's unread counter once"""
+    if message.is_read:
+        return
+    conversation = get_conversation(message.sender_id, message.receiver_id)
+    # Messages under the watermark were already subtracted from the counter
+    already_counted = conversation is None or is_message_read(message, conversation)
+    message.is_read = True
+    message.read_at = datetime.utcnow()
+    if not already_counted:
+        unread_column = 'user_a_unread' if message.receiver_id == conversation.user_a_id else 'user_b_unread'
+        column = getattr(Conversation, unread_column)
+        Conversation.query.filter(Conversation.id == conversation.id, column > 0).update(
+            {unread_column: column - 1}, synchronize_session=False
+        )
+
+
+def mark_message_unread(message):
+    """
+    Mark a read message unread again and count it in its receiver's unread
+    counter. A message read through the watermark moves the watermark back to
+    just before it, so later messages that were only read through the
+    watermark are counted as unread again too (one UPDATE, which reads the
+    old watermark for both changes).
+    """
+    conversation = get_conversation(message.sender_id, message.receiver_id)
+    if conversation is None or not is_message_read(message, conversation):
+        return
+    message.is_read = False
+    message.read_at = None
+    db.session.flush()
+
+    watermark_column = 'user_a_last_read_at' if message.receiver_id == conversation.user_a_id else 'user_b_last_read_at'
+    unread_column = 'user_a_unread' if message.receiver_id == conversation.user_a_id else 'user_b_unread'
+    watermark = getattr(Conversation, watermark_column)
+    unread = getattr(Conversation, unread_column)
+
+    reopened = Conversation.query.filter(
+        Conversation.id == conversation.id,
+        watermark >= message.created_at
+    ).update({
+        unread_column: unread + db.select(func.count(Message.id)).where(
+            Message.conversation_id == Conversation.id,
+            Message.receiver_id == message.receiver_id,
+            Message.is_read.is_(False),
+            Message.created_at >= message.created_at,
+            Message.created_at <= watermark
+        ).scalar_subquery(),
+        watermark_column: message.created_at - timedelta(microseconds=1),
+    }, synchronize_session=False)
+    if not reopened:
+        # Read individually, above the watermark
+        Conversation.query.filter(Conversation.id == conversation.id).update(
+            {unread_column: unread + 1}, synchronize_session=False
+        )
+
+
+def edit_message_text(message, text):
+    """Change a message's text, and the conversation preview if it is the latest message"""
+    message.message_text = text
+    if message.conversation_id:
+        Conversation.query.filter(
+            Conversation.id == message.conversation_id,
+            Conversation.last_message_id == message.id
+        ).update({'last_message_text': text}, synchronize_session=False)
+
+
+def get_conversation_summaries(user_id, cursor=None, limit=20):
+    """
+    Get one summary per conversation partner, most recently active first
+
+    Reads the materialized conversations table (indexed on each participant
+    and last_activity_at) joined to the partner's profile in one query.
+
+    Returns:
+        tuple: (list of ConversationSummary, next_cursor)
+    """
+    partner_id = db.case(
+        (Conversation.user_a_id == user_id, Conversation.user_b_id),
+        else_=Conversation.user_a_id
+    )
+    unread = db.case(
+        (Conversation.user_a_id == user_id, Conversation.user_a_unread),
+        else_=Conversation.user_b_unread
+    )
+
+    query = db.session.query(Conversation, User, unread.label('unread')).join(
+        User, User.id == partner_id
+    ).filter(
+        db.or_(Conversation.user_a_id == user_id, Conversation.user_b_id == user_id),
+        Conversation.last_message_id.isnot(None)
+    )
+
+    rows, next_cursor = paginate_keyset(
+        query, Conversation.last_activity_at, Conversation.id,
+        cursor=cursor, limit=limit,
+        sort_key=lambda row: (row.Conversation.last_activity_at, row.Conversation.id)
+    )
+    return [
+        _summary(row.User, row.Conversation.last_message_text, row.Conversation.last_activity_at, row.unread or 0)
+        for row in rows
+    ], next_cursor
+
+
+def backfill_conversations():
+    """
+    Build conversations for messages written before the table existed.
+    Expects an active app context (called at startup once the schema is current).
+    """
+    try:
+        if not db.session.query(Message.id).filter(Message.conversation_id.is_(None)).first():
+            return
+
+        user_a = func.min(Message.sender_id, Message.receiver_id) if db.engine.dialect.name == 'sqlite' \
+            else func.least(Message.sender_id, Message.receiver_id)
+        user_b = func.max(Message.sender_id, Message.receiver_id) if db.engine.dialect.name == 'sqlite' \
+            else func.greatest(Message.sender_id, Message.receiver_id)
+        pairs = db.session.query(user_a, user_b).filter(
+            Message.conversation_id.is_(None)
+        ).distinct().all()
+
+        for user_a_id, user_b_id in pairs:
+            conversation = get_or_create_conversation(user_a_id, user_b_id)
+            pair_filter = db.or_(
+                db.and_(Message.sender_id == user_a_id, Message.receiver_id == user_b_id),
+                db.and_(Message.sender_id == user_b_id, Message.receiver_id == user_a_id)
+            )
+            Message.query.filter(pair_filter).update(
+                {'conversation_id': conversation.id}, synchronize_session=False
+            )
+
+            last = Message.query.filter(Message.conversation_id == conversation.id).order_by(
+                Message.created_at.desc(), Message.id.desc()
+            ).first()
+            unread = dict(db.session.query(Message.receiver_id, func.count(Message.id)).filter(
+                Message.conversation_id == conversation.id,
+                Message.is_read.is_(False)
+            ).group_by(Message.receiver_id).all())
+
+            conversation.last_message_id = last.id
+            conversation.last_message_text = last.message_text
+            conversation.last_activity_at = last.created_at
+            conversation.user_a_unread = unread.get(conversation.user_a_id, 0)
+            conversation.user_b_unread = unread.get(conversation.user_b_id, 0)
+
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Failed to backfill conversations: {str(e)}")
+
+
+def _summary(partner, last_message, last_activity_at, unread):
+    avatar_url = avatar_url_for(partner)
+    timestamp = last_activity_at.isoformat() if last_activity_at else ''
+    return ConversationSummary(
+        id=partner.id,
+        artisan=ConversationPartner(
+            id=partner.id,
+            name=partner.full_name or 'Unknown User',
+            avatar=avatar_url,
+            profile_picture_url=avatar_url,
+            online=False  # TODO: Implement online status
+        ),
+        last_message=last_message,
+        last_message_time=timestamp,
+        timestamp=timestamp,
+        created_at=timestamp,
+        unread=int(unread)
+    )
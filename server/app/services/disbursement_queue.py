@@ -0,0 +1,389 @@
+"""
+Disbursement job queue for Soko Safi
+Executes artisan B2C disbursements in worker processes instead of the M-Pesa
+callback request
+
+The artisan_disbursements table is the queue: the STK callback commits one
+pending row per artisan and returns, and `flask disbursements work` processes
+claim the oldest pending rows and submit them to B2C on a pool of
+DISBURSEMENT_CONCURRENCY threads. A claim is a lease (locked_by/locked_until)
+taken with one conditional UPDATE, so any number of workers can poll the same
+table without executing a row twice. A lease left by a crashed worker expires
+after DISBURSEMENT_LEASE seconds.
+
+Failed attempts are parked in `retry` with a jittered next_attempt_at (see
+MpesaService._handle_disbursement_failure). Every DISBURSEMENT_RETRY_INTERVAL
+seconds each worker also moves up to DISBURSEMENT_RETRY_BATCH due retries back
+to pending with the same kind of conditional UPDATE, so each due retry is
+re-queued once however many workers run. Submissions whose outcome was unknown
+(5xx, timeout) and whose B2C result never arrived are sent to the retry policy
+on the same scan. `queue_metrics` reports queue depth
+and age (GET /api/admin/disbursements/queue, flask disbursements stats).
+
+The workers also drain the M-Pesa callback inbox (app/services/callback_inbox.py),
+so a payment callback's disbursements are queued by the same processes that
+execute them, create the periodic payouts in batched settlement mode
+(app/services/settlement_service.py), and run STK Push Queries for payments
+whose callback is overdue (app/services/stk_query_service.py).
+"""
+
+import os
+import signal
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from datetime import datetime, timedelta
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import func, or_
+from app.models import db, ArtisanDisbursement, DisbursementStatus
+from app.services.mpesa_service import mpesa_service
+from app.services.callback_inbox import process_callbacks, inbox_metrics
+from app.services.settlement_service import batched_settlement, settle_earnings
+from app.services.stk_query_service import claim_stuck_payments, reconcile_payment
+
+disbursements_cli = AppGroup('disbursements', help='Artisan disbursement queue')
+
+
+def claim_disbursements(worker_id, limit, lease_seconds):
+    """
+    Lease up to `limit` of the oldest pending disbursements
+
+    Returns:
+        tuple: (claim token, list of claimed disbursement ids)
+    """
+    now = datetime.utcnow()
+    lease_free = or_(ArtisanDisbursement.locked_until.is_(None), ArtisanDisbursement.locked_until < now)
+    candidates = [row.id for row in db.session.query(ArtisanDisbursement.id).filter(
+        ArtisanDisbursement.status == DisbursementStatus.pending, lease_free
+    ).order_by(ArtisanDisbursement.created_at).limit(limit)]
+    if not candidates:
+        return None, []
+
+    # The conditions are re-checked per row when it is updated, so workers
+    # racing for the same candidates each get a disjoint share
+    token = f'{worker_id}:{uuid.uuid4().hex[:12]}'
+    ArtisanDisbursement.query.filter(
+        ArtisanDisbursement.id.in_(candidates),
+        ArtisanDisbursement.status == DisbursementStatus.pending,
+        lease_free
+    ).update({
+        ArtisanDisbursement.locked_by: token,
+        ArtisanDisbursement.locked_until: now + timedelta(seconds=lease_seconds)
+    }, synchronize_session=False)
+    db.session.commit()
+
+    claimed = [row.id for row in db.session.query(ArtisanDisbursement.id).filter_by(locked_by=token)]
+    return token, claimed
+
+
+def execute_claimed_disbursement(disbursement_id, token):
+    """
+    Submit one claimed disbursement to B2C and release its lease
+
+    Returns:
+        bool: Whether B2C accepted the request, None if the claim was lost
+    """
+    disbursement = db.session.get(ArtisanDisbursement, disbursement_id)
+    if not disbursement or disbursement.locked_by != token or disbursement.status != DisbursementStatus.pending:
+        return None
+
+    accepted = mpesa_service.execute_disbursement(disbursement)
+    disbursement.locked_by = None
+    disbursement.locked_until = None
+    db.session.commit()
+    return accepted
+
+
+def requeue_due_retries(limit):
+    """
+    Move up to `limit` retries whose backoff has elapsed back to pending
+
+    Returns:
+        int: Number of disbursements re-queued
+    """
+    now = datetime.utcnow()
+    # Rows parked before next_attempt_at existed are due immediately
+    due = or_(ArtisanDisbursement.next_attempt_at.is_(None), ArtisanDisbursement.next_attempt_at <= now)
+    candidates = [row.id for row in db.session.query(ArtisanDisbursement.id).filter(
+        ArtisanDisbursement.status == DisbursementStatus.retry, due
+    ).order_by(ArtisanDisbursement.next_attempt_at).limit(limit)]
+    if not candidates:
+        return 0
+
+    requeued = ArtisanDisbursement.query.filter(
+        ArtisanDisbursement.id.in_(candidates),
+        ArtisanDisbursement.status == DisbursementStatus.retry,
+        due
+    ).update({
+        ArtisanDisbursement.status: DisbursementStatus.pending,
+        ArtisanDisbursement.locked_by: None,
+        ArtisanDisbursement.locked_until: None
+    }, synchronize_session=False)
+    db.session.commit()
+    return requeued
+
+
+def expire_unanswered_submissions(limit):
+    """
+    Send up to `limit` unanswered submissions to the retry policy
+
+    A submission whose outcome was unknown waits in processing, without a
+    ConversationID, until next_attempt_at for its B2C result. Each overdue
+    one is claimed by clearing next_attempt_at with a conditional UPDATE (a
+    row settled by its result meanwhile no longer matches) and retried with
+    the same idempotency key.
+
+    Returns:
+        int: Number of submissions sent to retry
+    """
+    now = datetime.utcnow()
+    unanswered = (
+        ArtisanDisbursement.status == DisbursementStatus.processing,
+        ArtisanDisbursement.mpesa_transaction_id.is_(None),
+        ArtisanDisbursement.next_attempt_at <= now
+    )
+    candidates = [row.id for row in db.session.query(ArtisanDisbursement.id).filter(
+        *unanswered
+    ).order_by(ArtisanDisbursement.next_attempt_at).limit(limit)]
+
+    expired = 0
+    for disbursement_id in candidates:
+        if not ArtisanDisbursement.query.filter(ArtisanDisbursement.id == disbursement_id, *unanswered).update(
+            {ArtisanDisbursement.next_attempt_at: None}, synchronize_session=False
+        ):
+            continue
+        disbursement = db.session.get(ArtisanDisbursement, disbursement_id)
+        disbursement.failure_reason = 'No B2C result received'
+        mpesa_service._handle_disbursement_failure(disbursement, definitive=False)
+        expired += 1
+    db.session.commit()
+    return expired
+
+
+def queue_metrics():
+    """
+    Depth and age of the disbursement queue
+
+    Returns:
+        dict: Row counts per status, seconds since the oldest pending and
+            processing rows last changed state, and how many retries are due
+            and by how long the oldest is overdue
+    """
+    now = datetime.utcnow()
+    rows = db.session.query(
+        ArtisanDisbursement.status,
+        func.count(ArtisanDisbursement.id),
+        func.min(ArtisanDisbursement.updated_at)
+    ).group_by(ArtisanDisbursement.status).all()
+    due_count, oldest_due = db.session.query(
+        func.count(ArtisanDisbursement.id),
+        func.min(ArtisanDisbursement.next_attempt_at)
+    ).filter(
+        ArtisanDisbursement.status == DisbursementStatus.retry,
+        or_(ArtisanDisbursement.next_attempt_at.is_(None), ArtisanDisbursement.next_attempt_at <= now)
+    ).one()
+
+    def age(moment):
+        return round((now - moment).total_seconds(), 1) if moment else 0
+
+    depth = {status.value: 0 for status in DisbursementStatus}
+    oldest = {}
+    for status, count, updated_at in rows:
+        depth[status.value] = count
+        oldest[status] = updated_at
+    return {
+        'depth': depth,
+        'oldest_pending_seconds': age(oldest.get(DisbursementStatus.pending)),
+        'oldest_processing_seconds': age(oldest.get(DisbursementStatus.processing)),
+        'retry_due': due_count,
+        'retry_overdue_seconds': age(oldest_due) if due_count else 0,
+        **inbox_metrics(current_app.config['CALLBACK_MAX_ATTEMPTS'])
+    }
+
+
+class DisbursementWorker:
+    """
+    Processes the callback inbox, then claims pending disbursements and
+    executes them with bounded concurrency
+    """
+
+    def __init__(self, app, concurrency, poll_interval, lease_seconds, retry_interval=30, retry_batch=50,
+                 callback_batch=100, callback_lease=30, callback_max_attempts=10):
+        self.app = app
+        self._next_settlement = 0
+        self._next_stk_scan = 0
+        self.callback_batch = callback_batch
+        self.callback_lease = callback_lease
+        self.callback_max_attempts = callback_max_attempts
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.retry_interval = retry_interval
+        self.retry_batch = retry_batch
+        self._next_retry_scan = 0
+        self.worker_id = f'{socket.gethostname()[:32]}:{os.getpid()}'
+        self.stopping = threading.Event()
+        self.processed = 0
+
+    def stop(self, *args):
+        self.stopping.set()
+
+    def run(self, drain=False):
+        """
+        Process callbacks and disbursements until stopped (or, with drain,
+        until neither has pending work)
+
+        Up to twice `concurrency` rows are leased at a time so the thread
+        pool never idles waiting for the next claim.
+        """
+        in_flight = set()
+        with ThreadPoolExecutor(self.concurrency, thread_name_prefix='disburse') as executor:
+            while not self.stopping.is_set():
+                self._requeue_retries(force=drain)
+                self._settle(force=drain)
+                callbacks = self._process_callbacks()
+                for payment_id in self._claim_stuck_payments(force=drain):
+                    in_flight.add(executor.submit(self._reconcile, payment_id))
+                claimed = []
+                free = self.concurrency * 2 - len(in_flight)
+                if free > 0:
+                    try:
+                        token, claimed = claim_disbursements(self.worker_id, free, self.lease_seconds)
+                    except Exception as e:
+                        db.session.rollback()
+                        current_app.logger.error(f"Failed to claim disbursements: {str(e)}")
+                    for disbursement_id in claimed:
+                        in_flight.add(executor.submit(self._execute, disbursement_id, token))
+
+                if in_flight:
+                    # Don't let in-flight B2C calls hold up a busy inbox
+                    timeout = 0 if callbacks else self.poll_interval
+                    done, in_flight = wait(in_flight, timeout=timeout, return_when=FIRST_COMPLETED)
+                    self.processed += len(done)
+                elif claimed or callbacks:
+                    continue
+                elif drain:
+                    break
+                else:
+                    self.stopping.wait(self.poll_interval)
+
+            # Finish what was already submitted; unstarted rows keep their
+            # lease and are picked up again once it expires
+            done, _ = wait(in_flight)
+            self.processed += len(done)
+        return self.processed
+
+    def _settle(self, force=False):
+        config = self.app.config
+        if not batched_settlement() or (not force and time.monotonic() < self._next_settlement):
+            return
+        self._next_settlement = time.monotonic() + config['SETTLEMENT_INTERVAL']
+        try:
+            created = settle_earnings(config['SETTLEMENT_THRESHOLD'], config['SETTLEMENT_MAX_AGE'])
+            if created:
+                current_app.logger.info(f"Created {created} artisan settlement payouts")
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.error(f"Failed to settle artisan earnings: {str(e)}")
+
+    def _claim_stuck_payments(self, force=False):
+        config = self.app.config
+        if not force and time.monotonic() < self._next_stk_scan:
+            return []
+        self._next_stk_scan = time.monotonic() + config['STK_QUERY_INTERVAL']
+        try:
+            return claim_stuck_payments(self.concurrency * 2, config['STK_QUERY_AFTER'], config['STK_QUERY_EXPIRY'])
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.error(f"Failed to claim pending payments: {str(e)}")
+            return []
+
+    def _process_callbacks(self):
+        try:
+            return process_callbacks(self.worker_id, self.callback_batch, self.callback_lease,
+                                     self.callback_max_attempts)
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.error(f"Failed to process M-Pesa callbacks: {str(e)}")
+            return 0
+
+    def _requeue_retries(self, force=False):
+        if not force and time.monotonic() < self._next_retry_scan:
+            return
+        self._next_retry_scan = time.monotonic() + self.retry_interval
+        try:
+            requeued = requeue_due_retries(self.retry_batch)
+            if requeued:
+                current_app.logger.info(f"Re-queued {requeued} disbursement retries")
+            expired = expire_unanswered_submissions(self.retry_batch)
+            if expired:
+                current_app.logger.info(f"Sent {expired} unanswered disbursement submissions to retry")
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.error(f"Failed to re-queue disbursement retries: {str(e)}")
+
+    def _execute(self, disbursement_id, token):
+        with self.app.app_context():
+            try:
+                return execute_claimed_disbursement(disbursement_id, token)
+            except Exception as e:
+                db.session.rollback()
+                current_app.logger.error(f"Disbursement {disbursement_id} failed to execute: {str(e)}")
+                return False
+
+    def _reconcile(self, payment_id):
+        with self.app.app_context():
+            try:
+                return reconcile_payment(payment_id)
+            except Exception as e:
+                db.session.rollback()
+                current_app.logger.error(f"STK query for payment {payment_id} failed: {str(e)}")
+                return False
+
+
+@disbursements_cli.command('work')
+@click.option('--concurrency', type=int, default=None, help='Concurrent B2C requests [default: DISBURSEMENT_CONCURRENCY]')
+@click.option('--poll-interval', type=float, default=None, help='Seconds between polls when idle [default: DISBURSEMENT_POLL_INTERVAL]')
+@click.option('--once', is_flag=True, help='Exit once no callbacks or disbursements are pending')
+def work_command(concurrency, poll_interval, once):
+    """Process M-Pesa callbacks and execute queued disbursements until stopped"""
+    config = current_app.config
+    worker = DisbursementWorker(
+        current_app._get_current_object(),
+        concurrency=concurrency or config['DISBURSEMENT_CONCURRENCY'],
+        poll_interval=poll_interval or config['DISBURSEMENT_POLL_INTERVAL'],
+        lease_seconds=config['DISBURSEMENT_LEASE'],
+        retry_interval=config['DISBURSEMENT_RETRY_INTERVAL'],
+        retry_batch=config['DISBURSEMENT_RETRY_BATCH'],
+        callback_lease=config['CALLBACK_LEASE'],
+        callback_max_attempts=config['CALLBACK_MAX_ATTEMPTS']
+    )
+    signal.signal(signal.SIGTERM, worker.stop)
+    signal.signal(signal.SIGINT, worker.stop)
+
+    click.echo(f'Disbursement worker {worker.worker_id} running with concurrency {worker.concurrency}')
+    processed = worker.run(drain=once)
+    click.echo(f'Processed {processed} disbursements')
+
+
+@disbursements_cli.command('settle')
+@click.option('--all', 'settle_all', is_flag=True, help='Pay out every accrued balance, not only those due')
+def settle_command(settle_all):
+    """Create payouts for accrued artisan earnings"""
+    config = current_app.config
+    created = settle_earnings(config['SETTLEMENT_THRESHOLD'], config['SETTLEMENT_MAX_AGE'], force=settle_all)
+    click.echo(f'Created {created} settlement payouts')
+
+
+@disbursements_cli.command('stats')
+def stats_command():
+    """Show disbursement queue depth and age"""
+    metrics = queue_metrics()
+    for status, count in metrics.pop('depth').items():
+        click.echo(f'{status:<12}{count:>8}')
+    for name, value in metrics.items():
+        click.echo(f'{name}: {value}')
@@ -0,0 +1,211 @@
+"""
+Artisan metrics service for Soko Safi
+Maintains per-artisan dashboard totals (products, orders, units sold, revenue)
+and a per-day sales series, so the dashboard is a primary-key read
+
+An order's items count toward its artisans' sales while the order is paid or
+has moved past pending (processing, shipped, completed), and stop counting if
+it is cancelled or refunded. `orders.metrics_counted` records whether an order
+is currently included, which makes every refresh idempotent: re-applying the
+same status or payment callback changes nothing.
+"""
+
+from datetime import datetime, date, timedelta
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm.attributes import set_committed_value
+from app.models import (
+    db, Order, OrderItem, OrderStatus, Payment, PaymentStatus, Product,
+    ArtisanMetrics, ArtisanDailyMetrics
+)
+
+COUNTED_STATUSES = (OrderStatus.processing, OrderStatus.shipped, OrderStatus.completed)
+EXCLUDED_STATUSES = (OrderStatus.cart, OrderStatus.cancelled, OrderStatus.refunded)
+MAX_SERIES_DAYS = 365
+COUNTER_COLUMNS = ('product_count', 'order_count', 'units_sold', 'revenue')
+
+metrics_cli = AppGroup('metrics', help='Artisan dashboard metrics')
+
+
+def order_counts_toward_sales(order, paid=None):
+    """
+    Whether an order's items should be included in artisan sales
+
+    Args:
+        paid (bool): Whether the order has a successful payment; looked up when None
+    """
+    if order.status in EXCLUDED_STATUSES or order.status is None:
+        return False
+    if order.status in COUNTED_STATUSES:
+        return True
+    if paid is None:
+        paid = db.session.query(Payment.id).filter(
+            Payment.order_id == order.id,
+            Payment.status == PaymentStatus.success
+        ).first() is not None
+    return paid
+
+
+def sync_order_metrics(order, paid=None):
+    """
+    Add or remove an order's contribution to its artisans' metrics after a
+    status change or payment. Runs inside the caller's transaction.
+
+    Returns:
+        bool: True if the metrics changed
+    """
+    should_count = order_counts_toward_sales(order, paid)
+    if should_count == bool(order.metrics_counted):
+        return False
+
+    # Flip the flag conditionally so concurrent callers apply the delta once
+    flipped = Order.query.filter(
+        Order.id == order.id,
+        Order.metrics_counted.is_(not should_count)
+    ).update({'metrics_counted': should_count}, synchronize_session=False)
+    set_committed_value(order, 'metrics_counted', should_count)
+    if not flipped:
+        return False
+
+    sign = 1 if should_count else -1
+    day = (order.placed_at or datetime.utcnow()).date()
+    rows = db.session.query(
+        OrderItem.artisan_id,
+        func.coalesce(func.sum(OrderItem.quantity), 0),
+        func.coalesce(func.sum(_line_total()), 0)
+    ).filter(
+        OrderItem.order_id == order.id,
+        OrderItem.artisan_id.isnot(None)
+    ).group_by(OrderItem.artisan_id).all()
+
+    for artisan_id, units, revenue in rows:
+        deltas = {'order_count': sign, 'units_sold': sign * int(units), 'revenue': sign * revenue}
+        _bump(ArtisanMetrics, {'artisan_id': artisan_id}, deltas)
+        _bump(ArtisanDailyMetrics, {'artisan_id': artisan_id, 'day': day}, deltas)
+    return True
+
+
+def adjust_product_count(artisan_id, delta):
+    """Track an artisan's active product count (inside the caller's transaction)"""
+    if artisan_id and delta:
+        _bump(ArtisanMetrics, {'artisan_id': artisan_id}, {'product_count': delta})
+
+
+def get_artisan_metrics(artisan_id, days=30):
+    """
+    Dashboard totals plus a per-day series for the last `days` days
+
+    Returns:
+        dict: stats and daily rows (days without sales are omitted)
+    """
+    metrics = db.session.get(ArtisanMetrics, artisan_id)
+    since = date.today() - timedelta(days=max(1, min(days, MAX_SERIES_DAYS)) - 1)
+    series = ArtisanDailyMetrics.query.filter(
+        ArtisanDailyMetrics.artisan_id == artisan_id,
+        ArtisanDailyMetrics.day >= since
+    ).order_by(ArtisanDailyMetrics.day).all()
+
+    return {
+        'stats': {
+            'total_products': metrics.product_count if metrics else 0,
+            'total_orders': metrics.order_count if metrics else 0,
+            'total_revenue': float(metrics.revenue) if metrics else 0,
+            'units_sold': metrics.units_sold if metrics else 0
+        },
+        'daily': [{
+            'date': row.day.isoformat(),
+            'orders': row.order_count,
+            'units_sold': row.units_sold,
+            'revenue': float(row.revenue)
+        } for row in series]
+    }
+
+
+def rebuild_artisan_metrics():
+    """Recompute all artisan metrics from orders, payments and products"""
+    paid_orders = db.session.query(Payment.order_id).filter(Payment.status == PaymentStatus.success)
+    counted = db.or_(
+        Order.status.in_(COUNTED_STATUSES),
+        db.and_(Order.status == OrderStatus.pending, Order.id.in_(paid_orders))
+    )
+
+    day_column = func.date(Order.placed_at)
+    daily_rows = db.session.query(
+        OrderItem.artisan_id,
+        day_column,
+        func.count(func.distinct(OrderItem.order_id)),
+        func.coalesce(func.sum(OrderItem.quantity), 0),
+        func.coalesce(func.sum(_line_total()), 0)
+    ).join(
+        Order, OrderItem.order_id == Order.id
+    ).filter(
+        counted,
+        OrderItem.artisan_id.isnot(None)
+    ).group_by(OrderItem.artisan_id, day_column).all()
+
+    product_counts = dict(db.session.query(Product.artisan_id, func.count(Product.id)).filter(
+        Product.status == 'active',
+        Product.artisan_id.isnot(None)
+    ).group_by(Product.artisan_id).all())
+
+    ArtisanDailyMetrics.query.delete()
+    ArtisanMetrics.query.delete()
+
+    totals = {}
+    for artisan_id, day, orders, units, revenue in daily_rows:
+        if isinstance(day, str):
+            day = date.fromisoformat(day)
+        db.session.add(ArtisanDailyMetrics(
+            artisan_id=artisan_id, day=day, order_count=orders, units_sold=int(units), revenue=revenue
+        ))
+        total = totals.setdefault(artisan_id, ArtisanMetrics(
+            artisan_id=artisan_id, product_count=0, order_count=0, units_sold=0, revenue=0
+        ))
+        total.order_count += orders
+        total.units_sold += int(units)
+        total.revenue += revenue
+
+    for artisan_id, count in product_counts.items():
+        totals.setdefault(artisan_id, ArtisanMetrics(
+            artisan_id=artisan_id, order_count=0, units_sold=0, revenue=0
+        )).product_count = count
+    db.session.add_all(totals.values())
+
+    Order.query.update({'metrics_counted': False}, synchronize_session=False)
+    Order.query.filter(counted).update({'metrics_counted': True}, synchronize_session=False)
+    db.session.commit()
+    return len(totals)
+
+
+@metrics_cli.command('backfill')
+def backfill_command():
+    """Rebuild artisan dashboard metrics from existing orders"""
+    try:
+        artisans = rebuild_artisan_metrics()
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Failed to rebuild artisan metrics: {str(e)}")
+        raise click.ClickException(str(e))
+    click.echo(f'Rebuilt metrics for {artisans} artisans')
+
+
+def _line_total():
+    return func.coalesce(OrderItem.total_price, OrderItem.unit_price * OrderItem.quantity)
+
+
+def _bump(model, keys, deltas):
+    query = model.query.filter_by(**keys)
+    if query.with_entities(*[getattr(model, k) for k in keys]).first() is None:
+        try:
+            with db.session.begin_nested():
+                db.session.add(model(**keys, **{column: 0 for column in COUNTER_COLUMNS if hasattr(model, column)}))
+        except IntegrityError:
+            pass  # Created concurrently; fall through to the increment
+
+    query.update(
+        {column: getattr(model, column) + delta for column, delta in deltas.items()},
+        synchronize_session=False
+    )
@@ -0,0 +1,149 @@
+"""
+Daraja (M-Pesa) HTTP client for Soko Safi
+Owns the network side of the M-Pesa integration:
+
+- one pooled keep-alive `requests.Session` shared by every caller
+- connect/read timeouts on every request (MPESA_CONNECT_TIMEOUT, MPESA_READ_TIMEOUT)
+- the OAuth access token cached until TOKEN_REFRESH_MARGIN seconds before it
+  expires, refreshed by a single thread while concurrent callers wait for it
+- one transparent retry with a fresh token when Daraja answers 401
+
+The client is thread-safe, so disbursement workers can share one instance and
+issue calls concurrently up to MPESA_POOL_SIZE open connections. Point
+MPESA_BASE_URL at devtools/fake_daraja.py to exercise it locally.
+"""
+
+import base64
+import os
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+TOKEN_REFRESH_MARGIN = 60
+DEFAULT_TOKEN_TTL = 3599
+
+
+class DarajaError(Exception):
+    """A Daraja request failed (transport error, timeout or error response)"""
+
+    def __init__(self, message, status_code=None, body=None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.body = body
+
+
+class DarajaClient:
+    def __init__(self, base_url, consumer_key, consumer_secret,
+                 connect_timeout=5, read_timeout=30, pool_size=10):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = (connect_timeout, read_timeout)
+        self._credentials = base64.b64encode(f'{consumer_key}:{consumer_secret}'.encode()).decode()
+        self._token = None
+        self._token_expires_at = 0
+        self._token_lock = threading.Lock()
+        self.session = self._create_session(pool_size)
+
+    @classmethod
+    def from_env(cls):
+        return cls(
+            base_url=os.getenv('MPESA_BASE_URL', 'https://sandbox.safaricom.co.ke'),
+            consumer_key=os.getenv('MPESA_CONSUMER_KEY'),
+            consumer_secret=os.getenv('MPESA_CONSUMER_SECRET'),
+            connect_timeout=float(os.getenv('MPESA_CONNECT_TIMEOUT', 5)),
+            read_timeout=float(os.getenv('MPESA_READ_TIMEOUT', 30)),
+            pool_size=int(os.getenv('MPESA_POOL_SIZE', 10)),
+        )
+
+    def get_access_token(self):
+        """
+        Get a valid OAuth access token, fetching one only when the cached
+        token is missing or about to expire
+
+        Raises:
+            DarajaError: If the token request fails
+        """
+        token = self._token
+        if token and time.monotonic() < self._token_expires_at:
+            return token
+
+        with self._token_lock:
+            # Another thread may have refreshed while we waited
+            if self._token and time.monotonic() < self._token_expires_at:
+                return self._token
+
+            result = self._request(
+                'GET', '/oauth/v1/generate',
+                params={'grant_type': 'client_credentials'},
+                headers={'Authorization': f'Basic {self._credentials}'}
+            )
+            token = result.get('access_token')
+            if not token:
+                raise DarajaError('Token response did not include an access_token', body=result)
+            expires_in = int(result.get('expires_in') or DEFAULT_TOKEN_TTL)
+            self._token = token
+            self._token_expires_at = time.monotonic() + max(expires_in - TOKEN_REFRESH_MARGIN, 0)
+            return token
+
+    def invalidate_token(self):
+        with self._token_lock:
+            self._token = None
+            self._token_expires_at = 0
+
+    def post(self, path, payload):
+        """
+        POST a JSON payload with the bearer token
+
+        Returns:
+            dict: The decoded response body
+
+        Raises:
+            DarajaError: On transport errors, timeouts or non-2xx responses
+        """
+        try:
+            return self._request('POST', path, json=payload, headers=self._auth_headers())
+        except DarajaError as e:
+            if e.status_code != 401:
+                raise
+            # Token revoked or expired early; refresh once and resend
+            self.invalidate_token()
+            return self._request('POST', path, json=payload, headers=self._auth_headers())
+
+    def close(self):
+        self.session.close()
+
+    def _auth_headers(self):
+        return {'Authorization': f'Bearer {self.get_access_token()}'}
+
+    def _request(self, method, path, **kwargs):
+        try:
+            response = self.session.request(method, f'{self.base_url}{path}', timeout=self.timeout, **kwargs)
+        except requests.Timeout as e:
+            raise DarajaError(f'Daraja {method} {path} timed out: {e}')
+        except requests.RequestException as e:
+            raise DarajaError(f'Daraja {method} {path} failed: {e}')
+
+        try:
+            body = response.json()
+        except ValueError:
+            body = None
+        if not isinstance(body, dict):
+            body = {'raw': response.text}
+        if not response.ok:
+            message = body.get('errorMessage') or body.get('ResponseDescription') or response.reason
+            raise DarajaError(f'Daraja {method} {path} returned {response.status_code}: {message}',
+                              status_code=response.status_code, body=body)
+        return body
+
+    def _create_session(self, pool_size):
+        session = requests.Session()
+        session.headers.update({'Content-Type': 'application/json', 'Accept': 'application/json'})
+        # Retry failed connects (nothing was sent yet) on any request, and 5xx
+        # only on the idempotent token GET; a POST that reached Daraja is never resent
+        retries = Retry(total=2, connect=2, read=0, backoff_factor=0.2,
+                        status_forcelist=(502, 503, 504), allowed_methods=frozenset({'GET'}))
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retries)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
@@ -1,18 +1,39 @@
 """
 M-Pesa integration service for Soko Safi
 Handles STK Push, B2C disbursements, and callback processing
+
+HTTP calls go through DarajaClient (app/services/mpesa_client.py), which caches
+the access token and reuses pooled connections with timeouts. B2C requests are
+made by the disbursement workers (app/services/disbursement_queue.py), not in
+the callback request.
 """
 
 import os
-import requests
 import base64
 import json
+import random
+import uuid
 from datetime import datetime, timedelta
 import time
 from flask import current_app
-from app.models import db, Payment, PaymentStatus, ArtisanDisbursement, DisbursementStatus, User
+from app.models import db, Order, OrderItem, Payment, PaymentStatus, ArtisanDisbursement, DisbursementStatus, User
+from app.services.metrics_service import sync_order_metrics
+from app.services.mpesa_client import DarajaClient, DarajaError
+from app.services.settlement_service import batched_settlement, complete_settlement
+from app.services.checkout_service import release_order_stock
+from app.services.response_cache import response_cache
 from app.sockets.notifications import send_notification
 
+# Backoff before each disbursement retry (5min, 15min, 1hr, 6hr, 24hr)
+RETRY_DELAYS = [300, 900, 3600, 21600, 86400]
+# Retries are spread by up to this fraction of their delay, so disbursements
+# that failed together (e.g. during a Daraja outage) are not resent together
+RETRY_JITTER = 0.2
+
+# STK Push Query answers for a transaction that has no outcome yet
+STK_QUERY_PROCESSING_ERROR = '500.001.1001'
+STK_QUERY_PROCESSING_RESULT = '4999'
+
 
 class MpesaService:
     def __init__(self):
@@ -25,21 +46,13 @@ class MpesaService:
         # Validate required credentials
         if not all([self.consumer_key, self.consumer_secret, self.shortcode, self.passkey]):
             raise ValueError('Missing required M-Pesa credentials in environment variables')
+
+        self.client = DarajaClient.from_env()
  
     def get_access_token(self):
-        """Get M-Pesa access token"""
+        """Get a cached M-Pesa access token (refreshed shortly before expiry)"""
         try:
-            if not self.consumer_key or not self.consumer_secret:
-                raise ValueError('M-Pesa credentials not configured')
-                
-            auth = base64.b64encode(f"{self.consumer_key}:{self.consumer_secret}".encode()).decode()
-            headers = {
-                'Authorization': f'Basic {auth}',
-                'Content-Type': 'application/json'
-            }
-            response = requests.get(f'{self.base_url}/oauth/v1/generate?grant_type=client_credentials', headers=headers, timeout=30)
-            response.raise_for_status()
-            return response.json()['access_token']
+            return self.client.get_access_token()
         except Exception as e:
             current_app.logger.error(f"Failed to get M-Pesa access token: {str(e)}")
             raise
@@ -47,7 +60,6 @@ class MpesaService:
     def initiate_stk_push(self, phone_number, amount, order_id, account_reference):
         """Initiate STK Push for customer payment"""
         try:
-            access_token = self.get_access_token()
             # Format phone number (remove + and ensure 254 format)
             phone = phone_number.replace('+', '')
             if phone.startswith('0'):
@@ -73,15 +85,7 @@ class MpesaService:
                 "TransactionDesc": f"Payment for Order {order_id}"
             }
 
-            headers = {
-                'Authorization': f'Bearer {access_token}',
-                'Content-Type': 'application/json'
-            }
-
-            response = requests.post(f'{self.base_url}/mpesa/stkpush/v1/processrequest', json=payload, headers=headers)
-            response.raise_for_status()
-
-            result = response.json()
+            result = self.client.post('/mpesa/stkpush/v1/processrequest', payload)
             return {
                 'success': True,
                 'checkout_request_id': result.get('CheckoutRequestID'),
@@ -108,8 +112,6 @@ class MpesaService:
             if not artisan:
                 raise ValueError("Artisan not found")
 
-            access_token = self.get_access_token()
-
             # Determine recipient based on payment method
             if disbursement.disbursement_method == 'phone':
                 recipient = disbursement.recipient_phone.replace('+', '')
@@ -128,18 +130,13 @@ class MpesaService:
                 "Remarks": f"Payment for order items",
                 "QueueTimeOutURL": f"{os.getenv('BASE_URL', 'http://localhost:5001')}/api/payments/b2c/timeout",
                 "ResultURL": f"{os.getenv('BASE_URL', 'http://localhost:5001')}/api/payments/b2c/result",
-                "Occasion": f"Order {disbursement.payment_id}"
+                "Occasion": f"Order {disbursement.payment_id}" if disbursement.payment_id
+                else f"Settlement {disbursement.id}"
             }
+            if disbursement.idempotency_key:
+                payload["OriginatorConversationID"] = disbursement.idempotency_key
 
-            headers = {
-                'Authorization': f'Bearer {access_token}',
-                'Content-Type': 'application/json'
-            }
-
-            response = requests.post(f'{self.base_url}/mpesa/b2c/v1/paymentrequest', json=payload, headers=headers)
-            response.raise_for_status()
-
-            result = response.json()
+            result = self.client.post('/mpesa/b2c/v1/paymentrequest', payload)
             return {
                 'success': True,
                 'conversation_id': result.get('ConversationID'),
@@ -150,71 +147,159 @@ class MpesaService:
 
         except Exception as e:
             current_app.logger.error(f"B2C disbursement failed: {str(e)}")
-            return {'success': False, 'error': str(e)}
+            # status_code is set only when Daraja answered with an error
+            return {'success': False, 'error': str(e), 'status_code': getattr(e, 'status_code', None)}
 
     def process_stk_callback(self, callback_data):
-        """Process STK Push callback"""
+        """
+        Process STK Push callback
+
+        Run by the workers from the callback inbox (app/services/callback_inbox.py);
+        errors are re-raised so the inbox retries the callback.
+        """
         try:
-            result_code = callback_data.get('Body', {}).get('stkCallback', {}).get('ResultCode')
-            result_desc = callback_data.get('Body', {}).get('stkCallback', {}).get('ResultDesc')
-            checkout_request_id = callback_data.get('Body', {}).get('stkCallback', {}).get('CheckoutRequestID')
-            callback_metadata = callback_data.get('Body', {}).get('stkCallback', {}).get('CallbackMetadata', {})
+            stk_callback = callback_data.get('Body', {}).get('stkCallback', {})
+            result_code = stk_callback.get('ResultCode')
+            result_desc = stk_callback.get('ResultDesc')
+            checkout_request_id = stk_callback.get('CheckoutRequestID')
+            callback_metadata = stk_callback.get('CallbackMetadata', {})
+            metadata = {item.get('Name'): item.get('Value') for item in callback_metadata.get('Item', [])}
+            receipt = metadata.get('MpesaReceiptNumber')
 
             # Find payment by checkout request ID (you'll need to store this mapping) 
             payment = Payment.query.filter_by(mpesa_transaction_id=checkout_request_id).first()
             if not payment:
                 current_app.logger.error(f"Payment not found for checkout_request_id: {checkout_request_id}")
                 return
+            if payment.status == PaymentStatus.success and str(result_code) == '0' and receipt:
+                # Already confirmed by an STK query, which has no receipt number
+                payment.mpesa_transaction_id = receipt
+                payment.callback_payload = json.dumps(callback_data)
+                db.session.commit()
+                return
+            if payment.status != PaymentStatus.pending:
+                current_app.logger.info(f"Ignoring STK callback for settled payment {payment.id}")
+                return
 
-            if result_code == 0:
-                # Success
-                payment.status = PaymentStatus.success
-                payment.mpesa_transaction_id = callback_metadata.get('Item', [{}])[1].get('Value')  # MpesaReceiptNumber
-                payment.received_at = datetime.utcnow()
-                payment.callback_payload = callback_data
-
-                # Trigger artisan disbursements
-                self._trigger_artisan_disbursements(payment.id)
-
-                # Notify user via WebSocket
-                send_notification(payment.order.user_id, 'payment_success', {
-                    'order_id': payment.order_id,
-                    'amount': float(payment.amount),
-                    'transaction_id': payment.mpesa_transaction_id
-                })
-
-            else:
-                # Failed
-                payment.status = PaymentStatus.failed
-                payment.transaction_status_reason = result_desc
-                payment.callback_payload = json.dumps(callback_data) 
-
-                # Notify user of failure
-                send_notification(payment.order.user_id, 'payment_failed', {
-                    'order_id': payment.order_id,
-                    'amount': float(payment.amount),
-                    'reason': result_desc
-                })
-
-            db.session.commit()
+            self.apply_stk_result(payment, str(result_code) == '0', result_desc,
+                                  receipt=receipt, payload=json.dumps(callback_data))
 
         except Exception as e:
             current_app.logger.error(f"STK callback processing failed: {str(e)}") 
             db.session.rollback()
+            raise
+
+    def apply_stk_result(self, payment, succeeded, reason, receipt=None, payload=None):
+        """
+        Settle a pending payment from its STK callback or STK query result
+
+        The status change is a conditional UPDATE, so when the callback and
+        the STK query worker race, only one of them settles the payment and
+        queues its disbursements. A failed payment releases the order's
+        reserved stock unless another payment for the order succeeded.
+        Commits.
+
+        Returns:
+            bool: False if the payment was no longer pending
+        """
+        new_status = PaymentStatus.success if succeeded else PaymentStatus.failed
+        updated = Payment.query.filter_by(id=payment.id, status=PaymentStatus.pending).update(
+            {Payment.status: new_status}, synchronize_session=False
+        )
+        if not updated:
+            db.session.rollback()
+            return False
+        payment.status = new_status
+        if payload:
+            payment.callback_payload = payload
+
+        order = db.session.get(Order, payment.order_id)
+        cache_tags = set()
+        if succeeded:
+            if receipt:
+                payment.mpesa_transaction_id = receipt  # MpesaReceiptNumber
+            payment.received_at = datetime.utcnow()
+
+            # Count the sale toward the artisans' dashboard metrics
+            if order:
+                sync_order_metrics(order, paid=True)
+
+            # Queue artisan disbursements for the workers
+            self._queue_artisan_disbursements(payment)
+
+            # Notify user via WebSocket
+            send_notification(order.user_id if order else None, 'payment_success', {
+                'payment_id': payment.id,
+                'order_id': payment.order_id,
+                'status': payment.status.value,
+                'amount': float(payment.amount),
+                'transaction_id': payment.mpesa_transaction_id
+            })
+
+        else:
+            payment.transaction_status_reason = reason
+
+            # Give the stock back; paying the order again re-reserves it
+            if order and not Payment.query.filter_by(order_id=order.id, status=PaymentStatus.success).first():
+                cache_tags = release_order_stock(order)
+
+            # Notify user of failure
+            send_notification(order.user_id if order else None, 'payment_failed', {
+                'payment_id': payment.id,
+                'order_id': payment.order_id,
+                'status': payment.status.value,
+                'amount': float(payment.amount),
+                'reason': reason
+            })
+
+        db.session.commit()
+        response_cache.invalidate(*cache_tags)
+        return True
+
+    def query_stk_status(self, checkout_request_id):
+        """
+        Ask Daraja for the outcome of an STK Push (STK Push Query)
+
+        Returns:
+            dict: The query response; it has no ResultCode while the
+                transaction is still being processed
+        """
+        timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
+        password = base64.b64encode(f"{self.shortcode}{self.passkey}{timestamp}".encode()).decode()
+        try:
+            result = self.client.post('/mpesa/stkpushquery/v1/query', {
+                "BusinessShortCode": self.shortcode,
+                "Password": password,
+                "Timestamp": timestamp,
+                "CheckoutRequestID": checkout_request_id
+            })
+        except DarajaError as e:
+            if (e.body or {}).get('errorCode') == STK_QUERY_PROCESSING_ERROR:
+                return {}
+            raise
+        if str(result.get('ResultCode')) == STK_QUERY_PROCESSING_RESULT:
+            return {}
+        return result
 
     def process_b2c_result(self, result_data):
-        """Process B2C result callback"""
+        """Process B2C result callback (from the callback inbox; errors are re-raised)"""
         try:
-            result_code = result_data.get('Result', {}).get('ResultCode')
-            result_desc = result_data.get('Result', {}).get('ResultDesc')
-            transaction_id = result_data.get('Result', {}).get('TransactionId')
-            conversation_id = result_data.get('Result', {}).get('ConversationId') 
+            result = result_data.get('Result', {})
+            result_code = result.get('ResultCode')
+            result_desc = result.get('ResultDesc')
+            transaction_id = result.get('TransactionID') or result.get('TransactionId')
+            conversation_id = result.get('ConversationID') or result.get('ConversationId')
 
-            # Find disbursement by conversation ID (you'll need to store this mapping)
-            disbursement = ArtisanDisbursement.query.filter_by(mpesa_transaction_id=conversation_id).first()
+            disbursement = self._find_disbursement(result)
             if not disbursement:
                 current_app.logger.error(f"Disbursement not found for conversation_id: {conversation_id}")
                 return
+            if disbursement.status in (DisbursementStatus.success, DisbursementStatus.manual):
+                current_app.logger.info(f"Ignoring B2C result for settled disbursement {disbursement.id}")
+                return
+            if disbursement.status == DisbursementStatus.pending:
+                # The result overtook the worker still recording the submission
+                raise RuntimeError(f"Disbursement {disbursement.id} is still being submitted")
 
             if result_code == 0:
                 # Success
@@ -222,6 +307,8 @@ class MpesaService:
                 disbursement.mpesa_transaction_id = transaction_id
                 disbursement.completed_at = datetime.utcnow()
                 disbursement.callback_payload = json.dumps(result_data) 
+                if not disbursement.payment_id:
+                    complete_settlement(disbursement)
 
                 # Notify artisan
                 send_notification(disbursement.artisan_id, 'disbursement_success', {
@@ -240,74 +327,148 @@ class MpesaService:
         except Exception as e:
             current_app.logger.error(f"B2C result processing failed: {str(e)}") 
             db.session.rollback()
+            raise
 
-    def _trigger_artisan_disbursements(self, payment_id):
-        """Create and trigger disbursements to artisans"""
+    def process_b2c_timeout(self, timeout_data):
+        """
+        Process B2C queue timeout: the outcome is unknown, so retry the same attempt
+        (from the callback inbox; errors are re-raised)
+        """
         try:
-            payment = Payment.query.get(payment_id)
-            order_items = payment.order.order_items
-
-            # Group by artisan
-            artisan_totals = {}
-            for item in order_items:
-                artisan_id = item.artisan_id
-                if artisan_id not in artisan_totals:
-                    artisan_totals[artisan_id] = 0
-                artisan_totals[artisan_id] += float(item.total_price)
-
-            # Create disbursements
-            for artisan_id, amount in artisan_totals.items():
-                artisan = User.query.get(artisan_id)
-
-                disbursement = ArtisanDisbursement(
-                    payment_id=payment_id,
-                    artisan_id=artisan_id,
-                    amount=amount,
-                    disbursement_method=artisan.payment_method.value if artisan.payment_method else 'phone',
-                    recipient_phone=artisan.mpesa_phone,
-                    paybill_number=artisan.paybill_number,
-                    paybill_account=artisan.paybill_account
-                )
-
-                db.session.add(disbursement)
-                db.session.commit()
-
-                # Trigger disbursement 
-                result = self.disburse_to_artisan(disbursement.id)
-                if result['success']:
-                    disbursement.status = DisbursementStatus.processing
-                    disbursement.mpesa_transaction_id = result.get('conversation_id')
-                else:
-                    disbursement.status = DisbursementStatus.failed 
-                    disbursement.failure_reason = result.get('error')
-
-                db.session.commit()
+            disbursement = self._find_disbursement(timeout_data.get('Result', {}))
+            if disbursement and disbursement.status == DisbursementStatus.pending:
+                raise RuntimeError(f"Disbursement {disbursement.id} is still being submitted")
+            if disbursement and disbursement.status == DisbursementStatus.processing:
+                disbursement.failure_reason = 'B2C Timeout'
+                self._handle_disbursement_failure(disbursement, definitive=False)
+            db.session.commit()
 
         except Exception as e:
-            current_app.logger.error(f"Failed to trigger artisan disbursements: {str(e)}") 
+            current_app.logger.error(f"B2C timeout processing failed: {str(e)}")
             db.session.rollback()
+            raise
 
-    def _handle_disbursement_failure(self, disbursement):
-        """Handle failed disbursement with retry logic"""
+    def execute_disbursement(self, disbursement):
+        """
+        Submit a queued disbursement to B2C and record the outcome
+
+        Called by the disbursement workers; the caller commits. The attempt's
+        idempotency key is committed before the request is sent, so a resend
+        after a crash or timeout carries the same OriginatorConversationID.
+        An accepted request moves the row to processing until the B2C result
+        callback arrives. A request Daraja rejected (4xx) goes through the
+        retry policy as a new attempt. After a 5xx, timeout or transport error
+        Daraja may still have accepted the request, so the row also waits in
+        processing for its result (matched by OriginatorConversationID) and
+        the same attempt is only resent if none arrives within
+        DISBURSEMENT_RESULT_TIMEOUT (see disbursement_queue.expire_unanswered_submissions).
+        """
+        if not disbursement.idempotency_key:
+            disbursement.idempotency_key = str(uuid.uuid4())
+            db.session.commit()
+
+        result = self.disburse_to_artisan(disbursement.id)
+        status_code = result.get('status_code')
+        if result['success']:
+            disbursement.status = DisbursementStatus.processing
+            disbursement.mpesa_transaction_id = result.get('conversation_id')
+            disbursement.next_attempt_at = None
+        elif status_code is not None and 400 <= status_code < 500 and status_code != 408:
+            disbursement.failure_reason = result.get('error')
+            self._handle_disbursement_failure(disbursement, definitive=True)
+        else:
+            disbursement.status = DisbursementStatus.processing
+            disbursement.failure_reason = result.get('error')
+            disbursement.next_attempt_at = datetime.utcnow() + timedelta(
+                seconds=current_app.config['DISBURSEMENT_RESULT_TIMEOUT']
+            )
+            current_app.logger.warning(
+                f"Disbursement {disbursement.id} outcome unknown, awaiting B2C result: {result.get('error')}"
+            )
+        return result['success']
+
+    def _find_disbursement(self, result):
+        """Match a B2C result/timeout by ConversationID, or by our OriginatorConversationID"""
+        conversation_id = result.get('ConversationID') or result.get('ConversationId')
+        if conversation_id:
+            disbursement = ArtisanDisbursement.query.filter_by(mpesa_transaction_id=conversation_id).first()
+            if disbursement:
+                return disbursement
+        # A result for an earlier send of the current attempt
+        originator_id = result.get('OriginatorConversationID')
+        if originator_id:
+            return ArtisanDisbursement.query.filter_by(idempotency_key=originator_id).first()
+        return None
+
+    def _queue_artisan_disbursements(self, payment):
+        """
+        Create one pending disbursement per artisan in the paid order
+
+        The rows are committed with the payment and picked up by the
+        disbursement workers (flask disbursements work), so the callback
+        never waits on a B2C request. In batched settlement mode the rows are
+        accrued instead, and paid out later in one transfer per artisan
+        (app/services/settlement_service.py).
+        """
+        status = DisbursementStatus.accrued if batched_settlement() else DisbursementStatus.pending
+        order_items = OrderItem.query.filter_by(order_id=payment.order_id).all()
+
+        # Group by artisan
+        artisan_totals = {}
+        for item in order_items:
+            artisan_id = item.artisan_id
+            if artisan_id not in artisan_totals:
+                artisan_totals[artisan_id] = 0
+            artisan_totals[artisan_id] += float(item.total_price)
+
+        artisans = {u.id: u for u in User.query.filter(User.id.in_(list(artisan_totals))).all()}
+        for artisan_id, amount in artisan_totals.items():
+            artisan = artisans.get(artisan_id)
+            if not artisan:
+                current_app.logger.error(f"Artisan {artisan_id} not found for payment {payment.id}")
+                continue
+
+            db.session.add(ArtisanDisbursement(
+                payment_id=payment.id,
+                artisan_id=artisan_id,
+                amount=amount,
+                status=status,
+                disbursement_method=artisan.payment_method.value if artisan.payment_method else 'phone',
+                recipient_phone=artisan.mpesa_phone,
+                paybill_number=artisan.paybill_number,
+                paybill_account=artisan.paybill_account
+            ))
+
+    def _handle_disbursement_failure(self, disbursement, definitive=True):
+        """
+        Handle failed disbursement with retry logic
+
+        Args:
+            definitive (bool): Daraja reported the failure, so the retry is a
+                new request with a new idempotency key. False when the outcome
+                is unknown (timeouts, transport errors) and the retry must
+                resend the same attempt.
+        """
         try:
-            disbursement.retry_count += 1
+            disbursement.retry_count = (disbursement.retry_count or 0) + 1
             disbursement.last_retry_at = datetime.utcnow() 
+            if definitive:
+                disbursement.idempotency_key = None
 
             if disbursement.retry_count < 5:
-                # Schedule retry with exponential backoff
-                retry_delays = [300, 900, 3600, 21600, 86400]  # 5min, 15min, 1hr, 6hr, 24hr
-                delay = retry_delays[disbursement.retry_count - 1]
-
-                # In a real implementation, you'd use a task queue like Celery
-                # For now, we'll mark as retry and log
+                # Schedule retry with jittered exponential backoff; the retry
+                # scheduler (app/services/disbursement_queue.py) re-queues it when due
+                delay = RETRY_DELAYS[disbursement.retry_count - 1]
+                delay *= 1 + random.uniform(-RETRY_JITTER, RETRY_JITTER)
                 disbursement.status = DisbursementStatus.retry
-                current_app.logger.info(f"Disbursement {disbursement.id} scheduled for retry in {delay} seconds")
+                disbursement.next_attempt_at = disbursement.last_retry_at + timedelta(seconds=delay)
+                current_app.logger.info(f"Disbursement {disbursement.id} scheduled for retry in {int(delay)} seconds")
 
                 # Notify artisan of retry
                 send_notification(disbursement.artisan_id, 'disbursement_retry', {
                     'amount': float(disbursement.amount),
                     'retry_count': disbursement.retry_count,
-                    'next_retry': (datetime.utcnow() + timedelta(seconds=delay)).isoformat() 
+                    'next_retry': disbursement.next_attempt_at.isoformat()
                 })
 
             else:
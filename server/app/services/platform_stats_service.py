@@ -0,0 +1,246 @@
+"""
+Platform statistics service for Soko Safi
+Computes the admin dashboard counters and daily activity series
+
+Counters come from one aggregate query per table, using `COUNT(*) FILTER
+(WHERE ...)` so every breakdown of a table is read in a single pass, and are
+cached in-process for a short TTL (ADMIN_STATS_TTL, default 60s).
+
+Daily series (signups, orders, GMV) are served from the platform_daily_stats
+rollup table. Closed days are rolled up from users and orders; the trailing
+ROLLUP_REFRESH_DAYS are recomputed whenever the cache lapses so late status
+changes (cancellations, refunds) are picked up, and today is always computed
+live. GMV counts orders included in artisan sales (see metrics_service).
+"""
+
+import threading
+import time
+from datetime import datetime, date, timedelta
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from app.models import db, User, UserRole, Product, Order, OrderStatus, Category, PlatformDailyStats
+
+SERIES_WINDOWS = (30, 90, 365)
+ROLLUP_REFRESH_DAYS = 7
+RECENT_DAYS = 30
+
+stats_cli = AppGroup('stats', help='Admin platform statistics')
+
+
+class PlatformStats:
+    def __init__(self, ttl=60):
+        self.ttl = ttl
+        self._cache = {}
+        self._lock = threading.Lock()
+
+    def get_counters(self):
+        """
+        Platform totals and 30-day activity
+
+        Returns:
+            dict: {'platform_stats': {...}, 'recent_activity': {...}}
+        """
+        return self._cached('counters', self._compute_counters)
+
+    def get_series(self, days=30):
+        """
+        Daily signups, orders and GMV for the last `days` days (including today)
+
+        Args:
+            days (int): One of SERIES_WINDOWS
+
+        Returns:
+            list: One dict per day, oldest first, zero-filled
+        """
+        if days not in SERIES_WINDOWS:
+            raise ValueError(f'days must be one of {", ".join(map(str, SERIES_WINDOWS))}')
+        return self._cached(f'series:{days}', lambda: self._compute_series(days))
+
+    def refresh_rollups(self, since, until=None):
+        """
+        Recompute rollup rows for the closed days in [since, until)
+
+        Args:
+            since (date): First day to rebuild
+            until (date): Day after the last one to rebuild; defaults to today
+        """
+        until = min(until or _today(), _today())
+        if since >= until:
+            return 0
+        buckets = _daily_activity(since, until)
+
+        PlatformDailyStats.query.filter(
+            PlatformDailyStats.day >= since,
+            PlatformDailyStats.day < until
+        ).delete(synchronize_session=False)
+        db.session.add_all([
+            PlatformDailyStats(day=day, **buckets.get(day, _empty_bucket()))
+            for day in _days(since, until)
+        ])
+        db.session.commit()
+        return (until - since).days
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+    def _cached(self, key, compute):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._cache.get(key)
+            if entry and entry[1] > now:
+                return entry[0]
+
+        value = compute()
+        ttl = current_app.config.get('ADMIN_STATS_TTL', self.ttl)
+        with self._lock:
+            self._cache[key] = (value, now + ttl)
+        return value
+
+    def _compute_counters(self):
+        recent = datetime.utcnow() - timedelta(days=RECENT_DAYS)
+        active_user = User.deleted_at.is_(None)
+        active_product = Product.deleted_at.is_(None)
+
+        users = db.session.query(
+            func.count().filter(active_user),
+            func.count().filter(active_user, User.role == UserRole.artisan),
+            func.count().filter(active_user, User.role == UserRole.buyer),
+            func.count().filter(active_user, User.created_at >= recent)
+        ).select_from(User).one()
+        products = db.session.query(
+            func.count().filter(active_product),
+            func.count().filter(active_product, Product.created_at >= recent)
+        ).select_from(Product).one()
+        orders = db.session.query(
+            func.count(),
+            func.count().filter(Order.placed_at >= recent)
+        ).select_from(Order).one()
+        categories = db.session.query(func.count()).filter(Category.deleted_at.is_(None)).scalar()
+
+        return {
+            'platform_stats': {
+                'total_users': users[0],
+                'total_artisans': users[1],
+                'total_buyers': users[2],
+                'total_products': products[0],
+                'total_orders': orders[0],
+                'total_categories': categories
+            },
+            'recent_activity': {
+                'new_users_30d': users[3],
+                'new_products_30d': products[1],
+                'new_orders_30d': orders[1]
+            }
+        }
+
+    def _compute_series(self, days):
+        today = _today()
+        since = today - timedelta(days=days - 1)
+        self._ensure_rollups(since)
+
+        rows = {row.day: row for row in PlatformDailyStats.query.filter(
+            PlatformDailyStats.day >= since,
+            PlatformDailyStats.day < today
+        )}
+        live = _daily_activity(today, today + timedelta(days=1)).get(today, _empty_bucket())
+
+        series = []
+        for day in _days(since, today + timedelta(days=1)):
+            if day == today:
+                bucket = live
+            elif day in rows:
+                row = rows[day]
+                bucket = {'signups': row.signups, 'orders': row.orders, 'gmv': row.gmv}
+            else:
+                bucket = _empty_bucket()
+            series.append({
+                'date': day.isoformat(),
+                'signups': bucket['signups'],
+                'orders': bucket['orders'],
+                'gmv': float(bucket['gmv'] or 0)
+            })
+        return series
+
+    def _ensure_rollups(self, since):
+        today = _today()
+        first_day = db.session.query(func.min(PlatformDailyStats.day)).scalar()
+        if first_day is None or first_day > since:
+            start = since
+        else:
+            start = max(since, today - timedelta(days=ROLLUP_REFRESH_DAYS))
+        try:
+            self.refresh_rollups(start, today)
+        except IntegrityError:
+            # Another worker rolled up the same days; serve what it wrote
+            db.session.rollback()
+
+
+def _daily_activity(since, until):
+    """Signups, orders and GMV per day for [since, until), one grouped query per table"""
+    start, end = _midnight(since), _midnight(until)
+    buckets = {}
+
+    signup_day = func.date(User.created_at)
+    for day, count in db.session.query(signup_day, func.count()).filter(
+        User.created_at >= start,
+        User.created_at < end,
+        User.deleted_at.is_(None)
+    ).group_by(signup_day):
+        buckets.setdefault(_as_date(day), _empty_bucket())['signups'] = count
+
+    order_day = func.date(Order.placed_at)
+    for day, count, gmv in db.session.query(
+        order_day,
+        func.count().filter(Order.status != OrderStatus.cart),
+        func.coalesce(func.sum(Order.total_amount).filter(Order.metrics_counted.is_(True)), 0)
+    ).filter(
+        Order.placed_at >= start,
+        Order.placed_at < end
+    ).group_by(order_day):
+        bucket = buckets.setdefault(_as_date(day), _empty_bucket())
+        bucket['orders'] = count
+        bucket['gmv'] = gmv
+    return buckets
+
+
+def _empty_bucket():
+    return {'signups': 0, 'orders': 0, 'gmv': 0}
+
+
+def _days(since, until):
+    return [since + timedelta(days=offset) for offset in range((until - since).days)]
+
+
+def _today():
+    # Timestamps are stored in UTC, so day buckets are UTC days
+    return datetime.utcnow().date()
+
+
+def _midnight(day):
+    return datetime(day.year, day.month, day.day)
+
+
+def _as_date(value):
+    return date.fromisoformat(value) if isinstance(value, str) else value
+
+
+@stats_cli.command('rollup')
+@click.option('--days', default=max(SERIES_WINDOWS), show_default=True, help='Closed days to rebuild')
+def rollup_command(days):
+    """Rebuild the daily platform rollups"""
+    try:
+        rebuilt = platform_stats.refresh_rollups(_today() - timedelta(days=days))
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Failed to roll up platform stats: {str(e)}")
+        raise click.ClickException(str(e))
+    platform_stats.clear()
+    click.echo(f'Rolled up {rebuilt} days')
+
+
+# Global service instance
+platform_stats = PlatformStats()
@@ -0,0 +1,144 @@
+"""
+Rating service for Soko Safi
+Maintains per-product and per-artisan rating aggregates (review count, rating
+sum and a 1-5 star histogram) so ratings can be shown without scanning reviews
+
+Review handlers call record_review / update_review / remove_review inside their
+transaction; each applies atomic `col = col + delta` updates, so concurrent
+reviews of the same product don't lose increments.
+"""
+
+from flask import current_app
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from app.models import db, Review, Product, ProductRating, ArtisanRating
+
+
+def valid_rating(rating):
+    """Coerce a rating to an int in 1..5, or None if it isn't one"""
+    try:
+        rating = int(rating)
+    except (TypeError, ValueError):
+        return None
+    return rating if 1 <= rating <= 5 else None
+
+
+def empty_summary():
+    return {'average': 0, 'count': 0, 'histogram': {str(star): 0 for star in range(1, 6)}}
+
+
+def record_review(review):
+    """Count a new review"""
+    _apply(review.product_id, review.rating, 1)
+
+
+def update_review(review, old_product_id, old_rating):
+    """Move a review's contribution from its previous product/rating to the current one"""
+    if old_product_id == review.product_id and valid_rating(old_rating) == valid_rating(review.rating):
+        return
+    _apply(old_product_id, old_rating, -1)
+    _apply(review.product_id, review.rating, 1)
+
+
+def remove_review(review):
+    """Uncount a review that is being deleted"""
+    _apply(review.product_id, review.rating, -1)
+
+
+def get_product_ratings(product_ids):
+    """
+    Rating summaries for a list of products in one query
+
+    Returns:
+        dict: product_id -> summary dict; products without reviews are omitted
+    """
+    product_ids = {pid for pid in product_ids if pid}
+    if not product_ids:
+        return {}
+    rows = ProductRating.query.filter(ProductRating.product_id.in_(product_ids)).all()
+    return {row.product_id: row.to_dict() for row in rows}
+
+
+def get_product_rating(product_id):
+    row = db.session.get(ProductRating, product_id)
+    return row.to_dict() if row else empty_summary()
+
+
+def get_artisan_rating(artisan_id):
+    row = db.session.get(ArtisanRating, artisan_id)
+    return row.to_dict() if row else empty_summary()
+
+
+def backfill_ratings():
+    """
+    Build the aggregates from existing reviews when they have never been built.
+    Expects an active app context (called at startup once the schema is current).
+    """
+    try:
+        if ProductRating.query.first() is not None or Review.query.first() is None:
+            return
+        rebuild_ratings()
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Failed to backfill rating aggregates: {str(e)}")
+
+
+def rebuild_ratings():
+    """Recompute every aggregate from the reviews table"""
+    rows = db.session.query(
+        Review.product_id, Product.artisan_id, Review.rating, func.count(Review.id)
+    ).join(
+        Product, Review.product_id == Product.id
+    ).filter(
+        Review.rating.between(1, 5)
+    ).group_by(Review.product_id, Product.artisan_id, Review.rating).all()
+
+    products, artisans = {}, {}
+    for product_id, artisan_id, rating, count in rows:
+        targets = [(products, ProductRating, 'product_id', product_id)]
+        if artisan_id:
+            targets.append((artisans, ArtisanRating, 'artisan_id', artisan_id))
+        for rows_by_key, model, key_name, key in targets:
+            aggregate = rows_by_key.get(key)
+            if aggregate is None:
+                aggregate = rows_by_key[key] = model(**{key_name: key}, **_zero_counts())
+            aggregate.review_count += count
+            aggregate.rating_sum += rating * count
+            setattr(aggregate, f'stars_{rating}', getattr(aggregate, f'stars_{rating}') + count)
+
+    ProductRating.query.delete()
+    ArtisanRating.query.delete()
+    db.session.add_all(list(products.values()) + list(artisans.values()))
+    db.session.commit()
+
+
+def _apply(product_id, rating, sign):
+    rating = valid_rating(rating)
+    if not product_id or rating is None:
+        return
+    artisan_id = db.session.query(Product.artisan_id).filter(Product.id == product_id).scalar()
+    _bump(ProductRating, ProductRating.product_id, product_id, rating, sign)
+    if artisan_id:
+        _bump(ArtisanRating, ArtisanRating.artisan_id, artisan_id, rating, sign)
+
+
+def _bump(model, key_column, key, rating, sign):
+    if db.session.query(key_column).filter(key_column == key).first() is None:
+        try:
+            with db.session.begin_nested():
+                db.session.add(model(**{key_column.key: key}, **_zero_counts()))
+        except IntegrityError:
+            pass  # Created concurrently; fall through to the increment
+
+    star_column = f'stars_{rating}'
+    model.query.filter(key_column == key).update({
+        'review_count': model.review_count + sign,
+        'rating_sum': model.rating_sum + sign * rating,
+        star_column: getattr(model, star_column) + sign,
+    }, synchronize_session=False)
+
+
+def _zero_counts():
+    counts = {'review_count': 0, 'rating_sum': 0}
+    counts.update({f'stars_{star}': 0 for star in range(1, 6)})
+    return counts
@@ -0,0 +1,231 @@
+"""
+M-Pesa statement reconciliation for Soko Safi
+Checks payments and artisan disbursements against what M-Pesa settled
+
+`flask payments reconcile STATEMENT` reads an M-Pesa organisation statement
+in the portal's CSV export format. Paid In lines are matched to payments and
+Withdrawn lines to disbursements by receipt number (mpesa_transaction_id).
+The statement is streamed in batches, each resolved with one IN lookup per
+table on the unique mpesa_transaction_id index, so memory stays constant
+however long the statement is. Matched rows are stamped with reconciled_at.
+A final pass streams the successful rows that completed within the
+statement's time span but were not stamped, i.e. that M-Pesa has no record of.
+Earnings paid out in a batched settlement are covered by their payout's line.
+
+Every mismatch is written as one line of a CSV report:
+- not_recorded: a completed statement line with no matching record
+- amount_mismatch: the statement and the record disagree on the amount
+- status_mismatch: completed on one side only
+- not_in_statement: a successful record missing from the statement
+"""
+
+import csv
+from collections import Counter
+from datetime import datetime, timedelta
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+import click
+from flask import current_app
+from flask.cli import AppGroup
+from sqlalchemy import and_, or_
+from app.models import db, Payment, PaymentStatus, ArtisanDisbursement, DisbursementStatus
+
+payments_cli = AppGroup('payments', help='M-Pesa payments')
+
+# Statement lines resolved per lookup (also bounds the IN list size)
+BATCH_SIZE = 500
+# Statement times are East Africa Time; records are stored in UTC
+STATEMENT_UTC_OFFSET = timedelta(hours=3)
+STATEMENT_TIME_FORMATS = ('%Y-%m-%d %H:%M:%S', '%d-%m-%Y %H:%M:%S', '%d/%m/%Y %H:%M:%S', '%d.%m.%Y %H:%M:%S')
+
+REPORT_FIELDS = [
+    'issue', 'receipt', 'record_type', 'record_id', 'statement_amount', 'recorded_amount',
+    'statement_status', 'recorded_status', 'completion_time'
+]
+
+# record type: (model, successful status, column holding the completion time,
+#               filter for the rows M-Pesa settles one by one)
+# Earnings paid out in a batched settlement have no receipt of their own;
+# their settlement payout is what appears on the statement.
+RECORDS = {
+    'payment': (
+        Payment, PaymentStatus.success, Payment.received_at,
+        Payment.mpesa_transaction_id.isnot(None)
+    ),
+    'disbursement': (
+        ArtisanDisbursement, DisbursementStatus.success, ArtisanDisbursement.completed_at,
+        and_(ArtisanDisbursement.mpesa_transaction_id.isnot(None), ArtisanDisbursement.settlement_id.is_(None))
+    ),
+}
+
+
+def read_statement(stream):
+    """
+    Yield the transactions of an M-Pesa statement CSV export
+
+    Account details above the "Receipt No." header and transaction charge
+    lines (which share their transaction's receipt number) are skipped.
+    """
+    reader = csv.reader(stream)
+    for row in reader:
+        if row and row[0].strip().startswith('Receipt No'):
+            header = [column.strip() for column in row]
+            break
+    else:
+        raise ValueError('No "Receipt No." header row found in statement')
+
+    for row in reader:
+        if not row or not row[0].strip():
+            continue
+        line = dict(zip(header, (value.strip() for value in row)))
+        if 'charge' in line.get('Details', '').lower() or 'charge' in line.get('Reason Type', '').lower():
+            continue
+        paid_in = _amount(line.get('Paid In'))
+        yield {
+            'receipt': line[header[0]],
+            'record_type': 'payment' if paid_in else 'disbursement',
+            'amount': paid_in or _amount(line.get('Withdrawn')),
+            'status': line.get('Transaction Status', ''),
+            'completed_at': _statement_time(line.get('Completion Time')),
+        }
+
+
+def reconcile_statement(stream, report, batch_size=BATCH_SIZE):
+    """
+    Match a statement against payments and disbursements
+
+    Args:
+        stream: Statement CSV, as a text file
+        report: Text file the mismatch report CSV is written to
+        batch_size (int): Statement lines per lookup
+
+    Returns:
+        Counter: Matched lines and mismatches by issue
+    """
+    run_started = datetime.utcnow()
+    writer = csv.DictWriter(report, REPORT_FIELDS)
+    writer.writeheader()
+    summary = Counter()
+    first = last = None
+
+    transactions = read_statement(stream)
+    while batch := list(islice(transactions, batch_size)):
+        for record_type in RECORDS:
+            lines = [line for line in batch if line['record_type'] == record_type]
+            if lines:
+                _reconcile_lines(record_type, lines, run_started, writer, summary)
+        db.session.commit()
+
+        times = [line['completed_at'] for line in batch if line['completed_at']]
+        if times:
+            first = min(times + ([first] if first else []))
+            last = max(times + ([last] if last else []))
+
+    if first:
+        for record_type in RECORDS:
+            _report_unreconciled(record_type, (first, last), run_started, writer, summary)
+    return summary
+
+
+def _reconcile_lines(record_type, lines, run_started, writer, summary):
+    """Look up one batch of statement lines and report those that disagree"""
+    model, success, _, _ = RECORDS[record_type]
+    records = {
+        record.mpesa_transaction_id: record
+        for record in db.session.query(
+            model.id, model.mpesa_transaction_id, model.amount, model.status
+        ).filter(model.mpesa_transaction_id.in_({line['receipt'] for line in lines}))
+    }
+
+    for line in lines:
+        record = records.get(line['receipt'])
+        completed = line['status'].lower() == 'completed'
+        if record is None:
+            if not completed:
+                summary['skipped'] += 1  # A failed transaction we never recorded either
+                continue
+            issue = 'not_recorded'
+        elif completed != (record.status == success):
+            issue = 'status_mismatch'
+        elif record.amount != line['amount']:
+            issue = 'amount_mismatch'
+        else:
+            summary['matched'] += 1
+            continue
+        summary[issue] += 1
+        _write(writer, issue, record_type, line, record)
+
+    if records:
+        model.query.filter(model.id.in_([record.id for record in records.values()])).update(
+            {model.reconciled_at: run_started}, synchronize_session=False
+        )
+
+
+def _report_unreconciled(record_type, span, run_started, writer, summary):
+    """Report successful records completed within the statement span but not on it"""
+    model, success, completed_at, settled_individually = RECORDS[record_type]
+    start, end = (moment - STATEMENT_UTC_OFFSET for moment in span)
+    # Statement times are whole seconds; a record may complete within the last one
+    missing = db.session.query(
+        model.id, model.mpesa_transaction_id, model.amount, model.status, completed_at.label('completed_at')
+    ).filter(
+        model.status == success,
+        settled_individually,
+        completed_at >= start,
+        completed_at < end + timedelta(seconds=1),
+        or_(model.reconciled_at.is_(None), model.reconciled_at < run_started)
+    ).order_by(completed_at).yield_per(BATCH_SIZE)
+
+    for record in missing:
+        summary['not_in_statement'] += 1
+        _write(writer, 'not_in_statement', record_type, None, record)
+
+
+def _write(writer, issue, record_type, line, record):
+    completed_at = line['completed_at'] if line else record.completed_at + STATEMENT_UTC_OFFSET
+    writer.writerow({
+        'issue': issue,
+        'receipt': line['receipt'] if line else record.mpesa_transaction_id,
+        'record_type': record_type,
+        'record_id': record.id if record else '',
+        'statement_amount': line['amount'] if line else '',
+        'recorded_amount': record.amount if record else '',
+        'statement_status': line['status'] if line else '',
+        'recorded_status': record.status.value if record else '',
+        'completion_time': completed_at.isoformat(' ', 'seconds') if completed_at else '',
+    })
+
+
+def _amount(value):
+    """Statement amounts look like "1,250.00"; withdrawals may carry a minus sign"""
+    try:
+        return abs(Decimal(value.replace(',', ''))) if value else Decimal(0)
+    except InvalidOperation:
+        return Decimal(0)
+
+
+def _statement_time(value):
+    for time_format in STATEMENT_TIME_FORMATS:
+        try:
+            return datetime.strptime(value or '', time_format)
+        except ValueError:
+            continue
+    return None
+
+
+@payments_cli.command('reconcile')
+@click.argument('statement', type=click.File('r', encoding='utf-8-sig'))
+@click.option('--output', '-o', type=click.File('w'), default='-', help='Mismatch report CSV [default: stdout]')
+@click.option('--batch-size', type=int, default=BATCH_SIZE, show_default=True, help='Statement lines per lookup')
+def reconcile_command(statement, output, batch_size):
+    """Reconcile payments and disbursements against an M-Pesa statement CSV"""
+    try:
+        summary = reconcile_statement(statement, output, batch_size)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Statement reconciliation failed: {str(e)}")
+        raise click.ClickException(str(e))
+    for issue, count in sorted(summary.items()):
+        click.echo(f'{issue}: {count}', err=True)
@@ -0,0 +1,205 @@
+"""
+Response cache for Soko Safi
+Caches public GET responses keyed by path and query string, with tag-based
+invalidation and ETag / If-None-Match revalidation
+
+Each cached entry records the version of every tag it depends on (e.g.
+`product:<id>`, `user:<id>`, `categories`). Write handlers call
+`response_cache.invalidate(...)` after committing, which bumps those tag
+versions; entries stamped with an older version are treated as misses. A read
+that races a write can store a stale entry, which then lives at most
+RESPONSE_CACHE_TTL seconds.
+
+Backends (RESPONSE_CACHE_BACKEND):
+- memory: a per-process LRU; invalidation only reaches the current worker
+- redis: shared by all workers at REDIS_URL (requires the `redis` package)
+- none: caching disabled; ETags are still sent
+"""
+
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+from urllib.parse import urlencode
+import msgspec
+from msgspec import msgpack
+from flask import current_app, request
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = 'soko_safi:resp:'
+TAG_PREFIX = 'soko_safi:tag:'
+
+
+class MemoryCacheBackend:
+    """
+    Process-local LRU implementing the Redis commands the cache uses
+    (GET / SET EX / MGET / INCR). Tag versions are kept outside the LRU so an
+    eviction can never roll a version back to one an old entry was stamped with.
+    """
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._versions = {}
+        self._lock = threading.Lock()
+
+    def get(self, name):
+        with self._lock:
+            if name.startswith(TAG_PREFIX):
+                return self._versions.get(name)
+            entry = self._entries.get(name)
+            if entry is None:
+                return None
+            if entry[1] is not None and entry[1] <= time.monotonic():
+                del self._entries[name]
+                return None
+            self._entries.move_to_end(name)
+            return entry[0]
+
+    def set(self, name, value, ex=None):
+        expires_at = time.monotonic() + ex if ex else None
+        with self._lock:
+            self._entries[name] = (value, expires_at)
+            self._entries.move_to_end(name)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return True
+
+    def mget(self, names):
+        return [self.get(name) for name in names]
+
+    def incr(self, name):
+        with self._lock:
+            self._versions[name] = self._versions.get(name, 0) + 1
+            return self._versions[name]
+
+
+class ResponseCache:
+    def __init__(self):
+        self.backend = None
+        self.ttl = 60
+
+    def init_app(self, app, backend=None):
+        """
+        Configure the cache from RESPONSE_CACHE_* settings
+
+        Args:
+            backend: Optional pre-built backend (e.g. a MemoryCacheBackend in tests)
+
+        Raises:
+            ValueError: If the backend is unknown or misconfigured
+        """
+        self.ttl = app.config.get('RESPONSE_CACHE_TTL', self.ttl)
+        self.backend = backend if backend is not None else _create_backend(app)
+
+    def cached(self, tags):
+        """
+        Cache a resource's GET responses
+
+        Args:
+            tags (callable): Called as tags(data, **view_kwargs) with the
+                response body; returns the tags the response depends on
+        """
+        def decorator(view):
+            @wraps(view)
+            def wrapper(*args, **kwargs):
+                key = _request_key()
+                entry = self._load(key)
+                if entry is None:
+                    data, status, headers = _unpack(view(*args, **kwargs))
+                    if status != 200:
+                        return data, status, headers
+                    entry = {'data': data, 'etag': _etag(data), 'tags': {}}
+                    self._store(key, entry, tags(data, **kwargs))
+
+                headers = {'ETag': f'"{entry["etag"]}"', 'Cache-Control': 'no-cache'}
+                if request.if_none_match.contains(entry['etag']):
+                    return current_app.response_class(status=304, headers=headers)
+                return entry['data'], 200, headers
+            return wrapper
+        return decorator
+
+    def invalidate(self, *tags):
+        """Expire every cached response that depends on any of the tags"""
+        if self.backend is None:
+            return
+        for tag in {tag for tag in tags if tag and not tag.endswith(':None')}:
+            try:
+                self.backend.incr(TAG_PREFIX + tag)
+            except Exception as e:
+                logger.warning('Response cache invalidation failed', extra={'tag': tag, 'error': str(e)})
+
+    def _load(self, key):
+        if self.backend is None:
+            return None
+        try:
+            raw = self.backend.get(key)
+            if raw is None:
+                return None
+            entry = msgpack.decode(raw)
+            tags = list(entry['tags'])
+            current = self.backend.mget([TAG_PREFIX + tag for tag in tags]) if tags else []
+        except Exception as e:
+            logger.warning('Response cache read failed', extra={'error': str(e)})
+            return None
+        if any(_version(value) != entry['tags'][tag] for tag, value in zip(tags, current)):
+            return None
+        return entry
+
+    def _store(self, key, entry, tags):
+        if self.backend is None:
+            return
+        try:
+            tags = sorted({tag for tag in tags if tag and not tag.endswith(':None')})
+            versions = self.backend.mget([TAG_PREFIX + tag for tag in tags]) if tags else []
+            entry['tags'] = {tag: _version(value) for tag, value in zip(tags, versions)}
+            self.backend.set(key, msgpack.encode(entry), ex=self.ttl)
+        except Exception as e:
+            logger.warning('Response cache write failed', extra={'error': str(e)})
+
+
+def _create_backend(app):
+    backend = app.config.get('RESPONSE_CACHE_BACKEND', 'memory')
+    if backend == 'none':
+        return None
+    if backend == 'memory':
+        return MemoryCacheBackend(app.config.get('RESPONSE_CACHE_SIZE', 1024))
+    if backend == 'redis':
+        redis_url = app.config.get('REDIS_URL')
+        if not redis_url:
+            raise ValueError('REDIS_URL environment variable is required for the redis response cache')
+        try:
+            import redis
+        except ImportError:
+            raise ValueError('The redis response cache requires the `redis` package')
+        return redis.Redis.from_url(redis_url, socket_timeout=1, socket_connect_timeout=1)
+    raise ValueError(f'Unknown RESPONSE_CACHE_BACKEND: {backend}')
+
+
+def _request_key():
+    query = urlencode(sorted(request.args.items(multi=True)))
+    return f'{KEY_PREFIX}{request.path}?{query}'
+
+
+def _unpack(result):
+    if isinstance(result, tuple):
+        data = result[0]
+        status = result[1] if len(result) > 1 else 200
+        headers = result[2] if len(result) > 2 else {}
+        return data, status, headers
+    return result, 200, {}
+
+
+def _etag(data):
+    return hashlib.sha1(msgspec.json.encode(data, order='sorted')).hexdigest()
+
+
+def _version(value):
+    return int(value) if value is not None else 0
+
+
+# Global service instance
+response_cache = ResponseCache()
@@ -0,0 +1,205 @@
+"""
+Product search service for Soko Safi
+Maintains a full-text index over products and answers ranked search queries
+
+The index lives in a `product_search` table holding one denormalized document
+per active product (title, description, category name, artisan name):
+- PostgreSQL: a regular table with a weighted `tsvector` column and a GIN index
+- SQLite: an FTS5 virtual table ranked with bm25()
+Other dialects fall back to a LIKE scan over products.
+
+The table is created and filled by migration e7b3d1f5a286 (`flask db upgrade`);
+`ensure_index` recreates it at startup if it has gone missing or empty.
+"""
+
+import re
+from flask import current_app
+from sqlalchemy import text
+from app.models import db, Product, Category, User
+
+MAX_QUERY_TERMS = 8
+
+_POSTGRES_DDL = [
+    """
+    CREATE TABLE IF NOT EXISTS product_search (
+        product_id VARCHAR(36) PRIMARY KEY REFERENCES products(id) ON DELETE CASCADE,
+        title TEXT,
+        description TEXT,
+        category TEXT,
+        artisan TEXT,
+        document TSVECTOR
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_product_search_document ON product_search USING GIN (document)",
+]
+
+_SQLITE_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS product_search USING fts5(
+        product_id UNINDEXED, title, description, category, artisan,
+        tokenize = 'porter unicode61'
+    )
+    """,
+]
+
+_POSTGRES_UPSERT = text("""
+    INSERT INTO product_search (product_id, title, description, category, artisan, document)
+    VALUES (
+        :product_id, :title, :description, :category, :artisan,
+        setweight(to_tsvector('english', coalesce(:title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(:category, '')), 'B') ||
+        setweight(to_tsvector('simple', coalesce(:artisan, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(:description, '')), 'C')
+    )
+    ON CONFLICT (product_id) DO UPDATE SET
+        title = EXCLUDED.title,
+        description = EXCLUDED.description,
+        category = EXCLUDED.category,
+        artisan = EXCLUDED.artisan,
+        document = EXCLUDED.document
+""")
+
+
+class ProductSearchIndex:
+    @property
+    def dialect(self):
+        return db.engine.dialect.name
+
+    def ensure_index(self):
+        """
+        Create the search index if missing and backfill it when empty (the
+        migration autogenerate ignores these tables, so nothing else repairs them).
+        Expects an active app context (called at startup once the schema is current).
+        """
+        try:
+            ddl = {'postgresql': _POSTGRES_DDL, 'sqlite': _SQLITE_DDL}.get(self.dialect)
+            if not ddl:
+                return
+            with db.engine.begin() as conn:
+                for statement in ddl:
+                    conn.execute(text(statement))
+            if db.session.execute(text("SELECT 1 FROM product_search LIMIT 1")).first() is None:
+                self.rebuild()
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.error(f"Failed to prepare product search index: {str(e)}")
+
+    def rebuild(self):
+        """Reindex every active product in one pass"""
+        rows = db.session.query(Product, Category.name, User.full_name).outerjoin(
+            Category, Product.category_id == Category.id
+        ).outerjoin(
+            User, Product.artisan_id == User.id
+        ).filter(Product.status == 'active').all()
+
+        db.session.execute(text("DELETE FROM product_search"))
+        for product, category_name, artisan_name in rows:
+            self._write(self._document(product, category_name, artisan_name))
+        db.session.commit()
+
+    def index_product(self, product):
+        """
+        Add or refresh a product's entry. Runs inside the caller's transaction,
+        so the index commits (or rolls back) together with the product row.
+        """
+        if self.dialect not in ('postgresql', 'sqlite'):
+            return
+
+        # Flush so column defaults (id, status) are populated on new products
+        db.session.flush()
+        if product.status != 'active':
+            self.remove_product(product.id)
+            return
+
+        category_name = db.session.query(Category.name).filter(
+            Category.id == product.category_id
+        ).scalar() if product.category_id else None
+        artisan_name = db.session.query(User.full_name).filter(
+            User.id == product.artisan_id
+        ).scalar() if product.artisan_id else None
+        self._write(self._document(product, category_name, artisan_name))
+
+    def remove_product(self, product_id):
+        """Drop a product from the index (inside the caller's transaction)"""
+        if self.dialect not in ('postgresql', 'sqlite'):
+            return
+        db.session.execute(
+            text("DELETE FROM product_search WHERE product_id = :product_id"),
+            {'product_id': product_id}
+        )
+
+    def search(self, query, limit=20, offset=0, category_id=None):
+        """
+        Run a ranked prefix search, optionally within one category
+
+        Returns:
+            list: (product_id, rank) tuples, best match first
+        """
+        terms = self._terms(query)
+        if not terms:
+            return []
+
+        # Filtered inside the query so pages stay full
+        in_category = "AND product_id IN (SELECT id FROM products WHERE category_id = :category_id)" \
+            if category_id else ""
+        if self.dialect == 'postgresql':
+            sql = text(f"""
+                SELECT ps.product_id, ts_rank_cd(ps.document, q.query) AS rank
+                FROM product_search ps, to_tsquery('english', :tsquery) AS q(query)
+                WHERE ps.document @@ q.query {in_category}
+                ORDER BY rank DESC, ps.product_id
+                LIMIT :limit OFFSET :offset
+            """)
+            params = {'tsquery': ' & '.join(f'{t}:*' for t in terms)}
+        elif self.dialect == 'sqlite':
+            # bm25() is lower-is-better; weights follow the column order
+            # (product_id, title, description, category, artisan)
+            sql = text(f"""
+                SELECT product_id, -bm25(product_search, 0.0, 10.0, 2.0, 5.0, 5.0) AS rank
+                FROM product_search
+                WHERE product_search MATCH :match {in_category}
+                ORDER BY rank DESC, product_id
+                LIMIT :limit OFFSET :offset
+            """)
+            params = {'match': ' '.join(f'"{t}"*' for t in terms)}
+        else:
+            return self._like_search(terms, limit, offset, category_id)
+
+        params.update(limit=limit, offset=offset, category_id=category_id)
+        return [(row[0], float(row[1])) for row in db.session.execute(sql, params)]
+
+    def _like_search(self, terms, limit, offset, category_id=None):
+        query = Product.query.with_entities(Product.id).filter(Product.status == 'active')
+        if category_id:
+            query = query.filter(Product.category_id == category_id)
+        for term in terms:
+            pattern = f'%{term}%'
+            query = query.filter(db.or_(Product.title.ilike(pattern), Product.description.ilike(pattern)))
+        rows = query.order_by(Product.created_at.desc()).limit(limit).offset(offset).all()
+        return [(row[0], 0.0) for row in rows]
+
+    def _terms(self, query):
+        return re.findall(r'\w+', (query or '').lower())[:MAX_QUERY_TERMS]
+
+    def _document(self, product, category_name, artisan_name):
+        return {
+            'product_id': product.id,
+            'title': product.title or '',
+            'description': product.description or '',
+            'category': category_name or '',
+            'artisan': artisan_name or '',
+        }
+
+    def _write(self, document):
+        if self.dialect == 'postgresql':
+            db.session.execute(_POSTGRES_UPSERT, document)
+        elif self.dialect == 'sqlite':
+            self.remove_product(document['product_id'])
+            db.session.execute(text("""
+                INSERT INTO product_search (product_id, title, description, category, artisan)
+                VALUES (:product_id, :title, :description, :category, :artisan)
+            """), document)
+
+
+# Global service instance
+product_search = ProductSearchIndex()
@@ -0,0 +1,105 @@
+"""
+Artisan settlement service for Soko Safi
+Pays artisans in periodic batches instead of one B2C transfer per order
+
+With SETTLEMENT_MODE=batched, a successful payment records each artisan's
+share as an `accrued` ArtisanDisbursement instead of a pending one. The
+disbursement workers run `settle_earnings` every SETTLEMENT_INTERVAL seconds.
+Each artisan whose accrued total reaches SETTLEMENT_THRESHOLD, or whose oldest
+accrued earning is older than SETTLEMENT_MAX_AGE seconds, gets one pending
+payout row for the total. That row goes through the normal disbursement queue
+and retry policy. The accrued rows point at their payout through
+settlement_id, and are marked successful with it when the B2C result arrives.
+
+The default SETTLEMENT_MODE=per_order keeps one disbursement per artisan per
+order, executed as soon as the payment succeeds.
+"""
+
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import func
+from app.models import db, ArtisanDisbursement, DisbursementStatus, User
+
+
+def batched_settlement():
+    """Whether payments accrue artisan earnings for batched payouts"""
+    return current_app.config['SETTLEMENT_MODE'] == 'batched'
+
+
+def settle_earnings(threshold, max_age, force=False):
+    """
+    Create payouts for artisans whose accrued earnings are due
+
+    Args:
+        threshold (float): Pay out once an artisan's accrued total reaches this
+        max_age (int): Pay out once the oldest accrued earning is this many seconds old
+        force (bool): Pay out every accrued balance regardless
+
+    Returns:
+        int: Number of settlement payouts created
+    """
+    now = datetime.utcnow()
+    unsettled = (
+        ArtisanDisbursement.status == DisbursementStatus.accrued,
+        ArtisanDisbursement.settlement_id.is_(None)
+    )
+    query = db.session.query(ArtisanDisbursement.artisan_id).filter(*unsettled).group_by(ArtisanDisbursement.artisan_id)
+    if not force:
+        query = query.having(
+            (func.sum(ArtisanDisbursement.amount) >= threshold)
+            | (func.min(ArtisanDisbursement.created_at) <= now - timedelta(seconds=max_age))
+        )
+    due = [row.artisan_id for row in query]
+
+    artisans = {u.id: u for u in User.query.filter(User.id.in_(due)).all()} if due else {}
+    created = 0
+    for artisan_id in due:
+        artisan = artisans.get(artisan_id)
+        if not artisan:
+            current_app.logger.error(f"Artisan {artisan_id} not found for settlement")
+            continue
+        try:
+            payout = ArtisanDisbursement(
+                artisan_id=artisan_id,
+                amount=0,
+                status=DisbursementStatus.pending,
+                disbursement_method=artisan.payment_method.value if artisan.payment_method else 'phone',
+                recipient_phone=artisan.mpesa_phone,
+                paybill_number=artisan.paybill_number,
+                paybill_account=artisan.paybill_account
+            )
+            db.session.add(payout)
+            db.session.flush()
+
+            # Claim the earnings conditionally: with several workers settling
+            # at once, each accrued row joins exactly one payout
+            claimed = ArtisanDisbursement.query.filter(
+                ArtisanDisbursement.artisan_id == artisan_id,
+                ArtisanDisbursement.created_at <= now,
+                *unsettled
+            ).update({ArtisanDisbursement.settlement_id: payout.id}, synchronize_session=False)
+            total = db.session.query(func.sum(ArtisanDisbursement.amount)).filter(
+                ArtisanDisbursement.settlement_id == payout.id
+            ).scalar()
+
+            if not claimed or not total:
+                db.session.rollback()
+                continue
+            payout.amount = total
+            db.session.commit()
+            created += 1
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.error(f"Failed to settle earnings for artisan {artisan_id}: {str(e)}")
+    return created
+
+
+def complete_settlement(payout):
+    """Mark the earnings included in a successful payout as paid"""
+    ArtisanDisbursement.query.filter(
+        ArtisanDisbursement.settlement_id == payout.id,
+        ArtisanDisbursement.status == DisbursementStatus.accrued
+    ).update({
+        ArtisanDisbursement.status: DisbursementStatus.success,
+        ArtisanDisbursement.completed_at: payout.completed_at
+    }, synchronize_session=False)
@@ -0,0 +1,68 @@
+"""
+STK Push reconciliation for Soko Safi
+Resolves payments whose STK callback never arrived
+
+Payments still pending STK_QUERY_AFTER seconds after their last change are
+claimed by the disbursement workers and checked with the STK Push Query API.
+A definitive answer settles the payment exactly as the callback would have
+(MpesaService.apply_stk_result), which pushes the new state to the buyer. A
+payment still being processed is checked again after another STK_QUERY_AFTER
+seconds. Payments older than STK_QUERY_EXPIRY are left for manual review.
+"""
+
+import json
+from datetime import datetime, timedelta
+from flask import current_app
+from app.models import db, Payment, PaymentStatus
+from app.services.mpesa_service import mpesa_service
+
+
+def claim_stuck_payments(limit, query_after, expiry):
+    """
+    Claim up to `limit` pending payments that are due for an STK query
+
+    Claiming touches updated_at with a conditional UPDATE, which both stops
+    other workers from querying the same payment and schedules the next check.
+
+    Returns:
+        list: Claimed payment ids
+    """
+    now = datetime.utcnow()
+    cutoff = now - timedelta(seconds=query_after)
+    due = (
+        Payment.status == PaymentStatus.pending,
+        Payment.mpesa_transaction_id.isnot(None),
+        Payment.updated_at <= cutoff,
+        Payment.created_at >= now - timedelta(seconds=expiry)
+    )
+    candidates = [row.id for row in db.session.query(Payment.id).filter(*due).order_by(Payment.updated_at).limit(limit)]
+
+    claimed = []
+    for payment_id in candidates:
+        if Payment.query.filter(Payment.id == payment_id, *due).update(
+            {Payment.updated_at: now}, synchronize_session=False
+        ):
+            claimed.append(payment_id)
+    db.session.commit()
+    return claimed
+
+
+def reconcile_payment(payment_id):
+    """
+    Query the STK Push outcome of a pending payment and settle it if known
+
+    Returns:
+        bool: Whether the payment was settled
+    """
+    payment = db.session.get(Payment, payment_id)
+    if not payment or payment.status != PaymentStatus.pending:
+        return False
+
+    result = mpesa_service.query_stk_status(payment.mpesa_transaction_id)
+    if 'ResultCode' not in result:
+        return False
+
+    current_app.logger.info(f"Payment {payment.id} reconciled by STK query: {result.get('ResultDesc')}")
+    return mpesa_service.apply_stk_result(
+        payment, str(result['ResultCode']) == '0', result.get('ResultDesc'), payload=json.dumps(result)
+    )
@@ -2,9 +2,20 @@ from flask import request
 from flask_socketio import emit, join_room
 from app.extensions import socketio, connected_users
 from app.models import db, Message
+from app.services.conversation_service import get_conversation, record_message
+from app.auth import decode_token, get_bearer_token
 
 @socketio.on('connect')
-def handle_connect():
+def handle_connect(auth=None):
+    # Clients may authorize with an access token in the Socket.IO `auth`
+    # payload (or an Authorization header) and are joined to their room
+    # immediately, without touching the session store
+    token = auth.get('token') if isinstance(auth, dict) else None
+    claims = decode_token(token or get_bearer_token())
+    if claims:
+        user_id = claims['sub']
+        connected_users[user_id] = request.sid
+        join_room(f'user_{user_id}')
     emit('status', {'msg': 'Connected to server'})
 
 @socketio.on('disconnect')
@@ -50,9 +61,10 @@ def handle_message(data):
         message = Message(
             sender_id=sender_id,
             receiver_id=receiver_id,
-            message=message_text
+            message_text=message_text
         )
         db.session.add(message)
+        record_message(message)
         db.session.commit()
         
         # Send to receiver if online
@@ -64,7 +76,7 @@ def handle_message(data):
                 'id': message.id,
                 'sender_id': sender_id,
                 'message': safe_message,
-                'timestamp': message.timestamp.isoformat()
+                'timestamp': message.created_at.isoformat()
             }, room=connected_users[receiver_id])
         
         # Confirm to sender
@@ -83,17 +95,17 @@ def handle_chat_history(data):
         user1 = data['user1']
         user2 = data['user2']
         
+        conversation = get_conversation(user1, user2)
         messages = Message.query.filter(
-            ((Message.sender_id == user1) & (Message.receiver_id == user2)) |
-            ((Message.sender_id == user2) & (Message.receiver_id == user1))
-        ).order_by(Message.timestamp).limit(100).all()  # Limit to prevent large responses
+            Message.conversation_id == conversation.id
+        ).order_by(Message.created_at).limit(100).all() if conversation else []  # Limit to prevent large responses
         
         chat_history = [{
             'id': msg.id,
             'sender_id': msg.sender_id,
             'receiver_id': msg.receiver_id,
-            'message': msg.message,
-            'timestamp': msg.timestamp.isoformat() if msg.timestamp else None,
+            'message': msg.message_text,
+            'timestamp': msg.created_at.isoformat() if msg.created_at else None,
             'is_read': msg.is_read
         } for msg in messages]
         
@@ -1,47 +1,75 @@
 from datetime import datetime
-import json
-from app.extensions import socketio, connected_users, db
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app.extensions import socketio, db
+
+# Emits waiting for the transaction that stored their notification to commit
+_PENDING_KEY = 'notifications_to_emit'
+
 
 def send_notification(user_id, notification_type, data):
-    """Send real-time notification to user via WebSocket"""
-    try:
-        # Send via WebSocket if user is connected
-        if user_id in connected_users:
-            socketio.emit('notification', {
-                'type': notification_type,
-                'data': data,
-                'timestamp': datetime.utcnow().isoformat()
-            }, room=connected_users[user_id])
-
-        # Also create database notification record
-        from app.models import Notification, NotificationType
-        notification = Notification(
-            user_id=user_id,
-            type=get_notification_type_enum(notification_type),
-            title=get_notification_title(notification_type),
-            message=get_notification_message(notification_type, data),
-            data=json.dumps(data)
-        )
-        db.session.add(notification)
-        db.session.commit()
+    """
+    Store a notification in the caller's transaction and push it to the user via
+    WebSocket once that transaction commits
 
+    The notification is added and flushed in a savepoint, so failing to store it
+    never loses the caller's pending changes; the caller commits. The emit is
+    held until the commit, so a client refetching on receipt sees the new state,
+    and is dropped if the transaction rolls back.
+    Emits go to the user's room, which reaches them from any process when
+    SOCKETIO_MESSAGE_QUEUE is configured (e.g. from the disbursement workers).
+    """
+    if not user_id:
+        return
+    from app.models import Notification
+    try:
+        with db.session.begin_nested():
+            db.session.add(Notification(
+                user_id=user_id,
+                type=get_notification_type_enum(notification_type),
+                title=get_notification_title(notification_type),
+                message=get_notification_message(notification_type, data)
+            ))
     except Exception as e:
-        pass
+        current_app.logger.error(f"Failed to store {notification_type} notification for user {user_id}: {str(e)}")
+
+    db.session.info.setdefault(_PENDING_KEY, []).append((user_id, {
+        'type': notification_type,
+        'data': data,
+        'timestamp': datetime.utcnow().isoformat()
+    }))
+
+
+@event.listens_for(Session, 'after_commit')
+def _emit_pending_notifications(session):
+    for user_id, payload in session.info.pop(_PENDING_KEY, []):
+        try:
+            socketio.emit('notification', payload, room=f'user_{user_id}')
+        except Exception as e:
+            current_app.logger.error(f"Failed to emit {payload['type']} notification to user {user_id}: {str(e)}")
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _drop_pending_notifications(session, previous_transaction):
+    # Only the outermost transaction; rolling back a savepoint keeps the rest
+    if previous_transaction.parent is None:
+        session.info.pop(_PENDING_KEY, None)
 
 
 def get_notification_type_enum(notification_type):
     """Map notification type to enum"""
     from app.models import NotificationType
     type_mapping = {
-        'payment_success': NotificationType.info,
-        'payment_failed': NotificationType.error,
-        'disbursement_success': NotificationType.success,
-        'disbursement_retry': NotificationType.warning,
-        'disbursement_failed': NotificationType.error,
-        'order_status_change': NotificationType.info,
-        'new_message': NotificationType.info
+        'payment_success': NotificationType.payment,
+        'payment_failed': NotificationType.payment,
+        'disbursement_success': NotificationType.payment,
+        'disbursement_retry': NotificationType.payment,
+        'disbursement_failed': NotificationType.payment,
+        'order_status_change': NotificationType.order_update,
+        'new_message': NotificationType.message
     }
-    return type_mapping.get(notification_type, NotificationType.info)
+    return type_mapping.get(notification_type, NotificationType.system)
 
 
 def get_notification_title(notification_type):
@@ -1,48 +1,47 @@
-from sqlalchemy import inspect, text
+from sqlalchemy import inspect
 from app.models import db
 
 
-def ensure_deleted_at_columns(app):
-    """Ensure `deleted_at` column exists on categories and subcategories tables.
-    This performs a simple ALTER TABLE ADD COLUMN when using SQLite. For other
-    dialects this function logs a message recommending a migration.
+def check_schema(app):
+    """Compare the live database against the models and log what is missing.
+
+    Reports missing tables, columns and indexes (an index counts as present when
+    the database has any index or unique constraint over the same columns, in
+    order). Nothing is altered: schema changes go through `flask db upgrade`.
 
     NOTE: this function expects to be called while the Flask app context is active
     (the calling code should enter app.app_context()).
+
+    Returns:
+        list: Human-readable descriptions of each missing object
     """
     try:
-        # Use the SQLAlchemy engine attached to the db instance (app context required)
-        engine = db.engine
-        insp = inspect(engine)
+        insp = inspect(db.engine)
     except Exception as e:
-        return
-
-    tables = [
-        ("categories", "deleted_at"),
-        ("subcategories", "deleted_at"),
-    ]
+        app.logger.error(f"Schema check skipped: {str(e)}")
+        return []
 
-    for table_name, col in tables:
-        if not insp.has_table(table_name):
-            continue
-        columns = [c["name"] for c in insp.get_columns(table_name)]
-        if col in columns:
+    missing = []
+    for table in db.metadata.sorted_tables:
+        if not insp.has_table(table.name):
+            missing.append(f"table {table.name}")
             continue
 
-        # Add column for SQLite (simple, nullable)
-        if engine.dialect.name == "sqlite":
-            try:
-                # SQLite doesn't support parameterized table/column names, so validate input
-                if not table_name.isalnum() or not col.replace('_', '').isalnum():
-                    raise ValueError(f"Invalid table or column name: {table_name}.{col}")
-                
-                sql = text(f"ALTER TABLE {table_name} ADD COLUMN {col} DATETIME")
-                with engine.connect() as conn:
-                    conn.execute(sql)
-                    conn.commit()
-            except Exception as e:
-                # Log error but don't raise to prevent app startup failure
-                pass
-        else:
-            # For other DBs, log and skip - migrations required
-            pass
+        columns = {c["name"] for c in insp.get_columns(table.name)}
+        missing.extend(
+            f"column {table.name}.{column.name}"
+            for column in table.columns if column.name not in columns
+        )
+
+        existing = {tuple(i["column_names"]) for i in insp.get_indexes(table.name)}
+        existing.update(tuple(u["column_names"]) for u in insp.get_unique_constraints(table.name))
+        for index in table.indexes:
+            if tuple(c.name for c in index.columns) not in existing:
+                missing.append(f"index {index.name} on {table.name}")
+
+    if missing:
+        app.logger.warning(
+            "Database schema is behind the models (run `flask db upgrade`); missing: "
+            + ", ".join(missing)
+        )
+    return missing
@@ -0,0 +1,143 @@
+"""
+Logging setup for Soko Safi
+Structured (JSON) log records tagged with a per-request id, per-module levels,
+and sampled, rate-limited debug output so logging cost stays bounded under load
+
+Environment:
+- LOG_LEVEL: level for the `app` logger tree (default INFO)
+- LOG_LEVELS: per-module overrides, e.g. "app.auth=DEBUG,app.routes.cart_routes=WARNING"
+- LOG_FORMAT: json (default) or text
+- LOG_DEBUG_SAMPLE_RATE: fraction of DEBUG records kept (default 0.1)
+- LOG_DEBUG_RATE_LIMIT: max DEBUG records per logger per second (default 20)
+"""
+
+import json
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from flask import g, has_request_context, request
+
+REQUEST_ID_HEADER = 'X-Request-ID'
+_VALID_REQUEST_ID = re.compile(r'^[A-Za-z0-9._-]{1,64}$')
+
+# Attributes every LogRecord has; anything else was passed via `extra=`
+_RECORD_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime', 'request_id'}
+
+
+def get_request_id():
+    """Id of the current request, or None outside a request"""
+    if has_request_context():
+        return getattr(g, 'request_id', None)
+    return None
+
+
+class RequestIdFilter(logging.Filter):
+    """Attach the current request id to every record"""
+
+    def filter(self, record):
+        record.request_id = get_request_id()
+        return True
+
+
+class SampledDebugFilter(logging.Filter):
+    """
+    Keep a sample of records below INFO and cap how many each logger emits per
+    second. INFO and above always pass.
+    """
+
+    def __init__(self, sample_rate=0.1, per_second=20):
+        super().__init__()
+        self.sample_rate = sample_rate
+        self.per_second = per_second
+        self._windows = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno >= logging.INFO:
+            return True
+        if self.sample_rate < 1 and random.random() >= self.sample_rate:
+            return False
+
+        window = int(time.monotonic())
+        with self._lock:
+            start, count = self._windows.get(record.name, (window, 0))
+            if start != window:
+                start, count = window, 0
+            if count >= self.per_second:
+                return False
+            self._windows[record.name] = (start, count + 1)
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message, request id and extras"""
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        if getattr(record, 'request_id', None):
+            entry['request_id'] = record.request_id
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def _parse_levels(spec):
+    levels = {}
+    for item in (spec or '').split(','):
+        name, _, level = item.strip().partition('=')
+        if name and level:
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def configure_logging(app):
+    """
+    Route the `app` logger tree (app.logger and every `logging.getLogger(__name__)`
+    in this package) through one structured handler, and tag requests with an id.
+    Must run before anything touches app.logger so Flask's default handler is skipped.
+    """
+    handler = logging.StreamHandler(sys.stdout)
+    if os.getenv('LOG_FORMAT', 'json').lower() == 'text':
+        handler.setFormatter(logging.Formatter('%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s'))
+    else:
+        handler.setFormatter(JsonFormatter())
+    handler.addFilter(RequestIdFilter())
+    handler.addFilter(SampledDebugFilter(
+        sample_rate=float(os.getenv('LOG_DEBUG_SAMPLE_RATE', 0.1)),
+        per_second=int(os.getenv('LOG_DEBUG_RATE_LIMIT', 20))
+    ))
+
+    root = logging.getLogger('app')
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(os.getenv('LOG_LEVEL', 'INFO').upper())
+    root.propagate = False
+    for name, level in _parse_levels(os.getenv('LOG_LEVELS')).items():
+        logging.getLogger(name).setLevel(level)
+
+    @app.before_request
+    def assign_request_id():
+        incoming = request.headers.get(REQUEST_ID_HEADER, '')
+        g.request_id = incoming if _VALID_REQUEST_ID.match(incoming) else uuid.uuid4().hex
+
+    @app.after_request
+    def echo_request_id(response):
+        request_id = get_request_id()
+        if request_id:
+            response.headers[REQUEST_ID_HEADER] = request_id
+        return response
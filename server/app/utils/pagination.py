@@ -0,0 +1,91 @@
+"""
+Pagination helpers for Soko Safi
+Handles opaque keyset cursors for list endpoints ordered newest-first
+"""
+
+import base64
+import json
+from datetime import datetime
+from app.models import db
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+def get_page_size(args, default=DEFAULT_PAGE_SIZE, maximum=MAX_PAGE_SIZE):
+    """Read the `limit` query argument and clamp it to a sane range"""
+    limit = args.get('limit', default, type=int)
+    if not limit or limit < 1:
+        return default
+    return min(limit, maximum)
+
+
+def encode_cursor(timestamp, row_id):
+    """
+    Encode a (timestamp, id) sort key as an opaque, URL-safe cursor
+
+    Args:
+        timestamp (datetime): Sort timestamp of the last row on the page
+        row_id (str): Primary key of the last row, used as tie-breaker
+
+    Returns:
+        str: Cursor string, or None if there is no row to continue from
+    """
+    if timestamp is None or row_id is None:
+        return None
+    payload = json.dumps([timestamp.isoformat(), row_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    Decode a cursor produced by encode_cursor
+
+    Returns:
+        tuple: (datetime, str) sort key
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        timestamp, row_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        return datetime.fromisoformat(timestamp), str(row_id)
+    except Exception:
+        raise ValueError('Invalid cursor')
+
+
+def keyset_before(timestamp_column, id_column, timestamp, row_id):
+    """
+    Build the WHERE clause selecting rows that sort after the cursor
+    in a (timestamp DESC, id DESC) ordering
+    """
+    return db.or_(
+        timestamp_column < timestamp,
+        db.and_(timestamp_column == timestamp, id_column < row_id)
+    )
+
+
+def paginate_keyset(query, timestamp_column, id_column, cursor=None, limit=DEFAULT_PAGE_SIZE, sort_key=None):
+    """
+    Fetch one newest-first page of `query` using keyset pagination
+
+    Reads `limit + 1` rows so `has_more` is known without a COUNT(*).
+    `sort_key(row)` returns the (timestamp, id) of a row; by default the
+    values are read off the row by column name.
+
+    Returns:
+        tuple: (rows, next_cursor) where next_cursor is None on the last page
+    """
+    if cursor:
+        timestamp, row_id = decode_cursor(cursor)
+        query = query.filter(keyset_before(timestamp_column, id_column, timestamp, row_id))
+
+    rows = query.order_by(timestamp_column.desc(), id_column.desc()).limit(limit + 1).all()
+    if len(rows) <= limit:
+        return rows, None
+
+    rows = rows[:limit]
+    if sort_key is None:
+        sort_key = lambda row: (getattr(row, timestamp_column.key), getattr(row, id_column.key))
+    return rows, encode_cursor(*sort_key(rows[-1]))
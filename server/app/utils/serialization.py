@@ -0,0 +1,27 @@
+"""
+JSON serialization for Soko Safi API responses
+Encodes flask-restful responses with msgspec instead of the stdlib encoder.
+Plain dicts and lists encode as before; the Structs in app.schemas encode
+without an intermediate dict. See benchmarks/serialization_benchmark.py.
+"""
+
+import msgspec
+from flask import make_response
+from flask_restful import Api
+
+_encoder = msgspec.json.Encoder()
+
+
+def output_json(data, code, headers=None):
+    """flask-restful representation for application/json"""
+    response = make_response(_encoder.encode(data) + b'\n', code)
+    response.mimetype = 'application/json'
+    response.headers.extend(headers or {})
+    return response
+
+
+def create_api(blueprint):
+    """A flask-restful Api for the blueprint that renders JSON with msgspec"""
+    api = Api(blueprint)
+    api.representations['application/json'] = output_json
+    return api
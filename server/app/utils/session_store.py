@@ -0,0 +1,231 @@
+"""
+Server-side session storage for Soko Safi
+Keeps Flask sessions in a key-value store speaking the Redis command subset
+(GET / SET EX / EXPIRE / DELETE), so every worker sees the same sessions.
+
+Backends (SESSION_BACKEND):
+- redis: a shared Redis server at REDIS_URL (requires the `redis` package);
+  the default when REDIS_URL is set
+- filesystem: session files in SESSION_FILE_DIR, shared by every worker on one
+  host; the default otherwise
+- memory: a per-process store with the same interface, for tests and single
+  worker development only (each gunicorn worker would see different sessions)
+
+Session payloads are msgpack-encoded dicts and expire after
+PERMANENT_SESSION_LIFETIME; activity on an unchanged session slides the expiry
+with EXPIRE rather than re-sending the payload. With the filesystem backend
+each authenticated request reads its session file, and EXPIRE rewrites only
+the file's expiry header, at most once per EXPIRY_SLACK seconds.
+
+Requests carrying a valid `Authorization: Bearer` access token get a session
+built from the token's claims instead, with no store reads or writes.
+"""
+
+import struct
+import threading
+import time
+from cachelib.file import FileSystemCache
+from flask_session.base import ServerSideSession, ServerSideSessionInterface
+
+SWEEP_EVERY_N_WRITES = 1000
+# FileSessionStore leaves a session's expiry alone until it lags this far behind
+EXPIRY_SLACK = 60
+
+
+class MemorySessionStore:
+    """
+    In-process stand-in for a Redis client, implementing only the commands the
+    session interface uses. Expired keys are dropped on read and swept
+    periodically on write so the store cannot grow without bound.
+    """
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+        self._writes = 0
+
+    def get(self, name):
+        with self._lock:
+            entry = self._data.get(name)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[name]
+                return None
+            return value
+
+    def set(self, name, value, ex=None):
+        with self._lock:
+            self._data[name] = (value, time.monotonic() + ex if ex else None)
+            self._writes += 1
+            if self._writes % SWEEP_EVERY_N_WRITES == 0:
+                self._sweep()
+        return True
+
+    def expire(self, name, seconds):
+        with self._lock:
+            entry = self._data.get(name)
+            if entry is None:
+                return False
+            self._data[name] = (entry[0], time.monotonic() + seconds)
+            return True
+
+    def delete(self, *names):
+        with self._lock:
+            return sum(1 for name in names if self._data.pop(name, None) is not None)
+
+    def flushall(self):
+        with self._lock:
+            self._data.clear()
+        return True
+
+    def __len__(self):
+        return len(self._data)
+
+    def _sweep(self):
+        now = time.monotonic()
+        expired = [k for k, (_, expires_at) in self._data.items() if expires_at is not None and expires_at <= now]
+        for key in expired:
+            del self._data[key]
+
+
+class FileSessionStore:
+    """
+    Session files in a directory shared by the workers on one host, implementing
+    the same commands as MemorySessionStore. Each cachelib file starts with its
+    expiry as a 4-byte timestamp, which EXPIRE overwrites in place; expired
+    files are removed once the directory holds more than `threshold` sessions.
+    """
+
+    def __init__(self, path, threshold=10000):
+        self._cache = FileSystemCache(path, threshold=threshold)
+
+    def get(self, name):
+        return self._cache.get(name)
+
+    def set(self, name, value, ex=None):
+        # cachelib treats a timeout of 0 as "never expires"
+        return self._cache.set(name, value, timeout=ex or 0)
+
+    def expire(self, name, seconds):
+        now = int(time.time())
+        try:
+            with open(self._cache._get_filename(name), 'r+b') as f:
+                (expires_at,) = struct.unpack('I', f.read(4))
+                if expires_at and expires_at < now:
+                    return False
+                # Sliding by less than the slack is not worth a write
+                if expires_at and now + seconds - expires_at < EXPIRY_SLACK:
+                    return True
+                f.seek(0)
+                f.write(struct.pack('I', now + seconds))
+            return True
+        except (OSError, struct.error):
+            return False
+
+    def delete(self, *names):
+        return sum(1 for name in names if self._cache.delete(name))
+
+
+class KeyValueSession(ServerSideSession):
+    pass
+
+
+class TokenSession(KeyValueSession):
+    """Identity taken from a bearer access token; never read from or written to the store"""
+    pass
+
+
+class KeyValueSessionInterface(ServerSideSessionInterface):
+    """Flask-Session interface backed by any client exposing get/set/expire/delete"""
+
+    session_class = KeyValueSession
+    ttl = True
+
+    def __init__(self, app, client, key_prefix, use_signer, permanent):
+        self.client = client
+        super().__init__(app, key_prefix, use_signer, permanent, serialization_format='msgpack')
+
+    def open_session(self, app, request):
+        from app.auth import token_identity
+        identity = token_identity(request)
+        if identity is not None:
+            return TokenSession(identity)
+        return super().open_session(app, request)
+
+    def save_session(self, app, session, response):
+        if isinstance(session, TokenSession):
+            return
+        super().save_session(app, session, response)
+
+    def should_set_storage(self, app, session):
+        if session.modified:
+            return True
+        # Unchanged session: slide its expiry without re-sending the payload
+        if app.config.get('SESSION_REFRESH_EACH_REQUEST', True):
+            self.client.expire(self._get_store_id(session.sid), _ttl_seconds(app))
+        return False
+
+    def _retrieve_session_data(self, store_id):
+        serialized_session_data = self.client.get(store_id)
+        if serialized_session_data:
+            return self.serializer.decode(serialized_session_data)
+        return None
+
+    def _delete_session(self, store_id):
+        self.client.delete(store_id)
+
+    def _upsert_session(self, session_lifetime, session, store_id):
+        self.client.set(store_id, self.serializer.encode(session), ex=int(session_lifetime.total_seconds()))
+
+
+def create_session_client(app):
+    """
+    Build the key-value client for the configured SESSION_BACKEND
+
+    Raises:
+        ValueError: If the backend is unknown or misconfigured
+    """
+    backend = app.config.get('SESSION_BACKEND', 'filesystem')
+    if backend == 'memory':
+        return MemorySessionStore()
+    if backend == 'filesystem':
+        return FileSessionStore(app.config['SESSION_FILE_DIR'], app.config.get('SESSION_FILE_THRESHOLD', 10000))
+    if backend == 'redis':
+        redis_url = app.config.get('REDIS_URL')
+        if not redis_url:
+            raise ValueError('REDIS_URL environment variable is required for the redis session backend')
+        try:
+            import redis
+        except ImportError:
+            raise ValueError('The redis session backend requires the `redis` package')
+        return redis.Redis.from_url(redis_url, socket_timeout=2, socket_connect_timeout=2)
+    raise ValueError(f'Unknown SESSION_BACKEND: {backend}')
+
+
+def init_session_store(app, client=None):
+    """
+    Install the server-side session interface on the app
+
+    Args:
+        client: Optional pre-built store client (e.g. a MemorySessionStore in tests)
+    """
+    if client is None:
+        client = create_session_client(app)
+    if isinstance(client, MemorySessionStore):
+        app.logger.warning('Using in-memory session store; sessions are not shared between workers, '
+                           'so run a single worker or set SESSION_BACKEND=redis')
+
+    app.session_interface = KeyValueSessionInterface(
+        app,
+        client,
+        key_prefix=app.config['SESSION_KEY_PREFIX'],
+        use_signer=app.config['SESSION_USE_SIGNER'],
+        permanent=app.config['SESSION_PERMANENT'],
+    )
+    return app.session_interface
+
+
+def _ttl_seconds(app):
+    return int(app.permanent_session_lifetime.total_seconds())
@@ -0,0 +1,162 @@
+"""
+Serialization benchmark for Soko Safi API responses
+Compares building and encoding large listing payloads three ways:
+
+- dict + json:     hand-built dicts encoded with the stdlib (flask-restful's default)
+- dict + msgspec:  the same dicts encoded by the msgspec representation
+- struct + msgspec: app.schemas Structs encoded by the msgspec representation
+
+Reports throughput (payloads/s and MB/s) and peak traced allocation for one
+build + encode, for product and order listings.
+
+Usage (from the server directory):
+    python benchmarks/serialization_benchmark.py --items 1000 --repeat 200
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+import msgspec
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.schemas import ProductSummary, OrderSummary, OrderLine  # noqa: E402
+
+_encoder = msgspec.json.Encoder()
+
+
+def product_rows(count):
+    now = datetime(2026, 1, 1)
+    return [{
+        'id': f'{i:08d}-0000-4000-8000-000000000000',
+        'title': f'Hand-woven basket #{i}',
+        'price': 1250.0 + i,
+        'description': 'Sisal basket woven by hand in Machakos, natural dyes. ' * 3,
+        'image_url': f'https://res.cloudinary.com/demo/image/upload/v1/products/{i}.jpg',
+        'stock': i % 40,
+        'currency': 'KSH',
+        'status': 'active',
+        'artisan_id': f'{i % 50:08d}-1111-4000-8000-000000000000',
+        'category_id': 'c0ffee00-0000-4000-8000-000000000000',
+        'subcategory_id': None,
+        'rating': 4.35,
+        'review_count': i % 17,
+        'created_at': (now - timedelta(minutes=i)).isoformat()
+    } for i in range(count)]
+
+
+def order_rows(count, lines=3):
+    now = datetime(2026, 1, 1)
+    return [{
+        'id': f'{i:08d}-2222-4000-8000-000000000000',
+        'user_id': f'{i % 200:08d}-3333-4000-8000-000000000000',
+        'user_name': 'Wanjiku Kamau',
+        'user_email': 'wanjiku@example.com',
+        'status': 'processing',
+        'total_amount': 3750.0,
+        'created_at': (now - timedelta(hours=i)).isoformat(),
+        'updated_at': (now - timedelta(hours=i)).isoformat(),
+        'title': 'Hand-woven basket',
+        'product': 'Hand-woven basket',
+        'artisan_name': 'Akinyi Otieno',
+        'image': None,
+        'product_id': f'{i:08d}-0000-4000-8000-000000000000',
+        'artisan_id': f'{i % 50:08d}-1111-4000-8000-000000000000',
+        'items': [{
+            'product_id': f'{i + n:08d}-0000-4000-8000-000000000000',
+            'product_title': 'Hand-woven basket',
+            'quantity': 1 + n,
+            'unit_price': 1250.0,
+            'total_price': 1250.0 * (1 + n),
+            'artisan_id': f'{i % 50:08d}-1111-4000-8000-000000000000'
+        } for n in range(lines)]
+    } for i in range(count)]
+
+
+def build_product_dicts(rows):
+    # Mirrors the handlers' dict comprehensions: one new dict per row
+    return {'items': [dict(row) for row in rows], 'next_cursor': None, 'has_more': False}
+
+
+def build_products(rows):
+    return {'items': [ProductSummary(**row) for row in rows], 'next_cursor': None, 'has_more': False}
+
+
+def build_order_dicts(rows):
+    items = []
+    for row in rows:
+        order = dict(row)
+        order['items'] = [dict(line) for line in row['items']]
+        items.append(order)
+    return {'items': items, 'next_cursor': None, 'has_more': False}
+
+
+def build_orders(rows):
+    items = []
+    for row in rows:
+        order = OrderSummary(**row)
+        order.items = [OrderLine(**line) for line in row['items']]
+        items.append(order)
+    return {'items': items, 'next_cursor': None, 'has_more': False}
+
+
+def encode_json(payload):
+    # flask_restful.representations.json.output_json
+    return (json.dumps(payload) + '\n').encode('utf-8')
+
+
+def encode_msgspec(payload):
+    return _encoder.encode(payload) + b'\n'
+
+
+def measure(build, encode, rows, repeat):
+    body = encode(build(rows))
+    start = time.perf_counter()
+    for _ in range(repeat):
+        encode(build(rows))
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    encode(build(rows))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        'per_sec': repeat / elapsed,
+        'mb_per_sec': len(body) * repeat / elapsed / 1e6,
+        'peak_kb': peak / 1024,
+        'bytes': len(body)
+    }
+
+
+def run(name, rows, build_dict, build_struct, repeat):
+    variants = [
+        ('dict + json', build_dict, encode_json),
+        ('dict + msgspec', build_dict, encode_msgspec),
+        ('struct + msgspec', build_struct, encode_msgspec),
+    ]
+    print(f'\n{name}: {len(rows)} items, {repeat} iterations')
+    print(f'{"variant":<18}{"payloads/s":>12}{"MB/s":>10}{"peak KiB":>11}{"speedup":>10}')
+    baseline = None
+    for label, build, encode in variants:
+        result = measure(build, encode, rows, repeat)
+        baseline = baseline or result['per_sec']
+        print(f'{label:<18}{result["per_sec"]:>12.1f}{result["mb_per_sec"]:>10.1f}'
+              f'{result["peak_kb"]:>11.0f}{result["per_sec"] / baseline:>9.2f}x')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--items', type=int, default=1000, help='Rows per listing payload')
+    parser.add_argument('--repeat', type=int, default=200, help='Build + encode iterations per variant')
+    args = parser.parse_args()
+
+    run('Product listing', product_rows(args.items), build_product_dicts, build_products, args.repeat)
+    run('Order listing', order_rows(args.items), build_order_dicts, build_orders, args.repeat)
+
+
+if __name__ == '__main__':
+    main()
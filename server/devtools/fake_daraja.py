@@ -0,0 +1,278 @@
+"""
+Fake Daraja (M-Pesa) server for local development and load testing
+Implements the endpoints Soko Safi calls, with Daraja-shaped responses:
+
+- GET  /oauth/v1/generate               client-credentials access token
+- POST /mpesa/stkpush/v1/processrequest STK Push
+- POST /mpesa/stkpushquery/v1/query     STK Push status query
+- POST /mpesa/b2c/v1/paymentrequest     B2C payment (deduplicated by OriginatorConversationID)
+
+API calls require a live bearer token (401 otherwise), so token caching and
+refresh can be observed. Optional per-request latency simulates a slow
+upstream. With --callback-delay, the STK and B2C result callbacks are POSTed
+to the CallBackURL / ResultURL in the request after that many seconds.
+`stats` counts requests per endpoint and distinct client connections, which
+shows whether callers reuse keep-alive connections.
+
+Usage (from the server directory):
+    python devtools/fake_daraja.py --port 8089 --latency 0.2 --callback-delay 2
+    MPESA_BASE_URL=http://127.0.0.1:8089 python main.py
+
+Or in-process:
+    daraja = FakeDaraja(latency=0.05)
+    base_url = daraja.start()
+    ...
+    daraja.stop()
+"""
+
+import argparse
+import json
+import secrets
+import threading
+import time
+import urllib.request
+from collections import Counter
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+
+
+class FakeDaraja:
+    def __init__(self, host='127.0.0.1', port=0, latency=0.0, token_ttl=3599,
+                 callback_delay=None, stk_result_code=0, b2c_result_code=0):
+        self.latency = latency
+        self.token_ttl = token_ttl
+        self.callback_delay = callback_delay
+        self.stk_result_code = stk_result_code
+        self.b2c_result_code = b2c_result_code
+        self.stats = Counter()
+        self.connections = set()
+        self.tokens = {}
+        self.stk_requests = {}
+        self.b2c_requests = {}
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self):
+        """Serve in a background thread and return the base URL"""
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self.base_url
+
+    def serve_forever(self):
+        self._server.serve_forever()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def issue_token(self):
+        token = secrets.token_urlsafe(24)
+        with self._lock:
+            self.tokens[token] = time.monotonic() + self.token_ttl
+        return token
+
+    def token_valid(self, token):
+        with self._lock:
+            expires_at = self.tokens.get(token)
+        return expires_at is not None and expires_at > time.monotonic()
+
+    def expire_tokens(self):
+        """Revoke every issued token (the next API call gets a 401)"""
+        with self._lock:
+            self.tokens.clear()
+
+    # Endpoint handlers: return (status, body)
+
+    def oauth(self, headers, body):
+        if not headers.get('Authorization', '').startswith('Basic '):
+            return 400, {'errorCode': '400.008.01', 'errorMessage': 'Invalid Authentication passed'}
+        return 200, {'access_token': self.issue_token(), 'expires_in': str(self.token_ttl)}
+
+    def stk_push(self, headers, body):
+        checkout_request_id = f'ws_CO_{datetime.utcnow():%d%m%Y%H%M%S}{secrets.token_hex(4)}'
+        merchant_request_id = f'{secrets.randbelow(90000) + 10000}-{secrets.randbelow(10 ** 8)}-1'
+        receipt = secrets.token_hex(5).upper()
+        with self._lock:
+            self.stk_requests[checkout_request_id] = {
+                'merchant_request_id': merchant_request_id,
+                'amount': body.get('Amount'),
+                'phone': body.get('PhoneNumber'),
+                'receipt': receipt,
+            }
+        self._schedule_callback(body.get('CallBackURL'), {'Body': {'stkCallback': self._stk_result(checkout_request_id)}})
+        return 200, {
+            'MerchantRequestID': merchant_request_id,
+            'CheckoutRequestID': checkout_request_id,
+            'ResponseCode': '0',
+            'ResponseDescription': 'Success. Request accepted for processing',
+            'CustomerMessage': 'Success. Request accepted for processing',
+        }
+
+    def stk_query(self, headers, body):
+        checkout_request_id = body.get('CheckoutRequestID')
+        with self._lock:
+            known = checkout_request_id in self.stk_requests
+        if not known:
+            return 500, {'errorCode': '500.001.1001', 'errorMessage': 'The transaction is being processed'}
+        result = self._stk_result(checkout_request_id)
+        return 200, {
+            'ResponseCode': '0',
+            'ResponseDescription': 'The service request has been accepted successsfully',
+            'MerchantRequestID': result['MerchantRequestID'],
+            'CheckoutRequestID': checkout_request_id,
+            'ResultCode': str(result['ResultCode']),
+            'ResultDesc': result['ResultDesc'],
+        }
+
+    def b2c(self, headers, body):
+        # A client-supplied OriginatorConversationID is echoed back, and a
+        # resend with the same one replays the first response without paying again
+        originator_id = body.get('OriginatorConversationID')
+        with self._lock:
+            if originator_id in self.b2c_requests:
+                self.stats['b2c_duplicates'] += 1
+                return 200, self.b2c_requests[originator_id]
+        originator_id = originator_id or f'{secrets.randbelow(90000) + 10000}-{secrets.randbelow(10 ** 8)}-1'
+        conversation_id = f'AG_{datetime.utcnow():%Y%m%d}_{secrets.token_hex(10)}'
+        self._schedule_callback(body.get('ResultURL'), {'Result': {
+            'ResultType': 0,
+            'ResultCode': self.b2c_result_code,
+            'ResultDesc': 'The service request is processed successfully.' if self.b2c_result_code == 0
+            else 'The initiator information is invalid.',
+            'OriginatorConversationID': originator_id,
+            'ConversationID': conversation_id,
+            'TransactionID': secrets.token_hex(5).upper(),
+        }})
+        response = {
+            'ConversationID': conversation_id,
+            'OriginatorConversationID': originator_id,
+            'ResponseCode': '0',
+            'ResponseDescription': 'Accept the service request successfully.',
+        }
+        with self._lock:
+            self.b2c_requests[originator_id] = response
+        return 200, response
+
+    def _stk_result(self, checkout_request_id):
+        with self._lock:
+            request = self.stk_requests[checkout_request_id]
+        result = {
+            'MerchantRequestID': request['merchant_request_id'],
+            'CheckoutRequestID': checkout_request_id,
+            'ResultCode': self.stk_result_code,
+            'ResultDesc': 'The service request is processed successfully.' if self.stk_result_code == 0
+            else 'Request cancelled by user',
+        }
+        if self.stk_result_code == 0:
+            result['CallbackMetadata'] = {'Item': [
+                {'Name': 'Amount', 'Value': request['amount']},
+                {'Name': 'MpesaReceiptNumber', 'Value': request['receipt']},
+                {'Name': 'TransactionDate', 'Value': int(datetime.utcnow().strftime('%Y%m%d%H%M%S'))},
+                {'Name': 'PhoneNumber', 'Value': request['phone']},
+            ]}
+        return result
+
+    def _schedule_callback(self, url, payload):
+        if self.callback_delay is None or not url:
+            return
+
+        def deliver():
+            request = urllib.request.Request(
+                url, data=json.dumps(payload).encode(), headers={'Content-Type': 'application/json'}
+            )
+            try:
+                urllib.request.urlopen(request, timeout=10).close()
+                self.stats['callbacks_delivered'] += 1
+            except Exception:
+                self.stats['callbacks_failed'] += 1
+
+        timer = threading.Timer(self.callback_delay, deliver)
+        timer.daemon = True
+        timer.start()
+
+    def _handler_class(self):
+        daraja = self
+        routes = {
+            ('GET', '/oauth/v1/generate'): ('token', self.oauth, False),
+            ('POST', '/mpesa/stkpush/v1/processrequest'): ('stkpush', self.stk_push, True),
+            ('POST', '/mpesa/stkpushquery/v1/query'): ('stkquery', self.stk_query, True),
+            ('POST', '/mpesa/b2c/v1/paymentrequest'): ('b2c', self.b2c, True),
+        }
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'  # keep-alive
+
+            def do_GET(self):
+                self._dispatch('GET')
+
+            def do_POST(self):
+                self._dispatch('POST')
+
+            def _dispatch(self, method):
+                length = int(self.headers.get('Content-Length') or 0)
+                raw = self.rfile.read(length) if length else b''
+                daraja.connections.add(self.client_address)
+
+                route = routes.get((method, urlparse(self.path).path))
+                if route is None:
+                    return self._send(404, {'errorMessage': 'Resource not found'})
+                name, handler, needs_token = route
+                daraja.stats[name] += 1
+
+                if daraja.latency:
+                    time.sleep(daraja.latency)
+                if needs_token:
+                    token = self.headers.get('Authorization', '').removeprefix('Bearer ')
+                    if not daraja.token_valid(token):
+                        return self._send(401, {'errorCode': '404.001.03', 'errorMessage': 'Invalid Access Token'})
+                try:
+                    body = json.loads(raw) if raw else {}
+                except ValueError:
+                    return self._send(400, {'errorMessage': 'Invalid JSON'})
+                self._send(*handler(self.headers, body))
+
+            def _send(self, status, body):
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fake Daraja (M-Pesa) server')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8089)
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds to delay each response')
+    parser.add_argument('--token-ttl', type=int, default=3599, help='Access token lifetime in seconds')
+    parser.add_argument('--callback-delay', type=float, default=None,
+                        help='POST result callbacks this many seconds after each request')
+    parser.add_argument('--stk-result-code', type=int, default=0, help='ResultCode for STK results (1032 = cancelled)')
+    parser.add_argument('--b2c-result-code', type=int, default=0, help='ResultCode for B2C results')
+    args = parser.parse_args()
+
+    daraja = FakeDaraja(args.host, args.port, args.latency, args.token_ttl, args.callback_delay,
+                        args.stk_result_code, args.b2c_result_code)
+    print(f'Fake Daraja listening on {daraja.base_url}')
+    try:
+        daraja.serve_forever()
+    except KeyboardInterrupt:
+        daraja.stop()
+
+
+if __name__ == '__main__':
+    main()
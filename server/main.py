@@ -1,6 +1,9 @@
 from app import create_app
-from app.extensions import db, socketio
-from app.utils.db_migrations import ensure_deleted_at_columns
+from app.extensions import socketio
+from app.utils.db_migrations import check_schema
+from app.services.search_service import product_search
+from app.services.conversation_service import backfill_conversations
+from app.services.rating_service import backfill_ratings
 import os
 
 try:
@@ -15,9 +18,12 @@ except Exception as e:
 if __name__ == '__main__':
     try:
         with app.app_context():
-            db.create_all()
-            # Ensure optional columns exist for older databases (adds `deleted_at` for sqlite)
-            ensure_deleted_at_columns(app)
+            # The migrations own the schema (`flask db upgrade`); warn about anything
+            # they haven't applied yet and only fill derived tables once it is current
+            if not check_schema(app):
+                product_search.ensure_index()
+                backfill_conversations()
+                backfill_ratings()
         
         # Get configuration from environment
         debug_mode = os.getenv('FLASK_DEBUG', 'False').lower() == 'true'
@@ -0,0 +1,108 @@
+"""Materialized conversations
+
+Creates the conversations table, links messages to it, and builds one
+conversation per pair of users from the messages already stored, with its last
+message and each participant's unread count.
+
+Revision ID: 1c7e5a3d9b42
+Revises: 5c1e7a9d2f30
+Create Date: 2026-10-18 09:26:03.418570
+
+"""
+import uuid
+from datetime import datetime
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '1c7e5a3d9b42'
+down_revision = '5c1e7a9d2f30'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('conversations',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('user_a_id', sa.String(length=36), nullable=False),
+    sa.Column('user_b_id', sa.String(length=36), nullable=False),
+    sa.Column('last_message_id', sa.String(length=36), nullable=True),
+    sa.Column('last_message_text', sa.Text(), nullable=True),
+    sa.Column('last_activity_at', sa.DateTime(), nullable=True),
+    sa.Column('user_a_unread', sa.Integer(), nullable=False),
+    sa.Column('user_b_unread', sa.Integer(), nullable=False),
+    sa.Column('user_a_last_read_at', sa.DateTime(), nullable=True),
+    sa.Column('user_b_last_read_at', sa.DateTime(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['last_message_id'], ['messages.id'], name='fk_conversations_last_message_id'),
+    sa.ForeignKeyConstraint(['user_a_id'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['user_b_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_a_id', 'user_b_id', name='uq_conversations_participants')
+    )
+    with op.batch_alter_table('conversations', schema=None) as batch_op:
+        batch_op.create_index('ix_conversations_user_a_activity', ['user_a_id', 'last_activity_at'], unique=False)
+        batch_op.create_index('ix_conversations_user_b_activity', ['user_b_id', 'last_activity_at'], unique=False)
+
+    with op.batch_alter_table('messages', schema=None) as batch_op:
+        batch_op.create_foreign_key('fk_messages_conversation_id', 'conversations', ['conversation_id'], ['id'])
+        batch_op.create_index('ix_messages_conversation_created_at', ['conversation_id', 'created_at', 'id'], unique=False)
+
+    _backfill_conversations()
+
+
+def downgrade():
+    with op.batch_alter_table('messages', schema=None) as batch_op:
+        batch_op.drop_index('ix_messages_conversation_created_at')
+        batch_op.drop_constraint('fk_messages_conversation_id', type_='foreignkey')
+
+    with op.batch_alter_table('conversations', schema=None) as batch_op:
+        batch_op.drop_index('ix_conversations_user_b_activity')
+        batch_op.drop_index('ix_conversations_user_a_activity')
+
+    op.drop_table('conversations')
+
+
+def _backfill_conversations():
+    """One conversation per pair of users who have exchanged messages"""
+    bind = op.get_bind()
+    messages = sa.table(
+        'messages', sa.column('id'), sa.column('conversation_id'), sa.column('sender_id'),
+        sa.column('receiver_id'), sa.column('message_text'), sa.column('is_read'), sa.column('created_at')
+    )
+    conversations = sa.table(
+        'conversations', sa.column('id'), sa.column('user_a_id'), sa.column('user_b_id'),
+        sa.column('last_message_id'), sa.column('last_message_text'), sa.column('last_activity_at'),
+        sa.column('user_a_unread'), sa.column('user_b_unread'), sa.column('created_at'), sa.column('updated_at')
+    )
+
+    # Participants are stored as an ordered pair (Conversation.participants)
+    pairs = {tuple(sorted(pair)) for pair in bind.execute(
+        sa.select(messages.c.sender_id, messages.c.receiver_id).distinct()
+    )}
+    now = datetime.utcnow()
+    for user_a_id, user_b_id in sorted(pairs):
+        between = sa.or_(
+            sa.and_(messages.c.sender_id == user_a_id, messages.c.receiver_id == user_b_id),
+            sa.and_(messages.c.sender_id == user_b_id, messages.c.receiver_id == user_a_id)
+        )
+        last = bind.execute(
+            sa.select(messages.c.id, messages.c.message_text, messages.c.created_at)
+            .where(between).order_by(messages.c.created_at.desc(), messages.c.id.desc()).limit(1)
+        ).first()
+        unread = dict(bind.execute(
+            sa.select(messages.c.receiver_id, sa.func.count())
+            .where(between, sa.or_(messages.c.is_read.is_(None), messages.c.is_read == sa.false()))
+            .group_by(messages.c.receiver_id)
+        ).all())
+
+        conversation_id = str(uuid.uuid4())
+        bind.execute(conversations.insert().values(
+            id=conversation_id, user_a_id=user_a_id, user_b_id=user_b_id,
+            last_message_id=last.id, last_message_text=last.message_text, last_activity_at=last.created_at,
+            user_a_unread=unread.get(user_a_id, 0), user_b_unread=unread.get(user_b_id, 0),
+            created_at=now, updated_at=now
+        ))
+        bind.execute(messages.update().where(between).values(conversation_id=conversation_id))
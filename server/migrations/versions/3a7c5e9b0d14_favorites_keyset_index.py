@@ -0,0 +1,24 @@
+"""Keyset index for paginated favorites
+
+Revision ID: 3a7c5e9b0d14
+Revises: 8d2f6b4e1a73
+Create Date: 2026-10-18 11:05:32.918406
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3a7c5e9b0d14'
+down_revision = '8d2f6b4e1a73'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_favorites_user_id_created_at_id', 'favorites', ['user_id', 'created_at', 'id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_favorites_user_id_created_at_id', table_name='favorites')
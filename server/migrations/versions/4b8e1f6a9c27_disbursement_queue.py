@@ -0,0 +1,32 @@
+"""Disbursement queue leases and claim index
+
+Pending artisan_disbursements rows are executed by `flask disbursements work`.
+
+Revision ID: 4b8e1f6a9c27
+Revises: f7a2c4d91e36
+Create Date: 2026-10-18 15:12:04.318275
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4b8e1f6a9c27'
+down_revision = 'f7a2c4d91e36'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('artisan_disbursements', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('locked_by', sa.String(length=64), nullable=True))
+        batch_op.add_column(sa.Column('locked_until', sa.DateTime(), nullable=True))
+        batch_op.create_index('ix_artisan_disbursements_status_created_at', ['status', 'created_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('artisan_disbursements', schema=None) as batch_op:
+        batch_op.drop_index('ix_artisan_disbursements_status_created_at')
+        batch_op.drop_column('locked_until')
+        batch_op.drop_column('locked_by')
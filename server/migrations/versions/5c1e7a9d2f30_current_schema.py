@@ -0,0 +1,353 @@
+"""Current application schema
+
+Replaces the placeholder tables from the initial migration with the schema
+app.models defined before the migration chain existed. Databases provisioned
+with db.create_all() from those models already have exactly these tables; stamp
+them at this revision, then upgrade to apply everything added since:
+
+    flask db stamp 5c1e7a9d2f30
+    flask db upgrade
+
+The placeholder users/products tables are only dropped while they still have
+the placeholder layout and no rows. Anything else is left alone and the
+upgrade stops, rather than risk deleting real data.
+
+Revision ID: 5c1e7a9d2f30
+Revises: bab41b1917ba
+Create Date: 2026-10-18 09:12:41.305118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5c1e7a9d2f30'
+down_revision = 'bab41b1917ba'
+branch_labels = None
+depends_on = None
+
+
+PLACEHOLDER_COLUMNS = {
+    'users': {'id', 'username', 'email', 'password', 'created_at'},
+    'products': {'id', 'name', 'price', 'description', 'created_at'},
+}
+
+
+def _drop_placeholder_tables():
+    """Drop the initial migration's placeholder tables, refusing if they hold anything real"""
+    bind = op.get_bind()
+    insp = sa.inspect(bind)
+    for table, placeholder_columns in PLACEHOLDER_COLUMNS.items():
+        if not insp.has_table(table):
+            continue
+        columns = {column['name'] for column in insp.get_columns(table)}
+        if columns != placeholder_columns:
+            raise RuntimeError(
+                f"Table {table} is not the initial migration's placeholder. If this database "
+                f"was created with db.create_all(), run `flask db stamp {revision}` instead."
+            )
+        if bind.execute(sa.text(f'SELECT 1 FROM {table} LIMIT 1')).first() is not None:
+            raise RuntimeError(f"Placeholder table {table} has rows; move them out before upgrading.")
+        op.drop_table(table)
+
+
+def upgrade():
+    _drop_placeholder_tables()
+
+    op.create_table('categories',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('name', sa.String(length=255), nullable=False),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.Column('deleted_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('name')
+    )
+    op.create_table('users',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('role', sa.Enum('buyer', 'artisan', 'admin', name='userrole'), nullable=False),
+    sa.Column('email', sa.String(length=255), nullable=False),
+    sa.Column('password_hash', sa.String(length=255), nullable=False),
+    sa.Column('full_name', sa.String(length=255), nullable=True),
+    sa.Column('phone', sa.String(length=30), nullable=True),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('profile_picture_url', sa.Text(), nullable=True),
+    sa.Column('banner_image_url', sa.Text(), nullable=True),
+    sa.Column('location', sa.String(length=255), nullable=True),
+    sa.Column('is_verified', sa.Boolean(), nullable=True),
+    sa.Column('meta_data', sa.Text(), nullable=True),
+    sa.Column('payment_method', sa.Enum('phone', 'paybill', name='paymentmethod'), nullable=True),
+    sa.Column('mpesa_phone', sa.String(length=15), nullable=True),
+    sa.Column('paybill_number', sa.String(length=10), nullable=True),
+    sa.Column('paybill_account', sa.String(length=50), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.Column('deleted_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('email')
+    )
+    op.create_table('artisan_showcase_media',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('artisan_id', sa.String(length=36), nullable=True),
+    sa.Column('url', sa.Text(), nullable=False),
+    sa.Column('media_type', sa.String(length=20), nullable=True),
+    sa.Column('caption', sa.Text(), nullable=True),
+    sa.Column('position', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['artisan_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('artisan_socials',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('artisan_id', sa.String(length=36), nullable=True),
+    sa.Column('platform', sa.String(length=50), nullable=True),
+    sa.Column('handle', sa.String(length=255), nullable=True),
+    sa.Column('url', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['artisan_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('carts',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('user_id', sa.String(length=36), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.Column('meta_data', sa.Text(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('collections',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('artisan_id', sa.String(length=36), nullable=True),
+    sa.Column('title', sa.String(length=255), nullable=True),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('media', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['artisan_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('follows',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('follower_id', sa.String(length=36), nullable=True),
+    sa.Column('following_id', sa.String(length=36), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['follower_id'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['following_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('notifications',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('user_id', sa.String(length=36), nullable=True),
+    sa.Column('type', sa.Enum('message', 'order_update', 'payment', 'system', name='notificationtype'), nullable=True),
+    sa.Column('title', sa.String(length=255), nullable=True),
+    sa.Column('message', sa.Text(), nullable=True),
+    sa.Column('is_read', sa.Boolean(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('orders',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('user_id', sa.String(length=36), nullable=True),
+    sa.Column('status', sa.Enum('cart', 'pending', 'processing', 'shipped', 'completed', 'cancelled', 'refunded', name='orderstatus'), nullable=True),
+    sa.Column('total_amount', sa.Numeric(precision=12, scale=2), nullable=True),
+    sa.Column('currency', sa.String(length=3), nullable=True),
+    sa.Column('shipping_address', sa.Text(), nullable=True),
+    sa.Column('billing_address', sa.Text(), nullable=True),
+    sa.Column('placed_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.Column('meta_data', sa.Text(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('subcategories',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('category_id', sa.String(length=36), nullable=False),
+    sa.Column('name', sa.String(length=255), nullable=False),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.Column('deleted_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['category_id'], ['categories.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('messages',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('conversation_id', sa.String(length=36), nullable=True),
+    sa.Column('sender_id', sa.String(length=36), nullable=False),
+    sa.Column('receiver_id', sa.String(length=36), nullable=False),
+    sa.Column('message_text', sa.Text(), nullable=True),
+    sa.Column('media_url', sa.Text(), nullable=True),
+    sa.Column('status', sa.String(length=20), nullable=True),
+    sa.Column('is_read', sa.Boolean(), nullable=True),
+    sa.Column('read_at', sa.DateTime(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['receiver_id'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['sender_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('payments',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('order_id', sa.String(length=36), nullable=True),
+    sa.Column('amount', sa.Numeric(precision=12, scale=2), nullable=True),
+    sa.Column('currency', sa.String(length=3), nullable=True),
+    sa.Column('status', sa.Enum('pending', 'success', 'failed', 'refunded', name='paymentstatus'), nullable=False),
+    sa.Column('mpesa_transaction_id', sa.String(length=255), nullable=True),
+    sa.Column('payer_phone', sa.String(length=30), nullable=True),
+    sa.Column('callback_payload', sa.Text(), nullable=True),
+    sa.Column('transaction_status_reason', sa.Text(), nullable=True),
+    sa.Column('reversal_flag', sa.Boolean(), nullable=True),
+    sa.Column('reversal_timestamp', sa.DateTime(), nullable=True),
+    sa.Column('received_at', sa.DateTime(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['order_id'], ['orders.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('mpesa_transaction_id')
+    )
+    op.create_table('products',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('artisan_id', sa.String(length=36), nullable=True),
+    sa.Column('title', sa.String(length=255), nullable=False),
+    sa.Column('price', sa.Float(), nullable=False),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('stock', sa.Integer(), nullable=True),
+    sa.Column('currency', sa.String(length=10), nullable=True),
+    sa.Column('category_id', sa.String(length=36), nullable=True),
+    sa.Column('subcategory_id', sa.String(length=36), nullable=True),
+    sa.Column('image_url', sa.Text(), nullable=True),
+    sa.Column('status', sa.String(length=50), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.Column('deleted_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['artisan_id'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['category_id'], ['categories.id'], ),
+    sa.ForeignKeyConstraint(['subcategory_id'], ['subcategories.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('artisan_disbursements',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('payment_id', sa.String(length=36), nullable=True),
+    sa.Column('artisan_id', sa.String(length=36), nullable=True),
+    sa.Column('amount', sa.Numeric(precision=12, scale=2), nullable=True),
+    sa.Column('currency', sa.String(length=3), nullable=True),
+    sa.Column('status', sa.Enum('pending', 'processing', 'success', 'failed', 'retry', 'manual', name='disbursementstatus'), nullable=False),
+    sa.Column('mpesa_transaction_id', sa.String(length=255), nullable=True),
+    sa.Column('recipient_phone', sa.String(length=15), nullable=True),
+    sa.Column('paybill_number', sa.String(length=10), nullable=True),
+    sa.Column('paybill_account', sa.String(length=50), nullable=True),
+    sa.Column('disbursement_method', sa.String(length=20), nullable=True),
+    sa.Column('retry_count', sa.Integer(), nullable=True),
+    sa.Column('last_retry_at', sa.DateTime(), nullable=True),
+    sa.Column('failure_reason', sa.Text(), nullable=True),
+    sa.Column('callback_payload', sa.Text(), nullable=True),
+    sa.Column('completed_at', sa.DateTime(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['artisan_id'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['payment_id'], ['payments.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('mpesa_transaction_id')
+    )
+    op.create_table('cart_items',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('cart_id', sa.String(length=36), nullable=True),
+    sa.Column('product_id', sa.String(length=36), nullable=True),
+    sa.Column('quantity', sa.Integer(), nullable=True),
+    sa.Column('unit_price', sa.Numeric(precision=12, scale=2), nullable=True),
+    sa.Column('added_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['cart_id'], ['carts.id'], ),
+    sa.ForeignKeyConstraint(['product_id'], ['products.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('favorites',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('user_id', sa.String(length=36), nullable=True),
+    sa.Column('product_id', sa.String(length=36), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['product_id'], ['products.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('order_items',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('order_id', sa.String(length=36), nullable=True),
+    sa.Column('product_id', sa.String(length=36), nullable=True),
+    sa.Column('artisan_id', sa.String(length=36), nullable=True),
+    sa.Column('quantity', sa.Integer(), nullable=True),
+    sa.Column('unit_price', sa.Numeric(precision=12, scale=2), nullable=True),
+    sa.Column('total_price', sa.Numeric(precision=12, scale=2), nullable=True),
+    sa.ForeignKeyConstraint(['artisan_id'], ['users.id'], ),
+    sa.ForeignKeyConstraint(['order_id'], ['orders.id'], ),
+    sa.ForeignKeyConstraint(['product_id'], ['products.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('product_images',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('product_id', sa.String(length=36), nullable=True),
+    sa.Column('url', sa.Text(), nullable=False),
+    sa.Column('alt_text', sa.String(length=255), nullable=True),
+    sa.Column('position', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['product_id'], ['products.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('reviews',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('product_id', sa.String(length=36), nullable=True),
+    sa.Column('user_id', sa.String(length=36), nullable=True),
+    sa.Column('rating', sa.SmallInteger(), nullable=True),
+    sa.Column('title', sa.String(length=255), nullable=True),
+    sa.Column('body', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['product_id'], ['products.id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade():
+    op.drop_table('reviews')
+    op.drop_table('product_images')
+    op.drop_table('order_items')
+    op.drop_table('favorites')
+    op.drop_table('cart_items')
+    op.drop_table('artisan_disbursements')
+    op.drop_table('products')
+    op.drop_table('payments')
+    op.drop_table('messages')
+    op.drop_table('subcategories')
+    op.drop_table('orders')
+    op.drop_table('notifications')
+    op.drop_table('follows')
+    op.drop_table('collections')
+    op.drop_table('carts')
+    op.drop_table('artisan_socials')
+    op.drop_table('artisan_showcase_media')
+    op.drop_table('users')
+    op.drop_table('categories')
+
+    # Restore the placeholder tables expected by the initial migration's downgrade
+    op.create_table('products',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('price', sa.Float(), nullable=False),
+    sa.Column('description', sa.String(length=200), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('users',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('username', sa.String(length=50), nullable=False),
+    sa.Column('email', sa.String(length=120), nullable=False),
+    sa.Column('password', sa.String(length=200), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('email'),
+    sa.UniqueConstraint('username')
+    )
@@ -0,0 +1,29 @@
+"""Track whether an order holds product stock
+
+Orders placed through checkout reserve their products' stock; the flag lets
+cancellation and failed payments give it back exactly once.
+
+Revision ID: 5d9a1e3c7b60
+Revises: e7b3d1f5a286
+Create Date: 2026-10-18 21:14:08.530217
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5d9a1e3c7b60'
+down_revision = 'e7b3d1f5a286'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('orders', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('stock_reserved', sa.Boolean(), server_default=sa.false(), nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('orders', schema=None) as batch_op:
+        batch_op.drop_column('stock_reserved')
@@ -0,0 +1,38 @@
+"""Batched artisan settlements
+
+Adds the `accrued` disbursement status and links accrued earnings to the
+settlement payout that includes them.
+
+Revision ID: 6f1b9d2c8a53
+Revises: c2a6f0d84e19
+Create Date: 2026-10-18 16:58:12.941307
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6f1b9d2c8a53'
+down_revision = 'c2a6f0d84e19'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            op.execute("ALTER TYPE disbursementstatus ADD VALUE IF NOT EXISTS 'accrued'")
+
+    with op.batch_alter_table('artisan_disbursements', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('settlement_id', sa.String(length=36), nullable=True))
+        batch_op.create_foreign_key('fk_artisan_disbursements_settlement_id', 'artisan_disbursements', ['settlement_id'], ['id'])
+        batch_op.create_index('ix_artisan_disbursements_settlement_id', ['settlement_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('artisan_disbursements', schema=None) as batch_op:
+        batch_op.drop_index('ix_artisan_disbursements_settlement_id')
+        batch_op.drop_constraint('fk_artisan_disbursements_settlement_id', type_='foreignkey')
+        batch_op.drop_column('settlement_id')
+    # PostgreSQL cannot drop an enum value; `accrued` stays in disbursementstatus
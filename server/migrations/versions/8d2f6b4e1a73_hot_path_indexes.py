@@ -0,0 +1,42 @@
+"""Composite indexes for hot query paths
+
+payments.mpesa_transaction_id is already indexed by its unique constraint.
+
+Revision ID: 8d2f6b4e1a73
+Revises: 1c7e5a3d9b42
+Create Date: 2026-10-18 09:40:17.562903
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8d2f6b4e1a73'
+down_revision = '1c7e5a3d9b42'
+branch_labels = None
+depends_on = None
+
+
+INDEXES = [
+    ('ix_products_status_created_at_id', 'products', ['status', 'created_at', 'id']),
+    ('ix_orders_user_id_placed_at_id', 'orders', ['user_id', 'placed_at', 'id']),
+    ('ix_order_items_order_id', 'order_items', ['order_id']),
+    ('ix_messages_sender_receiver_created_at', 'messages', ['sender_id', 'receiver_id', 'created_at']),
+    ('ix_cart_items_cart_id_product_id', 'cart_items', ['cart_id', 'product_id']),
+    ('ix_order_items_artisan_id', 'order_items', ['artisan_id']),
+    ('ix_reviews_product_id_created_at', 'reviews', ['product_id', 'created_at']),
+    ('ix_favorites_user_id_product_id', 'favorites', ['user_id', 'product_id']),
+    ('ix_follows_follower_id_following_id', 'follows', ['follower_id', 'following_id']),
+    ('ix_notifications_user_id_is_read_created_at', 'notifications', ['user_id', 'is_read', 'created_at']),
+]
+
+
+def upgrade():
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns, unique=False)
+
+
+def downgrade():
+    for name, table, columns in reversed(INDEXES):
+        op.drop_index(name, table_name=table)
@@ -0,0 +1,35 @@
+"""Disbursement retry schedule and per-attempt idempotency keys
+
+Retries already parked in `retry` have no next_attempt_at and are re-queued on
+the first scheduler scan.
+
+Revision ID: 9e5d3a7b2f48
+Revises: 4b8e1f6a9c27
+Create Date: 2026-10-18 15:47:21.604833
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9e5d3a7b2f48'
+down_revision = '4b8e1f6a9c27'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('artisan_disbursements', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('next_attempt_at', sa.DateTime(), nullable=True))
+        batch_op.add_column(sa.Column('idempotency_key', sa.String(length=64), nullable=True))
+        batch_op.create_unique_constraint('uq_artisan_disbursements_idempotency_key', ['idempotency_key'])
+        batch_op.create_index('ix_artisan_disbursements_status_next_attempt_at', ['status', 'next_attempt_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('artisan_disbursements', schema=None) as batch_op:
+        batch_op.drop_index('ix_artisan_disbursements_status_next_attempt_at')
+        batch_op.drop_constraint('uq_artisan_disbursements_idempotency_key', type_='unique')
+        batch_op.drop_column('idempotency_key')
+        batch_op.drop_column('next_attempt_at')
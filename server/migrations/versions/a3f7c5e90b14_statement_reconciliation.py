@@ -0,0 +1,32 @@
+"""Record when payments and disbursements were matched to an M-Pesa statement
+
+Revision ID: a3f7c5e90b14
+Revises: d8c4e2a1f675
+Create Date: 2026-10-18 18:21:07.540912
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3f7c5e90b14'
+down_revision = 'd8c4e2a1f675'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('payments', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('reconciled_at', sa.DateTime(), nullable=True))
+
+    with op.batch_alter_table('artisan_disbursements', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('reconciled_at', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('artisan_disbursements', schema=None) as batch_op:
+        batch_op.drop_column('reconciled_at')
+
+    with op.batch_alter_table('payments', schema=None) as batch_op:
+        batch_op.drop_column('reconciled_at')
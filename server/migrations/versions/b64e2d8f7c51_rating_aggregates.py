@@ -0,0 +1,51 @@
+"""Per-product and per-artisan rating aggregates
+
+Rows are filled from existing reviews by backfill_ratings() at startup.
+
+Revision ID: b64e2d8f7c51
+Revises: 3a7c5e9b0d14
+Create Date: 2026-10-18 12:20:48.113270
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b64e2d8f7c51'
+down_revision = '3a7c5e9b0d14'
+branch_labels = None
+depends_on = None
+
+
+def _aggregate_columns():
+    return [
+        sa.Column('review_count', sa.Integer(), nullable=False),
+        sa.Column('rating_sum', sa.Integer(), nullable=False),
+        sa.Column('stars_1', sa.Integer(), nullable=False),
+        sa.Column('stars_2', sa.Integer(), nullable=False),
+        sa.Column('stars_3', sa.Integer(), nullable=False),
+        sa.Column('stars_4', sa.Integer(), nullable=False),
+        sa.Column('stars_5', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+    ]
+
+
+def upgrade():
+    op.create_table('product_ratings',
+    sa.Column('product_id', sa.String(length=36), nullable=False),
+    *_aggregate_columns(),
+    sa.ForeignKeyConstraint(['product_id'], ['products.id'], ),
+    sa.PrimaryKeyConstraint('product_id')
+    )
+    op.create_table('artisan_ratings',
+    sa.Column('artisan_id', sa.String(length=36), nullable=False),
+    *_aggregate_columns(),
+    sa.ForeignKeyConstraint(['artisan_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('artisan_id')
+    )
+
+
+def downgrade():
+    op.drop_table('artisan_ratings')
+    op.drop_table('product_ratings')
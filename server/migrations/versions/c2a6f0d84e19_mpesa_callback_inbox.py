@@ -0,0 +1,41 @@
+"""M-Pesa callback inbox
+
+Callbacks are stored by the endpoints and processed by `flask disbursements work`.
+
+Revision ID: c2a6f0d84e19
+Revises: 9e5d3a7b2f48
+Create Date: 2026-10-18 16:21:55.072416
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c2a6f0d84e19'
+down_revision = '9e5d3a7b2f48'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('mpesa_callbacks',
+    sa.Column('id', sa.String(length=36), nullable=False),
+    sa.Column('kind', sa.String(length=20), nullable=False),
+    sa.Column('dedupe_key', sa.String(length=255), nullable=False),
+    sa.Column('payload', sa.Text(), nullable=False),
+    sa.Column('received_at', sa.DateTime(), nullable=True),
+    sa.Column('processed_at', sa.DateTime(), nullable=True),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.Column('locked_by', sa.String(length=64), nullable=True),
+    sa.Column('locked_until', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('dedupe_key')
+    )
+    op.create_index('ix_mpesa_callbacks_processed_at_received_at', 'mpesa_callbacks', ['processed_at', 'received_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_mpesa_callbacks_processed_at_received_at', table_name='mpesa_callbacks')
+    op.drop_table('mpesa_callbacks')
@@ -0,0 +1,24 @@
+"""Index for the STK Push Query worker's scan of pending payments
+
+Revision ID: d8c4e2a1f675
+Revises: 6f1b9d2c8a53
+Create Date: 2026-10-18 17:34:40.118263
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd8c4e2a1f675'
+down_revision = '6f1b9d2c8a53'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_payments_status_updated_at', 'payments', ['status', 'updated_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_payments_status_updated_at', table_name='payments')
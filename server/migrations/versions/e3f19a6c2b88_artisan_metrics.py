@@ -0,0 +1,50 @@
+"""Artisan dashboard metrics (totals and per-day series)
+
+Existing orders are counted with `flask metrics backfill`.
+
+Revision ID: e3f19a6c2b88
+Revises: b64e2d8f7c51
+Create Date: 2026-10-18 13:05:12.406118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e3f19a6c2b88'
+down_revision = 'b64e2d8f7c51'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('artisan_metrics',
+    sa.Column('artisan_id', sa.String(length=36), nullable=False),
+    sa.Column('product_count', sa.Integer(), nullable=False),
+    sa.Column('order_count', sa.Integer(), nullable=False),
+    sa.Column('units_sold', sa.Integer(), nullable=False),
+    sa.Column('revenue', sa.Numeric(precision=12, scale=2), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['artisan_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('artisan_id')
+    )
+    op.create_table('artisan_daily_metrics',
+    sa.Column('artisan_id', sa.String(length=36), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('order_count', sa.Integer(), nullable=False),
+    sa.Column('units_sold', sa.Integer(), nullable=False),
+    sa.Column('revenue', sa.Numeric(precision=12, scale=2), nullable=False),
+    sa.ForeignKeyConstraint(['artisan_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('artisan_id', 'day')
+    )
+    with op.batch_alter_table('orders', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('metrics_counted', sa.Boolean(), server_default=sa.false(), nullable=False))
+
+
+def downgrade():
+    with op.batch_alter_table('orders', schema=None) as batch_op:
+        batch_op.drop_column('metrics_counted')
+
+    op.drop_table('artisan_daily_metrics')
+    op.drop_table('artisan_metrics')
@@ -0,0 +1,77 @@
+"""Full-text product search index
+
+Creates the product_search table that app/services/search_service.py keeps in
+step with products, and indexes the active products already stored:
+- PostgreSQL: a table with a weighted tsvector column and a GIN index
+- SQLite: an FTS5 virtual table
+Other dialects have no index; search falls back to a LIKE scan.
+
+Revision ID: e7b3d1f5a286
+Revises: a3f7c5e90b14
+Create Date: 2026-10-18 19:02:36.271940
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7b3d1f5a286'
+down_revision = 'a3f7c5e90b14'
+branch_labels = None
+depends_on = None
+
+
+POSTGRES_UPGRADE = [
+    """
+    CREATE TABLE product_search (
+        product_id VARCHAR(36) PRIMARY KEY REFERENCES products(id) ON DELETE CASCADE,
+        title TEXT,
+        description TEXT,
+        category TEXT,
+        artisan TEXT,
+        document TSVECTOR
+    )
+    """,
+    "CREATE INDEX ix_product_search_document ON product_search USING GIN (document)",
+    """
+    INSERT INTO product_search (product_id, title, description, category, artisan, document)
+    SELECT p.id, coalesce(p.title, ''), coalesce(p.description, ''), coalesce(c.name, ''), coalesce(u.full_name, ''),
+        setweight(to_tsvector('english', coalesce(p.title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(c.name, '')), 'B') ||
+        setweight(to_tsvector('simple', coalesce(u.full_name, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(p.description, '')), 'C')
+    FROM products p
+    LEFT JOIN categories c ON c.id = p.category_id
+    LEFT JOIN users u ON u.id = p.artisan_id
+    WHERE p.status = 'active'
+    """,
+]
+
+SQLITE_UPGRADE = [
+    """
+    CREATE VIRTUAL TABLE product_search USING fts5(
+        product_id UNINDEXED, title, description, category, artisan,
+        tokenize = 'porter unicode61'
+    )
+    """,
+    """
+    INSERT INTO product_search (product_id, title, description, category, artisan)
+    SELECT p.id, coalesce(p.title, ''), coalesce(p.description, ''), coalesce(c.name, ''), coalesce(u.full_name, '')
+    FROM products p
+    LEFT JOIN categories c ON c.id = p.category_id
+    LEFT JOIN users u ON u.id = p.artisan_id
+    WHERE p.status = 'active'
+    """,
+]
+
+
+def upgrade():
+    statements = {'postgresql': POSTGRES_UPGRADE, 'sqlite': SQLITE_UPGRADE}.get(op.get_context().dialect.name, [])
+    for statement in statements:
+        op.execute(statement)
+
+
+def downgrade():
+    if op.get_context().dialect.name in ('postgresql', 'sqlite'):
+        op.execute("DROP TABLE product_search")
@@ -0,0 +1,37 @@
+"""Platform daily rollups and date-range indexes for admin statistics
+
+Past days are filled on the first dashboard load, or with `flask stats rollup`.
+
+Revision ID: f7a2c4d91e36
+Revises: e3f19a6c2b88
+Create Date: 2026-10-18 13:48:37.520914
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f7a2c4d91e36'
+down_revision = 'e3f19a6c2b88'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('platform_daily_stats',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('signups', sa.Integer(), nullable=False),
+    sa.Column('orders', sa.Integer(), nullable=False),
+    sa.Column('gmv', sa.Numeric(precision=14, scale=2), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('day')
+    )
+    op.create_index('ix_users_created_at', 'users', ['created_at'], unique=False)
+    op.create_index('ix_orders_placed_at', 'orders', ['placed_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_orders_placed_at', table_name='orders')
+    op.drop_index('ix_users_created_at', table_name='users')
+    op.drop_table('platform_daily_stats')
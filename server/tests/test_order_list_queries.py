@@ -0,0 +1,87 @@
+"""
+Query-count regression test for GET /api/orders
+
+The order list loads each page with a fixed number of queries; a page of many
+orders must not cost more queries than a page of one (no per-order lookups).
+"""
+
+import pytest
+from sqlalchemy import event
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    monkeypatch.setenv('SECRET_KEY', 'test-secret')
+    monkeypatch.setenv('DATABASE_URL', f"sqlite:///{tmp_path / 'test.db'}")
+    monkeypatch.setenv('SESSION_BACKEND', 'memory')
+    monkeypatch.delenv('REDIS_URL', raising=False)
+    for name in ('MPESA_CONSUMER_KEY', 'MPESA_CONSUMER_SECRET', 'MPESA_SHORTCODE', 'MPESA_PASSKEY'):
+        monkeypatch.setenv(name, 'test')
+
+    from app import create_app
+    from app.models import db
+    app = create_app()
+    app.config['TESTING'] = True
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def _make_orders(buyer, artisan, count):
+    from app.models import db, Order, OrderItem, OrderStatus, Product
+    product = Product(title='Sisal basket', description='Woven', price=100, artisan_id=artisan.id)
+    db.session.add(product)
+    db.session.flush()
+    for _ in range(count):
+        order = Order(user_id=buyer.id, status=OrderStatus.pending, total_amount=200, currency='KSH')
+        db.session.add(order)
+        db.session.flush()
+        db.session.add_all([
+            OrderItem(order_id=order.id, product_id=product.id, artisan_id=artisan.id,
+                      quantity=1, unit_price=100, total_price=100)
+            for _ in range(2)
+        ])
+    db.session.commit()
+
+
+def _count_list_queries(app, user_id, role):
+    from app.models import db
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess.update(authenticated=True, user_id=user_id, user_role=role)
+
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db.engine, 'before_cursor_execute', count)
+    try:
+        response = client.get('/api/orders/')
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', count)
+    assert response.status_code == 200
+    return response.get_json(), len(statements)
+
+
+@pytest.mark.parametrize('role', ['buyer', 'admin'])
+def test_order_list_query_count_does_not_grow_with_orders(app, role):
+    from app.models import db, User, UserRole
+    buyer = User(role=UserRole.buyer, email='buyer@example.com', password_hash='x', full_name='Buyer')
+    artisan = User(role=UserRole.artisan, email='artisan@example.com', password_hash='x', full_name='Artisan')
+    db.session.add_all([buyer, artisan])
+    db.session.commit()
+    requester = buyer.id if role == 'buyer' else artisan.id
+
+    _make_orders(buyer, artisan, 1)
+    body, one_order = _count_list_queries(app, requester, role)
+    assert len(body['orders']) == 1
+
+    _make_orders(buyer, artisan, 9)
+    body, ten_orders = _count_list_queries(app, requester, role)
+    assert len(body['orders']) == 10
+    assert all(len(order['items']) == 2 for order in body['orders'])
+
+    assert ten_orders == one_order
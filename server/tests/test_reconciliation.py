@@ -0,0 +1,83 @@
+"""
+Statement reconciliation with batched settlements
+
+Earnings included in a settlement payout are marked successful without a
+receipt of their own; only the payout appears on the M-Pesa statement, so they
+must not be reported as missing from it. Records completed within the
+statement's last (whole) second still count as inside its span.
+"""
+
+import io
+from datetime import datetime
+from decimal import Decimal
+import pytest
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    monkeypatch.setenv('SECRET_KEY', 'test-secret')
+    monkeypatch.setenv('DATABASE_URL', f"sqlite:///{tmp_path / 'test.db'}")
+    monkeypatch.setenv('SESSION_BACKEND', 'memory')
+    monkeypatch.delenv('REDIS_URL', raising=False)
+    for name in ('MPESA_CONSUMER_KEY', 'MPESA_CONSUMER_SECRET', 'MPESA_SHORTCODE', 'MPESA_PASSKEY'):
+        monkeypatch.setenv(name, 'test')
+
+    from app import create_app
+    from app.models import db
+    app = create_app()
+    app.config['TESTING'] = True
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+def _statement(*lines):
+    rows = ['Receipt No.,Completion Time,Details,Transaction Status,Paid In,Withdrawn,Balance']
+    rows.extend(lines)
+    return io.StringIO('\n'.join(rows) + '\n')
+
+
+def test_settled_earnings_are_covered_by_their_payout(app):
+    from app.models import db, User, UserRole, ArtisanDisbursement, DisbursementStatus
+    from app.services.settlement_service import complete_settlement
+    from app.services.reconciliation_service import reconcile_statement
+
+    artisan = User(role=UserRole.artisan, email='artisan@example.com', password_hash='x', full_name='Artisan')
+    db.session.add(artisan)
+    db.session.flush()
+
+    payout = ArtisanDisbursement(
+        artisan_id=artisan.id, amount=Decimal('300.00'), status=DisbursementStatus.success,
+        mpesa_transaction_id='RCP0000001', completed_at=datetime(2026, 10, 1, 10, 0, 0)
+    )
+    db.session.add(payout)
+    db.session.flush()
+    db.session.add_all([
+        ArtisanDisbursement(artisan_id=artisan.id, amount=Decimal('100.00'),
+                            status=DisbursementStatus.accrued, settlement_id=payout.id)
+        for _ in range(3)
+    ])
+    db.session.flush()
+    complete_settlement(payout)
+
+    # Both completed within the statement's last second (10:05:00 UTC is 13:05:00 EAT)
+    db.session.add_all([
+        ArtisanDisbursement(artisan_id=artisan.id, amount=Decimal('50.00'), status=DisbursementStatus.success,
+                            mpesa_transaction_id='RCP0000002', completed_at=datetime(2026, 10, 1, 10, 5, 0, 250000)),
+        ArtisanDisbursement(artisan_id=artisan.id, amount=Decimal('70.00'), status=DisbursementStatus.success,
+                            mpesa_transaction_id='RCP0000003', completed_at=datetime(2026, 10, 1, 10, 5, 0, 750000)),
+    ])
+    db.session.commit()
+
+    report = io.StringIO()
+    summary = reconcile_statement(_statement(
+        'RCP0000001,2026-10-01 13:00:00,Business Payment to Artisan,Completed,,-300.00,1000.00',
+        'RCP0000002,2026-10-01 13:05:00,Business Payment to Artisan,Completed,,-50.00,950.00',
+    ), report)
+
+    assert summary == {'matched': 2, 'not_in_statement': 1}
+    lines = report.getvalue().strip().splitlines()
+    assert len(lines) == 2
+    assert lines[1].startswith('not_in_statement,RCP0000003,disbursement,')
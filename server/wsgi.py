@@ -1,12 +1,17 @@
 from app import create_app
-from app.extensions import db
-from app.utils.db_migrations import ensure_deleted_at_columns
+from app.utils.db_migrations import check_schema
+from app.services.search_service import product_search
+from app.services.conversation_service import backfill_conversations
+from app.services.rating_service import backfill_ratings
 
 app = create_app()
 
 with app.app_context():
-    db.create_all()
-    ensure_deleted_at_columns(app)
+    # The migrations own the schema; derived tables are only filled once it is current
+    if not check_schema(app):
+        product_search.ensure_index()
+        backfill_conversations()
+        backfill_ratings()
 
 if __name__ == "__main__":
     app.run()
\ No newline at end of file